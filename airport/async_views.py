@@ -0,0 +1,195 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from airport.pagination import FlightCursorPagination
+from airport.renderers import json_renderer
+from airport.response_cache import flight_response_cache
+from airport.serializers import (
+    FlightListSerializer,
+    FlightDetailSerializer,
+    FlightSeatMapSerializer,
+    ItinerarySerializer,
+)
+from airport.views import FlightViewSet, ItineraryViewSet
+
+
+class AsyncAPIView(View):
+    """
+    Read-only async view for ASGI servers.
+    Runs the same authentication, permission and throttle classes
+    as DRF views, while the handler awaits the async ORM
+    instead of blocking a worker thread on the database.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    renderer = json_renderer()
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(
+            request,
+            authenticators=[auth() for auth in self.authentication_classes],
+        )
+        self.request = request
+        try:
+            method = request.method.lower()
+            handler = None
+            if method in self.http_method_names:
+                handler = getattr(self, method, None)
+            if handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            await sync_to_async(self.initial)(request)
+            data = await handler(request, *args, **kwargs)
+        except Http404:
+            return self.handle_exception(exceptions.NotFound())
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+        return self.render(data)
+
+    async def options(self, request, *args, **kwargs):
+        return {"name": self.__class__.__name__}
+
+    def initial(self, request):
+        """Authenticate, check permissions and throttles like `APIView`"""
+        for permission in self.permission_classes:
+            if not permission().has_permission(request, self):
+                if request.authenticators and not (
+                    request.successful_authenticator
+                ):
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied()
+
+        durations = []
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                durations.append(throttle.wait())
+        if durations:
+            durations = [wait for wait in durations if wait is not None]
+            raise exceptions.Throttled(max(durations, default=None))
+
+    def handle_exception(self, exc):
+        headers = {}
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            authenticators = self.request.authenticators
+            if authenticators:
+                headers["WWW-Authenticate"] = authenticators[
+                    0
+                ].authenticate_header(self.request)
+            else:
+                exc.status_code = 403
+        if getattr(exc, "wait", None):
+            headers["Retry-After"] = "%d" % exc.wait
+
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {"detail": exc.detail}
+        return self.render(data, exc.status_code, headers)
+
+    def render(self, data, status=200, headers=None):
+        return HttpResponse(
+            self.renderer.render(data),
+            status=status,
+            headers=headers,
+            content_type=self.renderer.media_type,
+        )
+
+
+async def cached_flight_data(action, request, flight_ids, build):
+    """
+    Async `FlightViewSet.cached_response`: data from
+    `flight_response_cache` or awaited `build()` cached with versions
+    of flights from `flight_ids(data)`
+    """
+    key = flight_response_cache.key(action, request)
+    data = await sync_to_async(flight_response_cache.get)(key)
+    if data is not None:
+        return data
+
+    schedule_version = await sync_to_async(
+        flight_response_cache.schedule_version
+    )()
+    data = await build()
+    await sync_to_async(flight_response_cache.set)(
+        key, data, flight_ids(data), schedule_version
+    )
+    return data
+
+
+class AsyncFlightListView(AsyncAPIView):
+    """Async `flights/` list with the same filters, pages and cache"""
+
+    query_budgets = {"get": 2}
+
+    async def get(self, request):
+        return await cached_flight_data(
+            "list",
+            request,
+            lambda data: [flight["id"] for flight in data["results"]],
+            lambda: self.page(request),
+        )
+
+    async def page(self, request):
+        queryset = FlightViewSet.flight_queryset("list", request.query_params)
+        paginator = FlightCursorPagination()
+        page = paginator.page_queryset(queryset, request)
+        paginator.set_page([flight async for flight in page])
+
+        serializer = FlightListSerializer(
+            paginator.page, many=True, context={"request": request}
+        )
+        return paginator.get_paginated_response(serializer.data).data
+
+
+class AsyncFlightDetailView(AsyncAPIView):
+    """Async `flights/<pk>/` detail, `?seat_map=compact` is supported"""
+
+    query_budgets = {"get": 2}
+
+    async def get(self, request, pk):
+        return await cached_flight_data(
+            "retrieve",
+            request,
+            lambda data: [data["id"]],
+            lambda: self.flight(request, pk),
+        )
+
+    async def flight(self, request, pk):
+        queryset = FlightViewSet.flight_queryset(
+            "retrieve", request.query_params
+        )
+        try:
+            flight = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            raise Http404
+
+        if request.query_params.get("seat_map") == "compact":
+            serializer_class = FlightSeatMapSerializer
+        else:
+            serializer_class = FlightDetailSerializer
+        return serializer_class(flight, context={"request": request}).data
+
+
+class AsyncItineraryView(AsyncAPIView):
+    """
+    Async `itineraries/` search. The search itself is CPU bound
+    over the in-memory timetable, so it runs in a worker thread
+    and the event loop keeps serving other requests.
+    """
+
+    query_budgets = {"get": ItineraryViewSet.query_budgets["list"]}
+
+    async def get(self, request):
+        itineraries = await sync_to_async(ItineraryViewSet.find_itineraries)(
+            request.query_params
+        )
+        return ItinerarySerializer(itineraries, many=True).data
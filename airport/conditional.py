@@ -0,0 +1,84 @@
+import hashlib
+import math
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class TableVersions:
+    """
+    Time of the last change of every table in whole seconds (those
+    of `Last-Modified`), kept in the shared cache. Every change moves
+    the version past the previous one, even within the same second.
+    A lost marker is recreated with the current time, which only makes
+    clients download the rows once more.
+    """
+
+    prefix = "table_version"
+
+    def key(self, model):
+        return f"{self.prefix}:{model._meta.label_lower}"
+
+    def get(self, models):
+        keys = [self.key(model) for model in models]
+        versions = cache.get_many(keys)
+        now = math.ceil(time.time())
+        missing = dict.fromkeys(
+            (key for key in keys if key not in versions), now
+        )
+        if missing:
+            cache.set_many(missing, timeout=None)
+            versions.update(missing)
+        return [versions[key] for key in keys]
+
+    def touch(self, model):
+        """Mark table changed now and once more when it's committed"""
+        key = self.key(model)
+
+        def bump():
+            version = int(cache.get(key, 0)) + 1
+            cache.set(key, max(version, math.ceil(time.time())), timeout=None)
+
+        bump()
+        transaction.on_commit(bump)
+
+
+table_versions = TableVersions()
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified of reference data from `version_models`
+    table versions. `If-None-Match`/`If-Modified-Since` requests
+    of unchanged tables get 304 before rows are queried,
+    `If-Modified-Since` is ignored along with `If-None-Match`.
+    """
+
+    version_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def conditional_response(self, view, request, *args, **kwargs):
+        versions = table_versions.get(self.version_models)
+        representation = (
+            f"{request.get_full_path()};{request.accepted_media_type};"
+            + ";".join(map(repr, versions))
+        )
+        etag = quote_etag(hashlib.md5(representation.encode()).hexdigest())
+        last_modified = math.ceil(max(versions))
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
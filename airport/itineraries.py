@@ -0,0 +1,388 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import timedelta
+
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from airport.models import Flight
+
+
+class Leg:
+    """Single flight of the in-memory timetable"""
+
+    __slots__ = (
+        "flight_id",
+        "route_id",
+        "source_id",
+        "destination_id",
+        "departure_time",
+        "arrival_time",
+        "departs",
+        "arrives",
+        "seats_left",
+    )
+
+    def __init__(
+        self,
+        flight_id,
+        route_id,
+        source_id,
+        destination_id,
+        departure_time,
+        arrival_time,
+        seats_left,
+    ):
+        self.flight_id = flight_id
+        self.route_id = route_id
+        self.source_id = source_id
+        self.destination_id = destination_id
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.departs = int(departure_time.timestamp())
+        self.arrives = int(arrival_time.timestamp())
+        self.seats_left = seats_left
+
+
+class Timetable:
+    """
+    Departures of every airport sorted by time plus the route graph.
+    Changed under the index lock only and copy-on-write: lists and sets
+    of a published timetable are replaced, never changed in place,
+    so readers never lock.
+    """
+
+    def __init__(self):
+        self.legs = {}
+        self.departures = {}
+        self.sources_of = {}
+        # flights updated since are read by the next incremental refresh
+        self.changed_since = None
+
+    def load(self, legs):
+        """Fill a timetable which isn't published yet"""
+        sources_of = {}
+        for leg in legs:
+            self.legs[leg.flight_id] = leg
+            self.departures.setdefault(leg.source_id, []).append(
+                (leg.departs, leg.flight_id)
+            )
+            sources_of.setdefault(leg.destination_id, set()).add(leg.source_id)
+        for departures in self.departures.values():
+            departures.sort()
+        self.sources_of = {
+            destination: frozenset(sources)
+            for destination, sources in sources_of.items()
+        }
+
+    def apply(self, legs=(), removed=()):
+        """Add or replace `legs` and drop flights with `removed` ids"""
+        legs = {leg.flight_id: leg for leg in legs}
+        moved = []
+        dropped = {}
+        added = {}
+        for leg in legs.values():
+            old = self.legs.get(leg.flight_id)
+            # mostly seats left, the departure lists stay as they are
+            same = old is not None and old.source_id == leg.source_id
+            if not (same and old.departs == leg.departs):
+                moved.append(leg)
+        for flight_id in (*(leg.flight_id for leg in moved), *removed):
+            old = self.legs.get(flight_id)
+            if old is not None:
+                dropped.setdefault(old.source_id, set()).add(
+                    (old.departs, old.flight_id)
+                )
+        for leg in moved:
+            added.setdefault(leg.source_id, []).append(
+                (leg.departs, leg.flight_id)
+            )
+            sources = self.sources_of.get(leg.destination_id, frozenset())
+            if leg.source_id not in sources:
+                self.sources_of[leg.destination_id] = sources | {leg.source_id}
+
+        for source in dropped.keys() | added.keys():
+            stale = dropped.get(source, ())
+            departures = [
+                departure
+                for departure in self.departures.get(source, ())
+                if departure not in stale
+            ]
+            departures += added.get(source, ())
+            departures.sort()
+            self.departures[source] = departures
+        self.legs.update(legs)
+        for flight_id in removed:
+            self.legs.pop(flight_id, None)
+
+    def hops_to(self, destinations, max_legs):
+        """Minimal number of legs from every airport to `destinations`"""
+        hops = dict.fromkeys(destinations, 0)
+        queue = deque(destinations)
+        while queue:
+            airport = queue.popleft()
+            if hops[airport] == max_legs:
+                continue
+            for source in self.sources_of.get(airport, ()):
+                if source not in hops:
+                    hops[source] = hops[airport] + 1
+                    queue.append(source)
+        return hops
+
+
+class FlightIndex:
+    """
+    In-memory timetable for itinerary search.
+    Flights updated since the last refresh (new, edited or with changed
+    references, by any worker) are applied before every search,
+    flights saved or deleted by this process are applied on commit.
+    The whole index is rebuilt in a background thread every
+    `rebuild_interval` seconds to drop flights deleted by other workers
+    and catch changes committed later than `commit_lag` after their
+    `updated_at`; searches keep using the old one meanwhile.
+    """
+
+    rebuild_interval = 300
+    history = timedelta(days=1)
+    commit_lag = timedelta(seconds=10)
+    max_expansions = 200_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._rebuilding = False
+        self.timetable = Timetable()
+
+    @staticmethod
+    def _flights():
+        return Flight.objects.values(
+            "id",
+            "route_id",
+            "departure_time",
+            "arrival_time",
+            source_id=F("route__source_id"),
+            destination_id=F("route__destination_id"),
+            seats_left=(
+                F("airplane__rows") * F("airplane__seats_in_row")
+                - F("tickets_sold")
+            ),
+        )
+
+    @staticmethod
+    def _leg(row):
+        return Leg(
+            row["id"],
+            row["route_id"],
+            row["source_id"],
+            row["destination_id"],
+            row["departure_time"],
+            row["arrival_time"],
+            row["seats_left"],
+        )
+
+    def _build(self):
+        timetable = Timetable()
+        timetable.changed_since = timezone.now() - self.commit_lag
+        flights = self._flights().filter(
+            departure_time__gte=timezone.now() - self.history
+        )
+        timetable.load(
+            self._leg(row) for row in flights.iterator(chunk_size=10_000)
+        )
+        return timetable
+
+    def _rebuild(self):
+        try:
+            timetable = self._build()
+            with self._lock:
+                self.timetable = timetable
+                self._built_at = time.monotonic()
+        finally:
+            self._rebuilding = False
+
+    def _rebuild_in_thread(self):
+        try:
+            self._rebuild()
+        finally:
+            connections.close_all()
+
+    def refresh(self):
+        if self._built_at is None:
+            # nothing to search yet
+            with self._lock:
+                if self._built_at is None:
+                    self.timetable = self._build()
+                    self._built_at = time.monotonic()
+            return
+
+        with self._lock:
+            expired = (
+                not self._rebuilding
+                and time.monotonic() - self._built_at > self.rebuild_interval
+            )
+            if expired:
+                self._rebuilding = True
+        if expired:
+            threading.Thread(
+                target=self._rebuild_in_thread, daemon=True
+            ).start()
+
+        # a refresh of another thread is as recent as this one
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            timetable = self.timetable
+            changed_since = timezone.now() - self.commit_lag
+            flights = self._flights().filter(
+                updated_at__gt=timetable.changed_since
+            )
+            timetable.apply(self._leg(row) for row in flights)
+            timetable.changed_since = changed_since
+        finally:
+            self._lock.release()
+
+    def update_flight(self, flight):
+        """Apply just saved flight without waiting for the next refresh"""
+        if self._built_at is None:
+            return
+        with self._lock:
+            self.timetable.apply(
+                [
+                    Leg(
+                        flight.id,
+                        flight.route_id,
+                        flight.route.source_id,
+                        flight.route.destination_id,
+                        flight.departure_time,
+                        flight.arrival_time,
+                        flight.airplane.all_places - flight.tickets_sold,
+                    )
+                ]
+            )
+
+    def remove_flight(self, flight_id):
+        if self._built_at is None:
+            return
+        with self._lock:
+            self.timetable.apply(removed=[flight_id])
+
+    def expire(self):
+        """Drop the index, the next search builds it again"""
+        self._built_at = None
+
+    def search(
+        self,
+        sources,
+        destinations,
+        departure_after,
+        departure_before,
+        max_legs=2,
+        min_connection=timedelta(minutes=45),
+        max_connection=timedelta(hours=6),
+        limit=10,
+    ):
+        """
+        Time-dependent depth-first search of journeys up to `max_legs`.
+        Branches that can't reach a destination within the remaining legs
+        are cut using hop distances of the route graph.
+        """
+        timetable = self.timetable
+        destinations = set(destinations)
+        hops = timetable.hops_to(destinations, max_legs)
+        min_gap = int(min_connection.total_seconds())
+        max_gap = int(max_connection.total_seconds())
+        journeys = []
+        budget = self.max_expansions
+
+        stack = [
+            (
+                (),
+                source,
+                int(departure_after.timestamp()),
+                int(departure_before.timestamp()),
+            )
+            for source in sources
+            if source in hops
+        ]
+        while stack and budget > 0:
+            path, airport, earliest, latest = stack.pop()
+            departures = timetable.departures.get(airport, ())
+            visited = {airport}.union(leg.source_id for leg in path)
+            remaining = max_legs - len(path) - 1
+
+            position = bisect_left(departures, (earliest,))
+            while position < len(departures):
+                departs, flight_id = departures[position]
+                position += 1
+                if departs >= latest:
+                    break
+                budget -= 1
+                leg = timetable.legs.get(flight_id)
+                if leg is None:
+                    # removed meanwhile
+                    continue
+                destination = leg.destination_id
+                if (
+                    leg.seats_left <= 0
+                    or destination in visited
+                    or hops.get(destination, max_legs + 1) > remaining
+                ):
+                    continue
+
+                journey = path + (leg,)
+                if destination in destinations:
+                    journeys.append(journey)
+                else:
+                    stack.append(
+                        (
+                            journey,
+                            destination,
+                            leg.arrives + min_gap,
+                            leg.arrives + max_gap + 1,
+                        )
+                    )
+
+        journeys.sort(
+            key=lambda journey: (
+                journey[-1].arrives,
+                len(journey),
+                -journey[0].departs,
+            )
+        )
+        return journeys[:limit]
+
+    def find_itineraries(self, **kwargs):
+        """
+        Search journeys and confirm seats of the returned flights
+        with one query, searching again if some of them sold out.
+        """
+        self.refresh()
+        for _ in range(3):
+            journeys = self.search(**kwargs)
+            legs = {
+                leg.flight_id: leg for journey in journeys for leg in journey
+            }
+            seats = dict(
+                Flight.objects.filter(id__in=legs).values_list(
+                    "id",
+                    F("airplane__rows") * F("airplane__seats_in_row")
+                    - F("tickets_sold"),
+                )
+            )
+            sold_out = False
+            for flight_id, leg in legs.items():
+                leg.seats_left = seats.get(flight_id, 0)
+                sold_out |= leg.seats_left <= 0
+            if not sold_out:
+                return journeys
+        return [
+            journey
+            for journey in journeys
+            if all(leg.seats_left > 0 for leg in journey)
+        ]
+
+
+flight_index = FlightIndex()
@@ -0,0 +1,390 @@
+import http.client
+import json
+import logging
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework.settings import api_settings
+
+from airport.models import Flight, Order
+
+SCENARIOS = ("flight_search", "flight_detail", "order_create", "token")
+
+
+class InProcessClient:
+    """Requests through the Django handler of this process, with queries"""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def request(self, method, path, data=None, headers=None):
+        if not hasattr(self.local, "client"):
+            self.local.client = Client(raise_request_exception=False)
+        queries = 0
+
+        def count(execute, *args):
+            nonlocal queries
+            queries += 1
+            return execute(*args)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count):
+            response = self.local.client.generic(
+                method,
+                path,
+                json.dumps(data) if data is not None else "",
+                content_type="application/json",
+                headers=headers,
+            )
+        latency = time.perf_counter() - started
+        return response.status_code, response.content, latency, queries
+
+
+class HttpClient:
+    """Requests to a running server, its queries aren't known"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, data=None, headers=None):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(data).encode() if data is not None else None,
+            method=method,
+            headers={"Content-Type": "application/json", **(headers or {})},
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, body = error.code, error.read()
+        except (OSError, http.client.HTTPException, ValueError):
+            # refused, reset or malformed, counted as failed
+            status, body = None, b""
+        return status, body, time.perf_counter() - started, None
+
+
+class Command(BaseCommand):
+    """
+    Django command to load test the API through its real URL routes.
+    Every scenario sends `--requests` requests from `--concurrency`
+    clients, in process through the Django handler or to `--url`.
+    Orders created by the run are deleted at the end.
+    The JSON report goes to stdout or `--output`, progress to stderr.
+    """
+
+    help = (
+        "Measure throughput, p50/p95/p99 latency and queries per request "
+        "of flight search, flight detail, order creation under seat "
+        "contention and token issuance on the current database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Requests of every scenario sent before measuring.",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=SCENARIOS,
+            help="Scenario to run, may be repeated, all by default.",
+        )
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server (ex. http://localhost:8000) "
+            "instead of in process requests. Its throttling applies.",
+        )
+        parser.add_argument(
+            "--email",
+            default="benchmark@example.com",
+            help="User of the requests, created if it doesn't exist.",
+        )
+        parser.add_argument("--password", default="benchmark")
+        parser.add_argument(
+            "--contended-seats",
+            type=int,
+            default=20,
+            help="Seats all order requests compete for.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="File to write the report to.")
+        parser.add_argument(
+            "--baseline",
+            help="Report of an earlier run to compare with, "
+            "changes are in percent.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        self.user(options["email"], options["password"])
+        if settings.DEBUG and not options["url"]:
+            self.stderr.write(
+                "DEBUG is on: the debug toolbar and query log slow requests "
+                "down, run with DJANGO_DEBUG=False for comparable numbers"
+            )
+        if options["url"]:
+            client = HttpClient(options["url"])
+        else:
+            client = InProcessClient()
+
+        # user rate limits would turn most of the run into 429 responses,
+        # rejected orders are expected and counted instead of logged
+        request_logger = logging.getLogger("django.request")
+        request_logger.disabled = True
+        try:
+            with override_settings(
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    "DEFAULT_THROTTLE_RATES": {
+                        scope: None
+                        for scope in api_settings.DEFAULT_THROTTLE_RATES
+                    },
+                }
+            ):
+                report = self.run(client, options)
+        finally:
+            request_logger.disabled = False
+        if baseline is not None:
+            report["baseline"] = self.compare(report, baseline)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def user(email, password):
+        user, created = get_user_model().objects.get_or_create(email=email)
+        if created:
+            user.set_password(password)
+            user.save()
+
+    def run(self, client, options):
+        rnd = random.Random(options["seed"])
+        credentials = {
+            "email": options["email"],
+            "password": options["password"],
+        }
+        status, body, _, _ = client.request(
+            "POST", reverse("user:token_obtain_pair"), credentials
+        )
+        if status != 200:
+            raise CommandError(
+                f"Can't obtain token of {options['email']}: {status} {body}"
+            )
+        headers = {"Authorization": f"Bearer {json.loads(body)['access']}"}
+
+        count = options["warmup"] + options["requests"]
+        requests = {
+            "flight_search": lambda: self.search_requests(rnd, count),
+            "flight_detail": lambda: self.detail_requests(rnd, count),
+            "order_create": lambda: self.order_requests(
+                rnd, count, options["contended_seats"]
+            ),
+            "token": lambda: [
+                ("POST", reverse("user:token_obtain_pair"), credentials)
+            ]
+            * count,
+        }
+
+        report = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "target": options["url"] or "in-process",
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "scenarios": {},
+        }
+        for name in options["scenario"] or SCENARIOS:
+            self.stderr.write(f"Running {name}")
+            results, elapsed = self.load(
+                client,
+                requests[name](),
+                {} if name == "token" else headers,
+                options["warmup"],
+                options["concurrency"],
+            )
+            if name == "order_create":
+                self.delete_orders(results)
+            report["scenarios"][name] = self.summary(
+                results[options["warmup"] :], elapsed
+            )
+        return report
+
+    @staticmethod
+    def flight_ids(rnd, count):
+        ids = list(
+            Flight.objects.order_by("id").values_list("id", flat=True)[:10_000]
+        )
+        if not ids:
+            raise CommandError("No flights, run `manage.py seed_scale` first")
+        return rnd.sample(ids, min(len(ids), count))
+
+    def search_requests(self, rnd, count):
+        """Flights between the cities of a known flight on its date"""
+        flights = Flight.objects.filter(
+            id__in=self.flight_ids(rnd, 100)
+        ).values_list(
+            "route__source__closest_big_city",
+            "route__destination__closest_big_city",
+            "departure_time",
+        )
+        paths = [
+            reverse("airport:flight-list")
+            + "?"
+            + urllib.parse.urlencode(
+                {
+                    "from": source,
+                    "to": destination,
+                    "departure_time": f"{departure_time:%Y-%m-%d}",
+                }
+            )
+            for source, destination, departure_time in flights
+        ]
+        return [("GET", rnd.choice(paths), None) for _ in range(count)]
+
+    def detail_requests(self, rnd, count):
+        paths = [
+            reverse("airport:flight-detail", args=[flight_id])
+            for flight_id in self.flight_ids(rnd, 100)
+        ]
+        return [("GET", rnd.choice(paths), None) for _ in range(count)]
+
+    @staticmethod
+    def order_requests(rnd, count, contended_seats):
+        """Orders of one seat among a few free ones of the emptiest flight"""
+        flight = (
+            Flight.objects.select_related("airplane")
+            .order_by(
+                F("tickets_sold")
+                - F("airplane__rows") * F("airplane__seats_in_row"),
+                "id",
+            )
+            .first()
+        )
+        if flight is None:
+            raise CommandError("No flights, run `manage.py seed_scale` first")
+        seats = [
+            (row, seat)
+            for row in range(1, flight.airplane.rows + 1)
+            for seat in range(1, flight.airplane.seats_in_row + 1)
+            if not flight.seats.is_taken(row, seat)
+        ][:contended_seats]
+        if not seats:
+            raise CommandError(f"Flight {flight.id} is sold out")
+
+        requests = []
+        for _ in range(count):
+            row, seat = rnd.choice(seats)
+            ticket = {"row": row, "seat": seat, "flight": flight.id}
+            requests.append(
+                ("POST", reverse("airport:order-list"), {"tickets": [ticket]})
+            )
+        return requests
+
+    @staticmethod
+    def load(client, requests, headers, warmup, concurrency):
+        """Results of all requests and the time of the measured ones"""
+        results = [
+            client.request(method, path, data, headers)
+            for method, path, data in requests[:warmup]
+        ]
+        with ThreadPoolExecutor(concurrency) as executor:
+            started = time.perf_counter()
+            results += executor.map(
+                lambda request: client.request(*request, headers),
+                requests[warmup:],
+            )
+            elapsed = time.perf_counter() - started
+        return results, elapsed
+
+    @staticmethod
+    def delete_orders(results):
+        order_ids = [
+            json.loads(body)["id"]
+            for status, body, _, _ in results
+            if status == 201
+        ]
+        Order.objects.filter(id__in=order_ids).delete()
+
+    @staticmethod
+    def summary(results, elapsed):
+        latencies = [latency * 1000 for _, _, latency, _ in results]
+        # percentiles need two points at least
+        percentiles = statistics.quantiles(
+            latencies * 2 if len(latencies) == 1 else latencies,
+            n=100,
+            method="inclusive",
+        )
+        statuses = Counter(str(status) for status, _, _, _ in results)
+        queries = [count for _, _, _, count in results if count is not None]
+        return {
+            "throughput": round(len(results) / elapsed, 1),
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies), 2),
+                "p50": round(percentiles[49], 2),
+                "p95": round(percentiles[94], 2),
+                "p99": round(percentiles[98], 2),
+                "max": round(max(latencies), 2),
+            },
+            "statuses": dict(sorted(statuses.items())),
+            "errors": sum(
+                status is None or status >= 500 for status, _, _, _ in results
+            ),
+            "queries_per_request": (
+                {
+                    "mean": round(statistics.fmean(queries), 2),
+                    "max": max(queries),
+                }
+                if queries
+                else None
+            ),
+        }
+
+    @staticmethod
+    def compare(report, baseline):
+        """Change of throughput and latencies against `baseline` in %"""
+        changes = {}
+        for name, summary in report["scenarios"].items():
+            before = baseline.get("scenarios", {}).get(name)
+            if not before:
+                continue
+            pairs = {"throughput": (summary, before)}
+            pairs.update(
+                (key, (summary["latency_ms"], before["latency_ms"]))
+                for key in ("p50", "p95", "p99")
+            )
+            changes[name] = {
+                key: round((now[key] / then[key] - 1) * 100, 1)
+                for key, (now, then) in pairs.items()
+                if then.get(key)
+            }
+        return changes
@@ -0,0 +1,146 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare throughput of sync and async flight views.
+    Both run in process against the current database with the same
+    number of requests in flight: sync views in a pool of threads,
+    async views as tasks on one event loop.
+    Both serve repeated requests from `flight_response_cache`.
+    """
+
+    help = (
+        "Compare concurrency-limited throughput of sync `flights/` views "
+        "and their async versions on the current database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--email",
+            help="User to authenticate as, the first superuser by default",
+        )
+        parser.add_argument(
+            "--query",
+            default="",
+            help="Query string of list requests (ex. from=Lviv&to=Kyiv)",
+        )
+
+    def handle(self, *args, **options) -> None:
+        flight = Flight.objects.order_by("id").first()
+        if flight is None:
+            raise CommandError("No flights, seed the database first")
+
+        headers = {"Authorization": f"Bearer {self.token(options)}"}
+        query = f"?{options['query']}" if options["query"] else ""
+        cases = {
+            "list": (
+                reverse("airport:flight-list") + query,
+                reverse("airport:async-flight-list") + query,
+            ),
+            "detail": (
+                reverse("airport:flight-detail", args=[flight.id]),
+                reverse("airport:async-flight-detail", args=[flight.id]),
+            ),
+        }
+
+        count = options["requests"]
+        concurrency = options["concurrency"]
+        # user rate limits would turn most of the run into 429 responses
+        with override_settings(
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": {
+                    scope: None
+                    for scope in api_settings.DEFAULT_THROTTLE_RATES
+                },
+            }
+        ):
+            for name, (sync_url, async_url) in cases.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.report(
+                    "sync",
+                    self.run_sync(sync_url, headers, count, concurrency),
+                )
+                self.report(
+                    "async",
+                    asyncio.run(
+                        self.run_async(async_url, headers, count, concurrency)
+                    ),
+                )
+
+    @staticmethod
+    def token(options):
+        users = get_user_model().objects.filter(is_active=True)
+        if options["email"]:
+            user = users.filter(email=options["email"]).first()
+        else:
+            user = users.filter(is_superuser=True).order_by("id").first()
+        if user is None:
+            raise CommandError("User to authenticate as is not found")
+        return AccessToken.for_user(user)
+
+    @staticmethod
+    def run_sync(url, headers, count, concurrency):
+        local = threading.local()
+
+        def fetch(_):
+            if not hasattr(local, "client"):
+                local.client = Client()
+            started = time.perf_counter()
+            response = local.client.get(url, headers=headers)
+            return response.status_code, time.perf_counter() - started
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            started = time.perf_counter()
+            results = list(executor.map(fetch, range(count)))
+            elapsed = time.perf_counter() - started
+        return results, elapsed
+
+    @staticmethod
+    async def run_async(url, headers, count, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with semaphore:
+                # per request thread for the ORM like the ASGI handler
+                async with ThreadSensitiveContext():
+                    started = time.perf_counter()
+                    response = await client.get(url, headers=headers)
+                    latency = time.perf_counter() - started
+                    await sync_to_async(connections.close_all)()
+            return response.status_code, latency
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(fetch() for _ in range(count)))
+        return results, time.perf_counter() - started
+
+    def report(self, name, run):
+        results, elapsed = run
+        latencies = sorted(latency for _, latency in results)
+        errors = sum(status != 200 for status, _ in results)
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        self.stdout.write(
+            f"{name:>5}: {len(results) / elapsed:8.1f} req/s "
+            f"p50={statistics.median(latencies) * 1000:.1f}ms "
+            f"p95={p95 * 1000:.1f}ms errors={errors}"
+        )
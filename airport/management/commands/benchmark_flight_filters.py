@@ -0,0 +1,59 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from airport.management.schedule import seed_schedule
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare `__date` and half-open range flight filters.
+    Seeds a schedule inside a transaction which is rolled back at the end.
+    """
+
+    help = (
+        "Print query plans and timings of date flight filters "
+        "on a temporary seeded schedule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flights", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options) -> None:
+        with transaction.atomic():
+            route = seed_schedule(options["flights"], options["seed"])[0]
+            self.stdout.write(f"Seeded {options['flights']} flights")
+            day = datetime(2024, 6, 15, tzinfo=timezone.utc)
+            cases = {
+                "date_cast": Flight.objects.filter(
+                    departure_time__date=day.date()
+                ),
+                "range": Flight.objects.filter(
+                    departure_time__gte=day,
+                    departure_time__lt=day + timedelta(days=1),
+                ),
+                "date_cast_route": Flight.objects.filter(
+                    departure_time__date=day.date(), route=route
+                ),
+                "range_route": Flight.objects.filter(
+                    departure_time__gte=day,
+                    departure_time__lt=day + timedelta(days=1),
+                    route=route,
+                ),
+            }
+            for name, queryset in cases.items():
+                queryset = queryset.values_list("id", flat=True)
+                started = time.perf_counter()
+                for _ in range(options["repeat"]):
+                    rows = len(list(queryset))
+                elapsed = (time.perf_counter() - started) / options["repeat"]
+
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(queryset.explain())
+                self.stdout.write(f"rows={rows} avg={elapsed * 1000:.3f}ms\n")
+            transaction.set_rollback(True)
@@ -0,0 +1,188 @@
+import io
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.parsers import ORJSONParser
+from airport.query_plan import QueryPlan
+from airport.renderers import ORJSONRenderer, orjson
+from airport.serializers import (
+    FlightDetailSerializer,
+    FlightListSerializer,
+    OrderListSerializer,
+)
+from airport.views import FlightViewSet, OrderViewSet
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare stdlib and orjson renderers and parsers
+    on flight list, order list and flight detail payloads.
+    Seeds rows inside a transaction which is rolled back at the end,
+    both renderers must produce the same bytes.
+    """
+
+    help = (
+        "Time rendering and parsing of API payloads with `JSONRenderer` "
+        "and `ORJSONRenderer` on temporary seeded data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flights", type=int, default=2000)
+        parser.add_argument("--orders", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options) -> None:
+        if orjson is None:
+            raise CommandError("orjson isn't installed, nothing to compare")
+
+        context = {"request": Request(APIRequestFactory().get("/"))}
+        with transaction.atomic():
+            flight = self.seed(options["flights"], options["orders"])
+            flights = FlightViewSet.flight_queryset("list", {})
+            payloads = {
+                "flight list": FlightListSerializer.values_representation(
+                    list(FlightListSerializer.values_queryset(flights)),
+                    context,
+                ),
+                "order list": OrderListSerializer(
+                    QueryPlan.for_serializer(OrderListSerializer).apply(
+                        OrderViewSet.queryset.order_by("id")
+                    ),
+                    many=True,
+                    context=context,
+                ).data,
+                "flight detail": FlightDetailSerializer(
+                    FlightViewSet.flight_queryset("retrieve", {}).get(
+                        id=flight.id
+                    ),
+                    context=context,
+                ).data,
+            }
+            transaction.set_rollback(True)
+
+        for name, data in payloads.items():
+            rendered = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != rendered:
+                raise CommandError(f"{name}: rendered JSON differs")
+
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"size={len(rendered) / 1024:.1f}KiB")
+            for action, stdlib, fast in (
+                (
+                    "render",
+                    lambda: JSONRenderer().render(data),
+                    lambda: ORJSONRenderer().render(data),
+                ),
+                (
+                    "parse",
+                    lambda: JSONParser().parse(io.BytesIO(rendered)),
+                    lambda: ORJSONParser().parse(io.BytesIO(rendered)),
+                ),
+            ):
+                stdlib_time = self.measure(stdlib, options["repeat"])
+                fast_time = self.measure(fast, options["repeat"])
+                self.stdout.write(
+                    f"{action}: json={stdlib_time * 1000:.2f}ms "
+                    f"orjson={fast_time * 1000:.2f}ms "
+                    f"speedup={stdlib_time / fast_time:.1f}x"
+                )
+            self.stdout.write("")
+
+    @staticmethod
+    def measure(call, repeat):
+        """Best time of `repeat` calls"""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def seed(self, flight_count, order_count):
+        """Seed flights and orders, return the flight with most tickets"""
+        airplane_type = AirplaneType.objects.create(name="Benchmark")
+        airplane = Airplane.objects.create(
+            name="Benchmark",
+            rows=40,
+            seats_in_row=9,
+            airplane_type=airplane_type,
+        )
+        source, destination = Airport.objects.bulk_create(
+            Airport(name=f"Airport {index}", closest_big_city=f"City {index}")
+            for index in range(2)
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=500
+        )
+        crews = Crew.objects.bulk_create(
+            Crew(first_name=f"Pilot {index}", last_name="Benchmark")
+            for index in range(4)
+        )
+
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        flights = Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=airplane,
+                departure_time=start + timedelta(hours=index),
+                arrival_time=start + timedelta(hours=index + 2),
+            )
+            for index in range(flight_count)
+        )
+        Flight.crews.through.objects.bulk_create(
+            Flight.crews.through(flight_id=flight.id, crew_id=crew.id)
+            for flight in flights[:1]
+            for crew in crews
+        )
+
+        user = get_user_model().objects.create_user(
+            "benchmark@benchmark.com", "benchmark"
+        )
+        orders = Order.objects.bulk_create(
+            Order(user=user) for _ in range(order_count)
+        )
+        seats = [
+            (row, seat)
+            for row in range(1, airplane.rows + 1)
+            for seat in range(1, airplane.seats_in_row + 1)
+        ]
+        Ticket.objects.bulk_create(
+            (
+                Ticket(
+                    row=row,
+                    seat=seat,
+                    flight=flights[0],
+                    order=orders[index % order_count],
+                )
+                for index, (row, seat) in enumerate(seats)
+            ),
+            batch_size=1000,
+        )
+
+        flight = flights[0]
+        for row, seat in seats:
+            flight.seats.take(row, seat)
+        flight.save_seats()
+        self.stdout.write(
+            f"Seeded {flight_count} flights, {order_count} orders"
+        )
+        return flight
@@ -0,0 +1,102 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from airport.management.schedule import seed_schedule
+from airport.query_plan import QueryPlan
+from airport.serializers import (
+    AirplaneListSerializer,
+    FlightListSerializer,
+    RouteListSerializer,
+)
+from airport.views import AirplaneViewSet, FlightViewSet, RouteViewSet
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare list serializers with their `values()` path.
+    Seeds rows inside a transaction which is rolled back at the end,
+    both paths include their queries and must render the same JSON.
+    """
+
+    help = (
+        "Time list serializers against `values()` serialization "
+        "on temporary seeded flights, routes and airplanes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flights", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options) -> None:
+        request = Request(APIRequestFactory().get("/"))
+        context = {"request": request}
+        renderer = JSONRenderer()
+
+        with transaction.atomic():
+            seed_schedule(
+                options["flights"], options["seed"], crews_per_flight=2
+            )
+            self.stdout.write(f"Seeded {options['flights']} flights")
+            cases = {
+                "flights": (
+                    FlightListSerializer,
+                    FlightViewSet.flight_queryset("list", {}),
+                ),
+                "routes": (
+                    RouteListSerializer,
+                    QueryPlan.for_serializer(RouteListSerializer).apply(
+                        RouteViewSet.queryset.order_by("id")
+                    ),
+                ),
+                "airplanes": (
+                    AirplaneListSerializer,
+                    QueryPlan.for_serializer(AirplaneListSerializer).apply(
+                        AirplaneViewSet.queryset.order_by("id")
+                    ),
+                ),
+            }
+            for name, (serializer_class, queryset) in cases.items():
+
+                def serialize():
+                    return serializer_class(
+                        queryset.all(), many=True, context=context
+                    ).data
+
+                def serialize_values():
+                    rows = list(serializer_class.values_queryset(queryset))
+                    return serializer_class.values_representation(
+                        rows, context
+                    )
+
+                model_time, data = self.measure(serialize, options["repeat"])
+                values_time, values_data = self.measure(
+                    serialize_values, options["repeat"]
+                )
+                if renderer.render(data) != renderer.render(values_data):
+                    raise CommandError(f"{name}: outputs differ")
+
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(
+                    f"rows={len(data)} "
+                    f"serializer={model_time * 1000:.1f}ms "
+                    f"values={values_time * 1000:.1f}ms "
+                    f"speedup={model_time / values_time:.1f}x\n"
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(serialize, repeat):
+        """Best time of `repeat` runs and the data of the last one"""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serialize()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.models import SeatHold
+
+
+class Command(BaseCommand):
+    """Django command to delete expired seat holds, run it periodically"""
+
+    help = "Delete seat holds past their expiry time."
+
+    def handle(self, *args, **options) -> None:
+        deleted, _ = SeatHold.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired seat hold(s)")
+        )
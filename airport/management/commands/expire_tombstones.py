@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.models import Tombstone
+
+
+class Command(BaseCommand):
+    """Django command to delete tombstones older than `TOMBSTONE_TTL`"""
+
+    help = "Delete tombstones of deleted rows past `TOMBSTONE_TTL`."
+
+    def handle(self, *args, **options) -> None:
+        deleted, _ = Tombstone.objects.filter(
+            deleted_at__lte=timezone.now() - settings.TOMBSTONE_TTL
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired tombstone(s)")
+        )
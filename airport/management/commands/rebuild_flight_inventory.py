@@ -0,0 +1,105 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from airport.models import Flight, Ticket
+from airport.response_cache import flight_response_cache
+from airport.seat_map import SeatMap
+
+# flights locked and rebuilt per transaction
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """
+    Django command to rebuild flight seat maps from sold tickets.
+    Flights are rebuilt in chunks, every chunk is locked before
+    its tickets are read, so orders committed meanwhile aren't lost.
+    `--check` reads without locks and locks only the suspects.
+    """
+
+    help = (
+        "Rebuild `Flight.seat_map` and `Flight.tickets_sold` from tickets "
+        "and fix drifted flights."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drifted flights, exit with error if any.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        flight_ids = list(
+            Flight.objects.order_by("id").values_list("id", flat=True)
+        )
+        found = 0
+        for start in range(0, len(flight_ids), CHUNK_SIZE):
+            chunk = flight_ids[start : start + CHUNK_SIZE]
+            if options["check"]:
+                # an order may commit between the unlocked reads,
+                # suspects are confirmed under their locks
+                chunk = [flight.id for flight, _ in self.drifted(chunk)]
+                if not chunk:
+                    continue
+            with transaction.atomic():
+                drifted = self.drifted(chunk, lock=True)
+                for flight, seat_map in drifted:
+                    self.stdout.write(
+                        f"Flight {flight.id}: tickets_sold="
+                        f"{flight.tickets_sold}, actual={len(seat_map)}"
+                    )
+                if not options["check"]:
+                    self.fix(drifted)
+            found += len(drifted)
+
+        if options["check"]:
+            if found:
+                raise CommandError(f"{found} flight(s) have drifted inventory")
+            self.stdout.write(self.style.SUCCESS("Inventory is exact"))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt inventory of {found} flight(s)")
+        )
+
+    @staticmethod
+    def drifted(flight_ids, lock=False):
+        """Flights of `flight_ids` which don't match their tickets"""
+        flights = (
+            Flight.objects.filter(id__in=flight_ids)
+            .only("id", "seat_map", "tickets_sold", "updated_at")
+            .order_by("id")
+        )
+        if lock:
+            # locked before the tickets are read
+            flights = list(flights.select_for_update())
+        seat_maps = {}
+        tickets = (
+            Ticket.objects.filter(flight_id__in=flight_ids)
+            .values_list("flight", "row", "seat")
+            .order_by()
+        )
+        for flight_id, row, seat in tickets:
+            seat_maps.setdefault(flight_id, SeatMap()).take(row, seat)
+
+        drifted = []
+        for flight in flights:
+            seat_map = seat_maps.get(flight.id, SeatMap())
+            exact = bytes(flight.seats) == bytes(seat_map)
+            if not exact or flight.tickets_sold != len(seat_map):
+                drifted.append((flight, seat_map))
+        return drifted
+
+    @staticmethod
+    def fix(drifted):
+        now = timezone.now()
+        for flight, seat_map in drifted:
+            flight.seat_map = bytes(seat_map)
+            flight.tickets_sold = len(seat_map)
+            flight.updated_at = now
+        Flight.objects.bulk_update(
+            [flight for flight, _ in drifted],
+            ["seat_map", "tickets_sold", "updated_at"],
+        )
+        flight_response_cache.touch(flight.id for flight, _ in drifted)
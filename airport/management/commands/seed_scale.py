@@ -0,0 +1,349 @@
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from airport.conditional import table_versions
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.response_cache import flight_response_cache
+from airport.seat_map import SeatMap
+
+# name, rows, seats in row
+AIRPLANE_TYPES = (
+    ("Airbus A320", 30, 6),
+    ("Boeing 737", 32, 6),
+    ("Embraer E190", 25, 4),
+    ("Airbus A330", 40, 8),
+    ("Boeing 787", 40, 9),
+)
+FIRST_NAMES = (
+    "Anna",
+    "Bohdan",
+    "Daria",
+    "Ivan",
+    "Kateryna",
+    "Mykola",
+    "Olena",
+    "Petro",
+    "Sofia",
+    "Taras",
+)
+LAST_NAMES = (
+    "Bondar",
+    "Hnatiuk",
+    "Koval",
+    "Lysenko",
+    "Melnyk",
+    "Shevchenko",
+    "Tkachenko",
+)
+MINIMUMS = {
+    "airports": 2,
+    "routes": 1,
+    "airplanes": 1,
+    "crews": 1,
+    "users": 1,
+    "flights": 1,
+    "tickets": 0,
+    "days": 1,
+    "batch_size": 1,
+}
+# average cruise speed in km per hour, to get flight time from distance
+CRUISE_SPEED = 800
+# fixed, so the same seed generates the same dataset on any day
+DEFAULT_START = "2030-01-01"
+
+
+def start_date(value):
+    """ISO date or `today` with an offset in days (ex. today+7)"""
+    if value.startswith("today"):
+        days = int(value.removeprefix("today") or 0)
+        return datetime.now(timezone.utc).date() + timedelta(days=days)
+    return date.fromisoformat(value)
+
+
+class Command(BaseCommand):
+    """
+    Django command to generate a synthetic dataset for load testing.
+    The same options and `--seed` always generate the same rows.
+    Flights with their crews, orders and tickets are streamed
+    in batches of bulk inserts, every batch is committed on its own,
+    flight seat maps and `tickets_sold` match the tickets.
+    """
+
+    help = (
+        "Generate airports, routes, airplanes, crews, users, flights, "
+        "orders and tickets at a configurable scale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=100)
+        parser.add_argument("--routes", type=int, default=1000)
+        parser.add_argument("--airplanes", type=int, default=200)
+        parser.add_argument("--crews", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--flights", type=int, default=10_000)
+        parser.add_argument(
+            "--tickets",
+            type=int,
+            default=1_000_000,
+            help="Tickets spread evenly over flights, "
+            "limited by their airplane places.",
+        )
+        parser.add_argument(
+            "--start",
+            type=start_date,
+            default=DEFAULT_START,
+            help=f"First day of the schedule, {DEFAULT_START} by default "
+            "(ex. --start=2024-06-01 or --start=today+7).",
+        )
+        parser.add_argument(
+            "--days", type=int, default=90, help="Days of the schedule."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Tickets (or flights) inserted per transaction.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--password",
+            default="seedpass",
+            help="Password of the generated users.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        self.validate(options)
+        rnd = random.Random(options["seed"])
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            airports = self.seed_airports(options["airports"])
+            routes = self.seed_routes(rnd, airports, options["routes"])
+            airplanes = self.seed_airplanes(rnd, options["airplanes"])
+            crew_ids = self.seed_crews(rnd, options["crews"])
+            user_ids = self.seed_users(
+                options["seed"], options["users"], options["password"]
+            )
+        self.stdout.write(
+            f"Seeded {len(airports)} airports, {len(routes)} routes, "
+            f"{len(airplanes)} airplanes, {len(crew_ids)} crews, "
+            f"{len(user_ids)} users"
+        )
+
+        flights = self.plan_flights(
+            rnd, options, routes, airplanes, crew_ids, user_ids
+        )
+        flight_count = ticket_count = 0
+        for batch in self.batches(flights, options["batch_size"]):
+            with transaction.atomic():
+                ticket_count += self.insert_flights(batch)
+            flight_count += len(batch)
+            self.stdout.write(
+                f"Flights {flight_count}/{options['flights']}, "
+                f"tickets {ticket_count}"
+            )
+
+        flight_response_cache.touch()
+        for model in (AirplaneType, Airport, Crew, Route, Airplane):
+            table_versions.touch(model)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {flight_count} flights and {ticket_count} tickets "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+        )
+
+    @staticmethod
+    def validate(options):
+        for name, minimum in MINIMUMS.items():
+            if options[name] < minimum:
+                raise CommandError(
+                    f"--{name.replace('_', '-')} must be at least {minimum}"
+                )
+        airports = options["airports"]
+        if options["routes"] > airports * (airports - 1):
+            raise CommandError(
+                f"{airports} airports have at most "
+                f"{airports * (airports - 1)} routes"
+            )
+        email = Command.email(options["seed"], 0)
+        if get_user_model().objects.filter(email=email).exists():
+            raise CommandError(
+                f"Dataset of seed {options['seed']} exists, use another seed"
+            )
+
+    @staticmethod
+    def email(seed, index):
+        return f"seed{seed}-user{index}@example.com"
+
+    @staticmethod
+    def seed_airports(count):
+        return Airport.objects.bulk_create(
+            Airport(name=f"Airport {index}", closest_big_city=f"City {index}")
+            for index in range(count)
+        )
+
+    @staticmethod
+    def seed_routes(rnd, airports, count):
+        pairs = set()
+        routes = []
+        while len(routes) < count:
+            source, destination = rnd.sample(airports, 2)
+            if (source.id, destination.id) in pairs:
+                continue
+            pairs.add((source.id, destination.id))
+            routes.append(
+                Route(
+                    source=source,
+                    destination=destination,
+                    distance=rnd.randint(200, 9000),
+                )
+            )
+        return Route.objects.bulk_create(routes)
+
+    @staticmethod
+    def seed_airplanes(rnd, count):
+        airplane_types = AirplaneType.objects.bulk_create(
+            AirplaneType(name=name) for name, _, _ in AIRPLANE_TYPES
+        )
+        airplanes = []
+        for index in range(count):
+            type_index = rnd.randrange(len(AIRPLANE_TYPES))
+            name, rows, seats_in_row = AIRPLANE_TYPES[type_index]
+            airplanes.append(
+                Airplane(
+                    name=f"{name} #{index}",
+                    rows=rows,
+                    seats_in_row=seats_in_row,
+                    airplane_type=airplane_types[type_index],
+                )
+            )
+        return Airplane.objects.bulk_create(airplanes)
+
+    @staticmethod
+    def seed_crews(rnd, count):
+        crews = Crew.objects.bulk_create(
+            Crew(
+                first_name=rnd.choice(FIRST_NAMES),
+                last_name=rnd.choice(LAST_NAMES),
+            )
+            for _ in range(count)
+        )
+        return [crew.id for crew in crews]
+
+    def seed_users(self, seed, count, password):
+        # hashing is slow, all users share one hash of the same password
+        password = make_password(password)
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(
+                email=self.email(seed, index),
+                password=password,
+            )
+            for index in range(count)
+        )
+        return [user.id for user in users]
+
+    @staticmethod
+    def plan_flights(rnd, options, routes, airplanes, crew_ids, user_ids):
+        """
+        Yield unsaved flights with their seat maps, crew ids and orders
+        as lists of (user id, seats), one flight at a time
+        """
+        start = datetime.combine(
+            options["start"], datetime.min.time(), tzinfo=timezone.utc
+        )
+        count, tickets = options["flights"], options["tickets"]
+        for index in range(count):
+            route = rnd.choice(routes)
+            airplane = rnd.choice(airplanes)
+            departure_time = start + timedelta(
+                minutes=rnd.randrange(options["days"] * 24 * 60)
+            )
+            flight_time = timedelta(
+                minutes=30 + route.distance * 60 // CRUISE_SPEED
+            )
+
+            seats_in_row = airplane.seats_in_row
+            sold = min(
+                airplane.all_places,
+                tickets * (index + 1) // count - tickets * index // count,
+            )
+            places = sorted(rnd.sample(range(airplane.all_places), sold))
+            seats = [
+                (place // seats_in_row + 1, place % seats_in_row + 1)
+                for place in places
+            ]
+            seat_map = SeatMap()
+            for row, seat in seats:
+                seat_map.take(row, seat)
+
+            orders = []
+            while seats:
+                size = rnd.randint(1, 4)
+                orders.append((rnd.choice(user_ids), seats[:size]))
+                seats = seats[size:]
+
+            flight = Flight(
+                route=route,
+                airplane=airplane,
+                departure_time=departure_time,
+                arrival_time=departure_time + flight_time,
+                tickets_sold=sold,
+                seat_map=bytes(seat_map),
+            )
+            yield (
+                flight,
+                rnd.sample(crew_ids, min(len(crew_ids), rnd.randint(2, 4))),
+                orders,
+            )
+
+    @staticmethod
+    def batches(flights, size):
+        """Lists of planned flights with about `size` tickets at most"""
+        batch, tickets = [], 0
+        for planned in flights:
+            batch.append(planned)
+            tickets += planned[0].tickets_sold
+            if tickets >= size or len(batch) >= size:
+                yield batch
+                batch, tickets = [], 0
+        if batch:
+            yield batch
+
+    @staticmethod
+    def insert_flights(batch):
+        """Insert planned flights, return the number of their tickets"""
+        Flight.objects.bulk_create(flight for flight, _, _ in batch)
+        Flight.crews.through.objects.bulk_create(
+            Flight.crews.through(flight_id=flight.id, crew_id=crew_id)
+            for flight, crew_ids, _ in batch
+            for crew_id in crew_ids
+        )
+
+        planned_orders = [
+            (flight, Order(user_id=user_id), seats)
+            for flight, _, orders in batch
+            for user_id, seats in orders
+        ]
+        Order.objects.bulk_create(order for _, order, _ in planned_orders)
+        tickets = Ticket.objects.bulk_create(
+            Ticket(row=row, seat=seat, flight=flight, order=order)
+            for flight, order, seats in planned_orders
+            for row, seat in seats
+        )
+        return len(tickets)
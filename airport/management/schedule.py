@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Route,
+)
+
+
+def seed_schedule(count, seed, crews_per_flight=0):
+    """
+    Seed `count` flights of 2024 between 20 airports for benchmarks,
+    every flight gets `crews_per_flight` crew members.
+    Returns the routes of the schedule.
+    """
+    rnd = random.Random(seed)
+    airplane_type = AirplaneType.objects.create(name="Benchmark")
+    airplanes = Airplane.objects.bulk_create(
+        Airplane(
+            name=f"Benchmark {index}",
+            rows=30,
+            seats_in_row=6,
+            airplane_type=airplane_type,
+            image=(
+                f"uploads/airplanes/benchmark-{index}.jpg" if index % 2 else ""
+            ),
+        )
+        for index in range(50)
+    )
+    airports = Airport.objects.bulk_create(
+        Airport(name=f"Airport {index}", closest_big_city=f"City {index}")
+        for index in range(20)
+    )
+    routes = Route.objects.bulk_create(
+        Route(source=source, destination=destination, distance=500)
+        for source in airports
+        for destination in airports
+        if source != destination
+    )
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    flights = []
+    for _ in range(count):
+        departure_time = start + timedelta(
+            minutes=rnd.randrange(366 * 24 * 60)
+        )
+        flights.append(
+            Flight(
+                route=rnd.choice(routes),
+                airplane=rnd.choice(airplanes),
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=2),
+            )
+        )
+    flights = Flight.objects.bulk_create(flights, batch_size=5000)
+
+    if crews_per_flight:
+        crews = Crew.objects.bulk_create(
+            Crew(first_name=f"Pilot {index}", last_name="Benchmark")
+            for index in range(100)
+        )
+        Flight.crews.through.objects.bulk_create(
+            (
+                Flight.crews.through(flight_id=flight.id, crew_id=crew.id)
+                for flight in flights
+                for crew in rnd.sample(crews, crews_per_flight)
+            ),
+            batch_size=5000,
+        )
+    return routes
@@ -0,0 +1,437 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    "http_requests_total": (
+        "counter",
+        "Requests by view, action, method and status.",
+        None,
+    ),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Request latency.",
+        LATENCY_BUCKETS,
+    ),
+    "db_queries_per_request": (
+        "histogram",
+        "Database queries of a request.",
+        QUERY_BUCKETS,
+    ),
+    "db_query_duration_seconds": (
+        "histogram",
+        "Time of a request in database queries.",
+        LATENCY_BUCKETS,
+    ),
+    "serializer_duration_seconds": (
+        "histogram",
+        "Time of a request in serializer validation and representation.",
+        LATENCY_BUCKETS,
+    ),
+    "throttled_requests_total": (
+        "counter",
+        "Requests rejected by throttles by throttle scope.",
+        None,
+    ),
+}
+# totals of exited workers, see `fold_exited_worker`
+EXITED_FILE = "exited.json"
+FOLDED_NAMES = 1000
+HTTP_METHODS = {"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"}
+
+
+class Metrics:
+    """
+    Counters and histograms of this process.
+    Every thread updates a shard of its own, so recording takes no lock
+    (one is taken only when a thread records for the first time)
+    and `collect` sums the shards. With `METRICS_DIR` set, every worker
+    writes its totals to a file there at most once per
+    `METRICS_FLUSH_INTERVAL`, and `collect_all` adds up the files
+    of the other workers, so any worker serves the totals of all.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.shards = []
+        self.flushed_at = 0.0
+        self.pid = None
+
+    def shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = {}
+            with self.lock:
+                self.shards.append(shard)
+            return shard
+
+    def inc(self, name, labels, value=1):
+        shard = self.shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """Count `value` in its bucket, the last slot is the sum"""
+        buckets = METRICS[name][2]
+        shard = self.shard()
+        key = (name, labels)
+        slots = shard.get(key)
+        if slots is None:
+            # buckets, +Inf and the sum
+            slots = shard[key] = [0] * (len(buckets) + 2)
+        slots[bisect.bisect_left(buckets, value)] += 1
+        slots[-1] += value
+
+    def collect(self):
+        """Totals of all threads of this process"""
+        with self.lock:
+            shards = list(self.shards)
+        totals = {}
+        for shard in shards:
+            # copying the items of a dict is atomic under the GIL
+            merge(totals, list(shard.items()))
+        return totals
+
+    def collect_all(self):
+        """Totals of this process and the last flushed ones of others"""
+        totals = self.collect()
+        directory = settings.METRICS_DIR
+        if not directory or not os.path.isdir(directory):
+            return totals
+        skipped = (self.file_name(), EXITED_FILE)
+        workers = {
+            entry.name: read_totals(entry.path)
+            for entry in os.scandir(directory)
+            if entry.name.endswith(".json") and entry.name not in skipped
+        }
+        # read last: a worker folded meanwhile is listed there
+        exited = read_totals(os.path.join(directory, EXITED_FILE))
+        folded = set(exited["folded"]) if exited else set()
+        for name, data in workers.items():
+            if data and name not in folded:
+                merge(totals, decode(data["totals"]))
+        if exited:
+            merge(totals, decode(exited["totals"]))
+        return totals
+
+    def reset(self):
+        with self.lock:
+            for shard in self.shards:
+                shard.clear()
+
+    def file_name(self):
+        if self.pid != os.getpid():
+            # pids of recycled workers are reused, their files are kept
+            self.pid = os.getpid()
+            self.token = uuid.uuid4().hex[:8]
+        return f"{self.pid}-{self.token}.json"
+
+    def flush(self):
+        """Write the totals of this process to `METRICS_DIR` atomically"""
+        directory = settings.METRICS_DIR
+        self.flushed_at = time.monotonic()
+        totals = self.collect()
+        if not directory or not totals:
+            return
+        os.makedirs(directory, exist_ok=True)
+        write_totals(
+            os.path.join(directory, self.file_name()),
+            {"totals": encode(totals)},
+        )
+
+    def maybe_flush(self):
+        interval = settings.METRICS_FLUSH_INTERVAL.total_seconds()
+        if settings.METRICS_DIR and (
+            time.monotonic() - self.flushed_at >= interval
+        ):
+            self.flush()
+
+
+def merge(totals, items):
+    """Add counter values and histogram slots of `items` to `totals`"""
+    for key, value in items:
+        if isinstance(value, list):
+            slots = totals.get(key)
+            if slots is None:
+                totals[key] = list(value)
+            else:
+                totals[key] = [a + b for a, b in zip(slots, value)]
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+def encode(totals):
+    return [[name, labels, value] for (name, labels), value in totals.items()]
+
+
+def decode(items):
+    return (
+        ((name, tuple(map(tuple, labels))), value)
+        for name, labels, value in items
+    )
+
+
+def read_totals(path):
+    try:
+        with open(path) as metrics_file:
+            return json.load(metrics_file)
+    except (OSError, ValueError):
+        # removed meanwhile
+        return None
+
+
+def write_totals(path, data):
+    temporary = f"{path}.{threading.get_ident()}.tmp"
+    with open(temporary, "w") as metrics_file:
+        json.dump(data, metrics_file)
+    os.replace(temporary, path)
+
+
+def fold_exited_worker(directory, pid):
+    """
+    Add the totals of an exited worker to `EXITED_FILE` and remove its
+    own files, so recycled workers don't pile up files to read.
+    Called by the gunicorn master only (`child_exit`), one at a time.
+    """
+    path = os.path.join(directory, EXITED_FILE)
+    exited = read_totals(path) or {"folded": [], "totals": []}
+    totals = {}
+    merge(totals, decode(exited["totals"]))
+    files = [
+        entry.name
+        for entry in os.scandir(directory)
+        if entry.name.startswith(f"{pid}-")
+    ]
+    folded = [name for name in files if name.endswith(".json")]
+    for name in folded:
+        data = read_totals(os.path.join(directory, name))
+        if data:
+            merge(totals, decode(data["totals"]))
+    # readers skip folded files they read before the removal,
+    # the recent names are kept for slow readers
+    folded = (exited["folded"] + folded)[-FOLDED_NAMES:]
+    write_totals(path, {"folded": folded, "totals": encode(totals)})
+    for name in files:
+        os.remove(os.path.join(directory, name))
+
+
+metrics = Metrics()
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = (f'{name}="{escape_label(str(value))}"' for name, value in labels)
+    return "{" + ",".join(pairs) + "}"
+
+
+def escape_label(value):
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def exposition(totals):
+    """Prometheus text format of `totals`"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        samples = sorted(
+            (
+                (labels, value)
+                for (metric, labels), value in totals.items()
+                if metric == name
+            ),
+            key=lambda sample: sample[0],
+        )
+        for labels, value in samples:
+            if buckets is None:
+                lines.append(f"{name}{format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), value):
+                cumulative += count
+                bucket_labels = format_labels((*labels, ("le", str(bound))))
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {value[-1]}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    """Database and serializer work of the current request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+# copied into `sync_to_async` threads, so async views are counted too
+current_stats = ContextVar("current_stats", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - started
+
+
+def add_query_counter(sender, connection, **kwargs):
+    # wrappers outlive reconnects of the same connection
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+def timed_serialization(func):
+    """Add the time of `func` to the serializer time of the request"""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = current_stats.get()
+        # nested serializers are timed by the outermost one
+        if stats is None or stats.serializing:
+            return func(*args, **kwargs)
+        stats.serializing = True
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.serializer_time += time.perf_counter() - started
+            stats.serializing = False
+
+    return wrapper
+
+
+class TimedSerializerMixin:
+    """
+    Adds validation and representation time to the serializer time
+    of the request. List serializers call these of their child
+    for every item, so lists are timed as well.
+    """
+
+    @timed_serialization
+    def run_validation(self, *args, **kwargs):
+        return super().run_validation(*args, **kwargs)
+
+    @timed_serialization
+    def to_representation(self, *args, **kwargs):
+        return super().to_representation(*args, **kwargs)
+
+
+def instrument():
+    """Count queries of every connection, flush totals on exit"""
+    connection_created.connect(
+        add_query_counter, dispatch_uid="airport.metrics"
+    )
+    # the last totals of a stopped worker
+    atexit.register(metrics.flush)
+
+
+def view_labels(request):
+    """View class (or function) and viewset action of the request"""
+    match = request.resolver_match
+    if match is None:
+        return "unmatched", ""
+    method = request.method.lower()
+    view = match.func
+    view_class = getattr(view, "cls", None) or getattr(
+        view, "view_class", None
+    )
+    actions = getattr(view, "actions", None) or {}
+    return (
+        (view_class or view).__name__,
+        actions.get(method, method),
+    )
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, database queries and serializer time
+    of every request labelled by view and action
+    (ex. `FlightViewSet`, `list`). Goes first in `MIDDLEWARE`
+    to time the other middleware as well.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def record(request, response, stats, duration):
+        view, action = view_labels(request)
+        labels = (("view", view), ("action", action))
+        method = request.method if request.method in HTTP_METHODS else "OTHER"
+        metrics.inc(
+            "http_requests_total",
+            (
+                *labels,
+                ("method", method),
+                ("status", str(response.status_code)),
+            ),
+        )
+        metrics.observe("http_request_duration_seconds", labels, duration)
+        metrics.observe("db_queries_per_request", labels, stats.queries)
+        metrics.observe("db_query_duration_seconds", labels, stats.query_time)
+        metrics.observe(
+            "serializer_duration_seconds", labels, stats.serializer_time
+        )
+        metrics.maybe_flush()
+
+
+def metrics_view(request):
+    """Totals of all workers in the Prometheus text format"""
+    return HttpResponse(
+        exposition(metrics.collect_all()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.13 on 2026-10-18 03:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_sold_tickets(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    counts = (
+        Ticket.objects.order_by()
+        .values("flight")
+        .annotate(count=models.Count("id"))
+    )
+    for row in counts:
+        Flight.objects.filter(id=row["flight"]).update(
+            tickets_sold=row["count"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("airport", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="flight",
+            name="crews",
+            field=models.ManyToManyField(
+                related_name="flights", to="airport.crew"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="order",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="orders",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(
+            count_sold_tickets, reverse_code=migrations.RunPython.noop
+        ),
+    ]
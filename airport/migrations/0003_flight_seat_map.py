@@ -0,0 +1,34 @@
+# Generated by Django 4.2.13 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+from airport.seat_map import SeatMap
+
+
+def fill_seat_maps(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    seat_maps = {}
+    tickets = Ticket.objects.values_list("flight", "row", "seat").order_by()
+    for flight_id, row, seat in tickets.iterator():
+        seat_maps.setdefault(flight_id, SeatMap()).take(row, seat)
+    for flight_id, seat_map in seat_maps.items():
+        Flight.objects.filter(id=flight_id).update(seat_map=bytes(seat_map))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0002_flight_tickets_sold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="seat_map",
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(
+            fill_seat_maps, reverse_code=migrations.RunPython.noop
+        ),
+    ]
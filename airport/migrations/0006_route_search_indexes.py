@@ -0,0 +1,42 @@
+# Generated by Django 4.2.13 on 2026-10-18 03:25
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0005_flight_time_range_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="airport",
+            index=models.Index(
+                django.db.models.functions.text.Upper("closest_big_city"),
+                name="airport_upper_city_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["route", "departure_time"],
+                name="flight_route_departure_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="route",
+            index=models.Index(
+                fields=["source", "destination"],
+                name="route_source_destination_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="route",
+            index=models.Index(
+                fields=["destination", "source"],
+                name="route_destination_source_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.13 on 2026-10-18 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0009_delta_sync"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="idempotencykey",
+            name="response",
+            field=models.JSONField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="idempotencykey",
+            name="status_code",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+    ]
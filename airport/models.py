@@ -2,10 +2,15 @@ import os
 import uuid
 
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 from rest_framework.serializers import ValidationError
 
+from airport.response_cache import flight_response_cache
+from airport.seat_map import SeatMap
 from airport_api_service import settings
 
 
@@ -19,10 +24,31 @@ class Flight(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crews = models.ManyToManyField("Crew", related_name="flights")
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    seat_map = models.BinaryField(default=bytes, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.route} arrived at {self.departure_time}"
 
+    @cached_property
+    def seats(self):
+        return SeatMap(self.seat_map)
+
+    def save_seats(self):
+        """
+        Store `seats` along with the matching `tickets_sold` counter.
+        Callers must hold a row lock on the flight.
+        """
+        self.seat_map = bytes(self.seats)
+        self.tickets_sold = len(self.seats)
+        self.updated_at = timezone.now()
+        Flight.objects.filter(id=self.id).update(
+            seat_map=self.seat_map,
+            tickets_sold=self.tickets_sold,
+            updated_at=self.updated_at,
+        )
+
     @staticmethod
     def validate_time(departure_time, arrival_time, error_to_raise):
         flight_time = arrival_time - departure_time
@@ -45,10 +71,43 @@ class Flight(models.Model):
         update_fields=None,
     ):
         self.full_clean()
+        if update_fields is None and not (self._state.adding or force_insert):
+            # booking columns of this copy may be stale, they're
+            # written under the row lock only (see `save_seats`)
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ("seat_map", "tickets_sold")
+            ]
         return super(Flight, self).save(
             force_insert, force_update, using, update_fields
         )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["departure_time", "id"],
+                name="flight_departure_id_idx",
+            ),
+            models.Index(
+                fields=["departure_time", "route"],
+                name="flight_departure_route_idx",
+            ),
+            models.Index(
+                fields=["airplane", "departure_time"],
+                name="flight_airplane_departure_idx",
+            ),
+            models.Index(fields=["arrival_time"], name="flight_arrival_idx"),
+            models.Index(
+                fields=["route", "departure_time"],
+                name="flight_route_departure_idx",
+            ),
+            models.Index(
+                fields=["updated_at", "id"], name="flight_updated_idx"
+            ),
+        ]
+
 
 class Route(models.Model):
     source = models.ForeignKey(
@@ -61,10 +120,26 @@ class Route(models.Model):
     distance = models.PositiveSmallIntegerField(
         validators=[MaxValueValidator(17_000), MinValueValidator(19)]
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.source.name}-{self.destination}"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["source", "destination"],
+                name="route_source_destination_idx",
+            ),
+            models.Index(
+                fields=["destination", "source"],
+                name="route_destination_source_idx",
+            ),
+            models.Index(
+                fields=["updated_at", "id"], name="route_updated_idx"
+            ),
+        ]
+
 
 def airplane_image_file_path(instance, filename):
     _, extension = os.path.splitext(filename)
@@ -105,7 +180,7 @@ class Ticket(models.Model):
     )
 
     @staticmethod
-    def validate_ticket(row, seat, airplane, error_to_raise):
+    def validate_ticket(row, seat, airplane, error_to_raise, seats=None):
         for ticket_attr_value, ticket_attr_name, airplane_attr_name in [
             (row, "row", "rows"),
             (seat, "seat", "seats_in_row"),
@@ -120,6 +195,10 @@ class Ticket(models.Model):
                         f"(1, {count_attrs})"
                     }
                 )
+        if seats is not None and seats.is_taken(row, seat):
+            raise error_to_raise(
+                {"seat": f"seat {seat} in row {row} is already taken"}
+            )
 
     def clean(self):
         Ticket.validate_ticket(
@@ -127,6 +206,7 @@ class Ticket(models.Model):
             self.seat,
             self.flight.airplane,
             ValidationError,
+            self.flight.seats if self._state.adding else None,
         )
 
     def save(
@@ -136,10 +216,28 @@ class Ticket(models.Model):
         using=None,
         update_fields=None,
     ):
-        self.full_clean()
-        return super(Ticket, self).save(
-            force_insert, force_update, using, update_fields
-        )
+        if not self._state.adding:
+            self.full_clean()
+            return super(Ticket, self).save(
+                force_insert, force_update, using, update_fields
+            )
+
+        # tickets saved one by one (admin, shell) book their seat
+        # on the locked flight like orders do
+        with transaction.atomic(using=using):
+            self.flight = (
+                Flight.objects.select_for_update(of=("self",))
+                .select_related("airplane")
+                .get(id=self.flight_id)
+            )
+            # the flight seat map replaces the unique check
+            self.full_clean(validate_unique=False)
+            self.flight.seats.take(self.row, self.seat)
+            self.flight.save_seats()
+            super(Ticket, self).save(
+                force_insert, force_update, using, update_fields
+            )
+        flight_response_cache.touch([self.flight_id])
 
     def __str__(self):
         return f"Row:{self.row}, Seat:{self.seat}. {self.flight.route}"
@@ -161,13 +259,96 @@ class Order(models.Model):
         return str(self.created_at)
 
 
+class IdempotencyKey(models.Model):
+    """
+    Stored result of order creation retried with the same key.
+    The key is reserved before the order is created, `status_code`
+    stays empty while the first request is in progress.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.key
+
+    class Meta:
+        unique_together = ("user", "key")
+
+
+class SeatHold(models.Model):
+    """Seats of a flight reserved for a user until `expires_at`"""
+
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    seats = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{len(self.seats)} seat(s) till {self.expires_at}"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    @staticmethod
+    def held_seats(flight_ids, exclude_user=None):
+        """Seat maps of seats held on flights by active holds"""
+        holds = SeatHold.objects.filter(
+            flight_id__in=flight_ids, expires_at__gt=timezone.now()
+        )
+        if exclude_user is not None:
+            holds = holds.exclude(user=exclude_user)
+
+        held = {}
+        for flight_id, seats in holds.values_list("flight_id", "seats"):
+            seat_map = held.setdefault(flight_id, SeatMap())
+            for seat in seats:
+                seat_map.take(seat["row"], seat["seat"])
+        return held
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["flight", "expires_at"],
+                name="seathold_flight_expires_idx",
+            ),
+        ]
+
+
 class Airport(models.Model):
     name = models.CharField(max_length=255)
     closest_big_city = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(
+                Upper("closest_big_city"), name="airport_upper_city_idx"
+            ),
+            models.Index(
+                fields=["updated_at", "id"], name="airport_updated_idx"
+            ),
+        ]
+
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=255)
@@ -186,3 +367,22 @@ class Crew(models.Model):
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
+
+
+class Tombstone(models.Model):
+    """Deleted row of a model with `changes` feed (see `airport.sync`)"""
+
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["model", "deleted_at"],
+                name="tombstone_model_deleted_idx",
+            ),
+        ]
@@ -0,0 +1,128 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
+from rest_framework.utils.urls import replace_query_param
+
+
+class OrderPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class FlightCursorPagination(CursorPagination):
+    """
+    Keyset pagination over `(departure_time, id)`.
+    Unlike DRF `CursorPagination` (position by first field plus offset)
+    every page is a plain index range scan after the cursor row.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("departure_time", "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """
+        Lazy queryset of the requested page plus one row to detect more,
+        so it can be fetched either synchronously or with `async for`
+        """
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+
+        if reverse:
+            queryset = queryset.order_by("-departure_time", "-id")
+        else:
+            queryset = queryset.order_by("departure_time", "id")
+
+        if self.cursor:
+            departure_time, pk = self.cursor.position
+            lookup = "lt" if reverse else "gt"
+            queryset = queryset.filter(
+                Q(**{f"departure_time__{lookup}": departure_time})
+                | Q(departure_time=departure_time, **{f"id__{lookup}": pk})
+            )
+
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        reverse = bool(self.cursor and self.cursor.reverse)
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        last = self.page[-1]
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self._position(last))
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        first = self.page[0]
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self._position(first))
+        )
+
+    @staticmethod
+    def _position(instance):
+        if isinstance(instance, dict):
+            return instance["departure_time"], instance["id"]
+        return instance.departure_time, instance.id
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = urlsafe_b64decode(encoded.encode("ascii")).decode()
+            tokens = parse.parse_qs(querystring)
+            departure_time = parse_datetime(tokens["d"][0])
+            pk = int(tokens["i"][0])
+            reverse = tokens.get("r", ["0"])[0] == "1"
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if departure_time is None:
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=(departure_time, pk))
+
+    def encode_cursor(self, cursor):
+        departure_time, pk = cursor.position
+        tokens = {"d": departure_time.isoformat(), "i": pk}
+        if cursor.reverse:
+            tokens["r"] = "1"
+
+        querystring = parse.urlencode(tokens)
+        encoded = urlsafe_b64encode(querystring.encode()).decode("ascii")
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
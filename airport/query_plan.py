@@ -0,0 +1,200 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def join(path, name):
+    return f"{path}__{name}" if path else name
+
+
+class QueryPlan:
+    """
+    `select_related`, `prefetch_related` and `only()` derived from
+    the fields of a serializer. Every field is followed along its
+    `source` (`airplane.name`) through the model relations:
+    to-one relations are joined, to-many ones get a prefetch with
+    a plan of their own, and only the columns read are loaded.
+    Attributes which aren't model fields (properties, method fields)
+    load all columns of their model, `Meta.field_sources` of
+    a serializer lists the dotted paths such fields read instead.
+    Fields in `Meta.annotations` are annotated on the top-level queryset.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.select = []
+        self.prefetch = {}
+        self.columns = {}
+        self.models = {"": model}
+        self.annotations = {}
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def for_serializer(cls, serializer_class, fields=None, columns=()):
+        """
+        Plan of `fields` of `serializer_class` (all readable ones
+        by default) plus `columns` of the model the view needs itself
+        """
+        plan = cls(serializer_class.Meta.model)
+        plan.add_serializer(serializer_class(), "", fields)
+        for column in columns:
+            plan.load("", column)
+        return plan
+
+    def load(self, path, name=None):
+        """Load column `name` of the model at `path`, all without `name`"""
+        if name is None:
+            self.columns[path] = None
+        elif self.columns.get(path, ()) is not None:
+            self.columns.setdefault(path, set()).add(name)
+
+    def add_serializer(self, serializer, path, fields=None):
+        meta = getattr(serializer, "Meta", None)
+        sources = getattr(meta, "field_sources", {})
+        annotations = getattr(meta, "annotations", {})
+        model = self.models[path]
+
+        for name, field in serializer.fields.items():
+            if field.write_only or (fields is not None and name not in fields):
+                continue
+            if name in annotations:
+                # nested serializers skip attributes their rows don't have
+                if not path:
+                    self.annotations[name] = annotations[name]
+            elif name in sources:
+                for source in sources[name]:
+                    self.add_source(model, path, source.split("."), None)
+            else:
+                self.add_source(model, path, field.source_attrs, field)
+
+    def add_source(self, model, path, attrs, field):
+        if not attrs:
+            self.add_target(path, field)
+            return
+
+        attr, rest = attrs[0], attrs[1:]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            self.load(path)
+            return
+        if not model_field.is_relation:
+            self.load(path, attr)
+            return
+
+        related = model_field.related_model
+        lookup = join(path, attr)
+        if model_field.many_to_many or model_field.one_to_many:
+            plan = self.prefetch.setdefault(lookup, QueryPlan(related))
+            if model_field.one_to_many:
+                # prefetched rows are matched by their foreign key
+                plan.load("", model_field.field.name)
+            plan.add_source(related, "", rest, field)
+            return
+
+        self.load(path, attr)
+        if not rest and isinstance(field, serializers.PrimaryKeyRelatedField):
+            return
+        if lookup not in self.select:
+            self.select.append(lookup)
+        self.models[lookup] = related
+        self.add_source(related, lookup, rest, field)
+
+    def add_target(self, path, field):
+        """`field` reads the object at `path` as a whole"""
+        model = self.models[path]
+        if isinstance(field, serializers.ManyRelatedField):
+            field = field.child_relation
+        if isinstance(field, serializers.ListSerializer):
+            field = field.child
+
+        if isinstance(field, serializers.BaseSerializer):
+            self.add_serializer(field, path)
+        elif isinstance(field, serializers.SlugRelatedField):
+            self.add_source(model, path, field.slug_field.split("__"), None)
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            self.load(path, model._meta.pk.name)
+        else:
+            self.load(path)
+
+    def only(self):
+        names = []
+        for path, columns in self.columns.items():
+            if columns is None:
+                columns = [
+                    field.name
+                    for field in self.models[path]._meta.concrete_fields
+                ]
+            names += [join(path, name) for name in sorted(columns)]
+        return names
+
+    def queryset(self):
+        """Queryset of prefetched rows, by primary key if not ordered"""
+        queryset = self.model._default_manager.all()
+        if not self.model._meta.ordering:
+            queryset = queryset.order_by("pk")
+        return self.apply(queryset)
+
+    def apply(self, queryset, only=True):
+        if self.select:
+            queryset = queryset.select_related(*self.select)
+        if self.prefetch:
+            queryset = queryset.prefetch_related(
+                *(
+                    Prefetch(lookup, queryset=plan.queryset())
+                    for lookup, plan in self.prefetch.items()
+                )
+            )
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        if only:
+            queryset = queryset.only(*self.only())
+        return queryset
+
+    def describe(self):
+        """Plan as plain data, for tests and debugging"""
+        return {
+            "select_related": self.select,
+            "prefetch_related": {
+                lookup: plan.describe()
+                for lookup, plan in self.prefetch.items()
+            },
+            "only": self.only(),
+            "annotations": sorted(self.annotations),
+        }
+
+
+class QueryPlanMixin:
+    """
+    Queryset planned with `QueryPlan` for the fields requested from
+    the serializer of the action. `plan_columns` are always loaded,
+    columns aren't restricted for writes, which may save the rows.
+    """
+
+    plan_columns = ()
+
+    def get_query_plan(self):
+        params = self.request.query_params
+        if self.request.method not in SAFE_METHODS:
+            params = {}
+        return self.query_plan(
+            self.get_serializer_class(), params, self.plan_columns
+        )
+
+    @staticmethod
+    def query_plan(serializer_class, params, columns=()):
+        """Plan of the fields `params` request from `serializer_class`"""
+        fields = serializer_class.requested_fields(params)
+        return QueryPlan.for_serializer(
+            serializer_class,
+            fields if fields is None else tuple(fields),
+            tuple(columns),
+        )
+
+    def get_queryset(self):
+        return self.get_query_plan().apply(
+            super().get_queryset(), only=self.request.method in SAFE_METHODS
+        )
@@ -0,0 +1,50 @@
+from rest_framework import renderers
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # `JSONRenderer` with stdlib `json` is used instead
+    orjson = None
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    `JSONRenderer` encoding with orjson when it's installed.
+    Output is the same: datetimes and types orjson doesn't serialize
+    natively (Decimal, lazy strings, querysets) go through DRF
+    `JSONEncoder`, so `Z` suffix and milliseconds of datetimes stay.
+    Indented responses (`Accept: application/json; indent=4`), ASCII-only
+    or non-compact settings (`UNICODE_JSON`, `COMPACT_JSON`) use stdlib
+    `json`.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # escaped like `JSONRenderer` does for embedding in <script>
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+def json_renderer():
+    """Default JSON renderer of `REST_FRAMEWORK` settings"""
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        if renderer_class.format == "json":
+            return renderer_class()
+    return renderers.JSONRenderer()
@@ -0,0 +1,105 @@
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class FlightResponseCache:
+    """
+    Cache of flight list/detail response data keyed by normalized params.
+    Every entry remembers the schedule version and versions of the flights
+    it shows: any timetable change bumps the schedule version, orders bump
+    only the versions of their flights. Versions are random tokens,
+    so an evicted version never matches the entries cached before.
+    Versions live twice as long as entries, which are dropped first.
+    """
+
+    prefix = "flight_response"
+
+    @property
+    def timeout(self):
+        return settings.FLIGHT_RESPONSE_CACHE_TTL.total_seconds()
+
+    def key(self, action, request):
+        params = sorted(
+            (name, sorted(values))
+            for name, values in request.query_params.lists()
+        )
+        normalized = (
+            f"{request.get_host()}{request.path}"
+            f"?{urlencode(params, doseq=True)}"
+        )
+        digest = hashlib.md5(normalized.encode()).hexdigest()
+        return f"{self.prefix}:{action}:{digest}"
+
+    def version_key(self, flight_id=None):
+        if flight_id is None:
+            return f"{self.prefix}:schedule"
+        return f"{self.prefix}:flight:{flight_id}"
+
+    def versions(self, flight_ids):
+        """Current versions of the schedule (`None` key) and of flights"""
+        keys = {
+            self.version_key(flight_id): flight_id
+            for flight_id in [None, *flight_ids]
+        }
+        found = cache.get_many(keys)
+        missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+        if missing:
+            cache.set_many(missing, timeout=self.timeout * 2)
+        return {
+            flight_id: found.get(key) or missing[key]
+            for key, flight_id in keys.items()
+        }
+
+    def get(self, key):
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        versions = entry["versions"]
+        flight_ids = [flight_id for flight_id in versions if flight_id]
+        if self.versions(flight_ids) != versions:
+            return None
+        return entry["data"]
+
+    def set(self, key, data, flight_ids, schedule_version):
+        """
+        Store `data` built after `schedule_version` was read.
+        Flight versions are read now, an order committed between the query
+        and this call leaves the entry stale at most for the timeout.
+        """
+        versions = self.versions(flight_ids)
+        versions[None] = schedule_version
+        cache.set(
+            key,
+            {"versions": versions, "data": data},
+            timeout=self.timeout,
+        )
+
+    def schedule_version(self):
+        return self.versions(())[None]
+
+    def touch(self, flight_ids=None):
+        """
+        Invalidate responses with these flights or, without ids,
+        all of them. Done now and once more on commit, so requests
+        reading the old rows meanwhile don't stay cached.
+        """
+        keys = [self.version_key()]
+        if flight_ids is not None:
+            keys = [self.version_key(flight_id) for flight_id in flight_ids]
+
+        def bump():
+            cache.set_many(
+                {key: uuid.uuid4().hex for key in keys},
+                timeout=self.timeout * 2,
+            )
+
+        bump()
+        transaction.on_commit(bump)
+
+
+flight_response_cache = FlightResponseCache()
@@ -0,0 +1,125 @@
+import base64
+
+MAX_ROWS = 40
+MAX_SEATS_IN_ROW = 15
+SEAT_MAP_SIZE = (MAX_ROWS * MAX_SEATS_IN_ROW + 7) // 8
+
+
+class SeatMap:
+    """
+    Occupied seats of a flight packed into a bitmap.
+    Bit layout doesn't depend on the airplane: every row takes
+    `MAX_SEATS_IN_ROW` bits, so the whole map is at most 75 bytes.
+    """
+
+    def __init__(self, data=b""):
+        self._bits = bytearray(SEAT_MAP_SIZE)
+        self._bits[: len(data)] = data
+
+    @staticmethod
+    def _position(row, seat):
+        return divmod((row - 1) * MAX_SEATS_IN_ROW + seat - 1, 8)
+
+    def is_taken(self, row, seat):
+        byte, bit = SeatMap._position(row, seat)
+        return bool(self._bits[byte] & (1 << bit))
+
+    def take(self, row, seat):
+        byte, bit = SeatMap._position(row, seat)
+        self._bits[byte] |= 1 << bit
+
+    def release(self, row, seat):
+        byte, bit = SeatMap._position(row, seat)
+        self._bits[byte] &= ~(1 << bit)
+
+    def __iter__(self):
+        """Yield taken (row, seat) pairs ordered by row, seat"""
+        for byte, value in enumerate(self._bits):
+            while value:
+                bit = (value & -value).bit_length() - 1
+                row, seat = divmod(byte * 8 + bit, MAX_SEATS_IN_ROW)
+                yield row + 1, seat + 1
+                value &= value - 1
+
+    def __len__(self):
+        return sum(value.bit_count() for value in self._bits)
+
+    def __bytes__(self):
+        return bytes(self._bits)
+
+    def encode(self, rows, seats_in_row):
+        """
+        Base64 of the `rows` x `seats_in_row` grid packed row by row,
+        first seat in the most significant bit of the first byte.
+        """
+        grid = 0
+        for row in range(1, rows + 1):
+            for seat in range(1, seats_in_row + 1):
+                grid = (grid << 1) | self.is_taken(row, seat)
+        size = rows * seats_in_row
+        grid <<= -size % 8
+        packed = grid.to_bytes((size + 7) // 8, "big")
+        return base64.b64encode(packed).decode()
+
+    def union(self, other):
+        """New map with places taken in either of the maps"""
+        if other is None:
+            return SeatMap(bytes(self))
+        return SeatMap(bytes(a | b for a, b in zip(self._bits, bytes(other))))
+
+    def find_free(self, rows, seats_in_row, count, together=True):
+        """
+        Pick `count` free places of a `rows` x `seats_in_row` airplane.
+        Prefers the smallest run of adjacent free seats of one row that
+        fits the group, then the smallest block of consecutive rows.
+        With `together` a group that fits in a row must get a run and
+        a bigger group only the minimal number of rows.
+        Returns None if there aren't such free places.
+        """
+        free = [
+            [
+                seat
+                for seat in range(1, seats_in_row + 1)
+                if not self.is_taken(row, seat)
+            ]
+            for row in range(1, rows + 1)
+        ]
+
+        best = None
+        for row, seats in enumerate(free, start=1):
+            for run in _runs(seats):
+                if len(run) >= count and (
+                    best is None or len(run) < len(best[1])
+                ):
+                    best = (row, run)
+        if best:
+            row, run = best
+            return [(row, seat) for seat in run[:count]]
+        if together and count <= seats_in_row:
+            return None
+
+        min_rows = -(-count // seats_in_row)
+        max_rows = min_rows if together else rows
+        for size in range(min_rows, max_rows + 1):
+            for start in range(rows - size + 1):
+                window = free[start : start + size]
+                if sum(len(seats) for seats in window) >= count:
+                    places = [
+                        (start + offset + 1, seat)
+                        for offset, seats in enumerate(window)
+                        for seat in seats
+                    ]
+                    return places[:count]
+        return None
+
+
+def _runs(seats):
+    """Split sorted seat numbers into runs of adjacent ones"""
+    run = []
+    for seat in seats:
+        if run and seat != run[-1] + 1:
+            yield run
+            run = []
+        run.append(seat)
+    if run:
+        yield run
@@ -1,5 +1,11 @@
-from django.db import transaction
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 from rest_framework.serializers import ValidationError
 
 from airport.models import (
@@ -11,10 +17,20 @@ from airport.models import (
     Route,
     Flight,
     Ticket,
+    SeatHold,
 )
+from airport.metrics import TimedSerializerMixin
+from airport.response_cache import flight_response_cache
+from airport.sparse_fields import SparseFieldsMixin
+from airport.values import ValuesSerializerMixin
+
+# same output as model serializers' datetime fields, for `values()` rows
+represent_datetime = serializers.DateTimeField().to_representation
 
 
-class AirplaneTypeSerializer(serializers.ModelSerializer):
+class AirplaneTypeSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = AirplaneType
         fields = (
@@ -23,7 +39,9 @@ class AirplaneTypeSerializer(serializers.ModelSerializer):
         )
 
 
-class AirportSerializer(serializers.ModelSerializer):
+class AirportSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Airport
         fields = (
@@ -33,7 +51,9 @@ class AirportSerializer(serializers.ModelSerializer):
         )
 
 
-class CrewSerializer(serializers.ModelSerializer):
+class CrewSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Crew
         fields = (
@@ -43,7 +63,9 @@ class CrewSerializer(serializers.ModelSerializer):
         )
 
 
-class AirplaneSerializer(serializers.ModelSerializer):
+class AirplaneSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Airplane
         fields = (
@@ -55,7 +77,12 @@ class AirplaneSerializer(serializers.ModelSerializer):
         )
 
 
-class AirplaneListSerializer(serializers.ModelSerializer):
+class AirplaneListSerializer(
+    ValuesSerializerMixin,
+    TimedSerializerMixin,
+    SparseFieldsMixin,
+    serializers.ModelSerializer,
+):
     airplane_type = serializers.SlugRelatedField(
         many=False, read_only=True, slug_field="name"
     )
@@ -70,9 +97,34 @@ class AirplaneListSerializer(serializers.ModelSerializer):
             "airplane_type",
             "image",
         )
-
-
-class AirplaneDetailSerializer(serializers.ModelSerializer):
+        values_columns = {
+            "id": ("id",),
+            "name": ("name",),
+            "rows": ("rows",),
+            "seats_in_row": ("seats_in_row",),
+            "airplane_type": ("airplane_type__name",),
+            "image": ("image",),
+        }
+
+    @classmethod
+    def values_getters(cls, rows, context, fields):
+        storage = Airplane._meta.get_field("image").storage
+        request = context.get("request")
+
+        def image(row):
+            if not row["image"]:
+                return None
+            url = storage.url(row["image"])
+            if request is not None:
+                return request.build_absolute_uri(url)
+            return url
+
+        return {"image": image}
+
+
+class AirplaneDetailSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     airplane_type = AirplaneTypeSerializer(many=False, read_only=True)
 
     class Meta:
@@ -87,7 +139,9 @@ class AirplaneDetailSerializer(serializers.ModelSerializer):
         )
 
 
-class AirplaneImageSerializer(serializers.ModelSerializer):
+class AirplaneImageSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Airplane
         fields = (
@@ -96,7 +150,9 @@ class AirplaneImageSerializer(serializers.ModelSerializer):
         )
 
 
-class RouteSerializer(serializers.ModelSerializer):
+class RouteSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Route
         fields = (
@@ -107,7 +163,7 @@ class RouteSerializer(serializers.ModelSerializer):
         )
 
 
-class RouteListSerializer(RouteSerializer):
+class RouteListSerializer(ValuesSerializerMixin, RouteSerializer):
     source = serializers.SlugRelatedField(
         many=False, read_only=True, slug_field="name"
     )
@@ -115,6 +171,21 @@ class RouteListSerializer(RouteSerializer):
         many=False, read_only=True, slug_field="name"
     )
 
+    class Meta:
+        model = Route
+        fields = (
+            "id",
+            "source",
+            "destination",
+            "distance",
+        )
+        values_columns = {
+            "id": ("id",),
+            "source": ("source__name",),
+            "destination": ("destination__name",),
+            "distance": ("distance",),
+        }
+
 
 class RouteDetailSerializer(RouteSerializer):
     source = AirportSerializer(
@@ -136,7 +207,35 @@ class RouteDetailSerializer(RouteSerializer):
         )
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class InBulkManyRelatedField(serializers.ManyRelatedField):
+    """Resolve a list of primary keys with one query instead of one each"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and all(
+            isinstance(pk, (int, str)) and str(pk).isdigit() for pk in data
+        ):
+            objects = self.child_relation.get_queryset().in_bulk(data)
+            if all(int(pk) in objects for pk in data):
+                return [objects[int(pk)] for pk in data]
+        # errors are reported by the field of every item
+        return super().to_internal_value(data)
+
+
+class InBulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return InBulkManyRelatedField(**list_kwargs)
+
+
+class FlightSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    serializer_related_field = InBulkPrimaryKeyRelatedField
+
     class Meta:
         model = Flight
         fields = (
@@ -156,7 +255,7 @@ class FlightSerializer(serializers.ModelSerializer):
         return data
 
 
-class FlightListSerializer(FlightSerializer):
+class FlightListSerializer(ValuesSerializerMixin, FlightSerializer):
     route_info = serializers.CharField(source="route", read_only=True)
     airplane_name = serializers.CharField(
         source="airplane.name", read_only=True
@@ -181,9 +280,85 @@ class FlightListSerializer(FlightSerializer):
             "all_tickets",
             "tickets_available",
         )
+        # read by `str(route)` and `Airplane.all_places`
+        field_sources = {
+            "route_info": ("route.source.name", "route.destination.name"),
+            "all_tickets": ("airplane.rows", "airplane.seats_in_row"),
+        }
+        annotations = {
+            "tickets_available": (
+                F("airplane__rows") * F("airplane__seats_in_row")
+                - F("tickets_sold")
+            )
+        }
+        # `tickets_available` has to be annotated for `values()` too
+        values_columns = {
+            "id": ("id",),
+            "route_info": (
+                "route__source__name",
+                "route__destination__name",
+            ),
+            "airplane_name": ("airplane__name",),
+            "crews": ("id",),
+            "departure_time": ("departure_time",),
+            "arrival_time": ("arrival_time",),
+            "all_tickets": ("airplane__rows", "airplane__seats_in_row"),
+            "tickets_available": ("tickets_available",),
+        }
+
+    @classmethod
+    def values_getters(cls, rows, context, fields):
+        """Crews of all rows are read with one query"""
+        getters = {
+            "route_info": lambda row: (
+                f"{row['route__source__name']}"
+                f"-{row['route__destination__name']}"
+            ),
+            "departure_time": lambda row: represent_datetime(
+                row["departure_time"]
+            ),
+            "arrival_time": lambda row: represent_datetime(
+                row["arrival_time"]
+            ),
+            "all_tickets": lambda row: (
+                row["airplane__rows"] * row["airplane__seats_in_row"]
+            ),
+        }
+        if "crews" not in fields:
+            return getters
+
+        crews = {}
+        assignments = (
+            Flight.crews.through.objects.filter(
+                flight_id__in=[row["id"] for row in rows]
+            )
+            .order_by("flight_id", "crew_id")
+            .values_list("flight_id", "crew__first_name", "crew__last_name")
+        )
+        for flight_id, first_name, last_name in assignments:
+            crews.setdefault(flight_id, []).append(f"{first_name} {last_name}")
+        getters["crews"] = lambda row: crews.get(row["id"], [])
+        return getters
+
+
+class OrderFlightField(serializers.PrimaryKeyRelatedField):
+    """Resolve flight from the ones preloaded by `OrderSerializer`"""
+
+    def to_internal_value(self, data):
+        flights = self.context.get("flights", {})
+        try:
+            return flights[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    flight = OrderFlightField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -191,12 +366,15 @@ class TicketSerializer(serializers.ModelSerializer):
             attrs["seat"],
             attrs["flight"].airplane,
             ValidationError,
+            attrs["flight"].seats,
         )
         return data
 
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
+        # taken seats are rejected by the flight seat map in `validate`
+        validators = []
 
 
 class TicketSeatsSerializer(TicketSerializer):
@@ -209,9 +387,7 @@ class FlightDetailSerializer(FlightSerializer):
     route = RouteListSerializer(many=False, read_only=True)
     airplane = AirplaneSerializer(many=False, read_only=True)
     crews = CrewSerializer(many=True, read_only=True)
-    taken_places = TicketSeatsSerializer(
-        source="tickets", many=True, read_only=True
-    )
+    taken_places = serializers.SerializerMethodField()
 
     class Meta:
         model = Flight
@@ -224,6 +400,38 @@ class FlightDetailSerializer(FlightSerializer):
             "arrival_time",
             "taken_places",
         )
+        field_sources = {"taken_places": ("seat_map",)}
+
+    def get_taken_places(self, obj) -> list[dict]:
+        """Read taken places from the seat map instead of Ticket rows"""
+        return [{"row": row, "seat": seat} for row, seat in obj.seats]
+
+
+class FlightSeatMapSerializer(FlightDetailSerializer):
+    """
+    Flight detail with compact seat map: base64 of `rows` x `seats_in_row`
+    bits packed row by row, a set bit means the place is taken.
+    """
+
+    seat_map = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Flight
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "crews",
+            "departure_time",
+            "arrival_time",
+            "seat_map",
+        )
+        field_sources = {
+            "seat_map": ("seat_map", "airplane.rows", "airplane.seats_in_row")
+        }
+
+    def get_seat_map(self, obj) -> str:
+        return obj.seats.encode(obj.airplane.rows, obj.airplane.seats_in_row)
 
 
 class OrderFlightSerializer(FlightSerializer):
@@ -257,8 +465,38 @@ class TicketDetailSerializer(TicketSerializer):
         fields = ("id", "row", "seat", "flight", "order")
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+class SeatAllocationSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.Serializer
+):
+    flight = OrderFlightField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+    count = serializers.IntegerField(min_value=1)
+    together = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        data = super(SeatAllocationSerializer, self).validate(attrs=attrs)
+        if attrs["count"] > attrs["flight"].airplane.all_places:
+            raise ValidationError(
+                {"count": "More seats than the airplane has"}
+            )
+        return data
+
+
+class OrderSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    tickets = TicketSerializer(
+        many=True, read_only=False, allow_empty=False, required=False
+    )
+    allocations = SeatAllocationSerializer(
+        many=True,
+        write_only=True,
+        allow_empty=False,
+        required=False,
+        help_text="Seats for the server to pick on flights, "
+        "adjacent ones when `together`",
+    )
 
     class Meta:
         model = Order
@@ -266,14 +504,160 @@ class OrderSerializer(serializers.ModelSerializer):
             "id",
             "created_at",
             "tickets",
+            "allocations",
         )
 
+    def to_internal_value(self, data):
+        """Load flights of all tickets with one query before validation"""
+        items = []
+        if hasattr(data, "get"):
+            for field in ("tickets", "allocations"):
+                if isinstance(data.get(field), list):
+                    items += data[field]
+        if items:
+            flight_ids = {
+                str(item.get("flight"))
+                for item in items
+                if isinstance(item, dict)
+            }
+            self.context["flights"] = Flight.objects.select_related(
+                "airplane"
+            ).in_bulk(
+                [
+                    int(flight_id)
+                    for flight_id in flight_ids
+                    if flight_id.isdigit()
+                ]
+            )
+        return super(OrderSerializer, self).to_internal_value(data)
+
+    def validate_tickets(self, tickets_data):
+        seats = set()
+        errors = []
+        for ticket_data in tickets_data:
+            seat = (
+                ticket_data["flight"].id,
+                ticket_data["row"],
+                ticket_data["seat"],
+            )
+            errors.append(
+                {"seat": ["seat is repeated in the order"]}
+                if seat in seats
+                else {}
+            )
+            seats.add(seat)
+        if any(errors):
+            raise ValidationError(errors)
+        return tickets_data
+
+    def validate(self, attrs):
+        data = super(OrderSerializer, self).validate(attrs=attrs)
+        if not attrs.get("tickets") and not attrs.get("allocations"):
+            raise ValidationError("Provide `tickets` or `allocations`")
+        return data
+
+    @staticmethod
+    def book_seats(tickets_data, flights, held):
+        """
+        Check seats against the locked flight seat maps and seats held
+        by other users, then take them.
+        Messages are the same as of `TicketSerializer` validation.
+        """
+        errors = []
+        for ticket_data in tickets_data:
+            flight = flights[ticket_data["flight"].id]
+            row, seat = ticket_data["row"], ticket_data["seat"]
+            try:
+                Ticket.validate_ticket(
+                    row, seat, flight.airplane, ValidationError, flight.seats
+                )
+                if flight.id in held and held[flight.id].is_taken(row, seat):
+                    raise ValidationError(
+                        {"seat": f"seat {seat} in row {row} is on hold"}
+                    )
+            except ValidationError as error:
+                # the same shape as errors of `TicketSerializer`
+                errors.append(serializers.as_serializer_error(error))
+                continue
+            errors.append({})
+            flight.seats.take(row, seat)
+        if any(errors):
+            raise ValidationError({"tickets": errors})
+
+    @staticmethod
+    def allocate_seats(allocations, flights, held):
+        """Pick free seats on the locked flights and take them"""
+        tickets_data = []
+        errors = []
+        for allocation in allocations:
+            flight = flights[allocation["flight"].id]
+            places = flight.seats.union(held.get(flight.id)).find_free(
+                flight.airplane.rows,
+                flight.airplane.seats_in_row,
+                allocation["count"],
+                allocation["together"],
+            )
+            if places is None:
+                errors.append(
+                    {
+                        "count": [
+                            f"{allocation['count']} "
+                            f"{'adjacent ' if allocation['together'] else ''}"
+                            f"seats aren't available"
+                        ]
+                    }
+                )
+                continue
+            errors.append({})
+            for row, seat in places:
+                flight.seats.take(row, seat)
+                tickets_data.append(
+                    {"flight": flight, "row": row, "seat": seat}
+                )
+        if any(errors):
+            raise ValidationError({"allocations": errors})
+        return tickets_data
+
     def create(self, validated_data):
         with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
+            tickets_data = validated_data.pop("tickets", [])
+            allocations = validated_data.pop("allocations", [])
+            flights = (
+                Flight.objects.select_for_update(of=("self",))
+                .select_related("airplane")
+                .in_bulk(
+                    {item["flight"].id for item in tickets_data + allocations}
+                )
+            )
+            held = SeatHold.held_seats(
+                list(flights), exclude_user=validated_data["user"]
+            )
+            self.book_seats(tickets_data, flights, held)
+            tickets_data += self.allocate_seats(allocations, flights, held)
+
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            tickets = [
+                Ticket(
+                    order=order,
+                    flight=flights[ticket_data["flight"].id],
+                    row=ticket_data["row"],
+                    seat=ticket_data["seat"],
+                )
+                for ticket_data in tickets_data
+            ]
+            try:
+                # unique (row, seat, flight) is the last line of defence
+                # if a seat map drifted from tickets
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(tickets)
+            except IntegrityError:
+                raise ValidationError(
+                    {"tickets": ["Some of the seats are already taken"]}
+                )
+
+            for flight in flights.values():
+                flight.save_seats()
+            flight_response_cache.touch(flights)
             return order
 
 
@@ -287,3 +671,95 @@ class OrderListSerializer(OrderSerializer):
             "created_at",
             "tickets",
         )
+
+
+class ItineraryLegSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.Serializer
+):
+    flight = serializers.IntegerField(source="flight_id")
+    route = serializers.IntegerField(source="route_id")
+    source = serializers.IntegerField(source="source_id")
+    destination = serializers.IntegerField(source="destination_id")
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    tickets_available = serializers.IntegerField(source="seats_left")
+
+
+class ItinerarySerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.Serializer
+):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    duration = serializers.IntegerField(help_text="Total time in minutes")
+    legs = ItineraryLegSerializer(many=True)
+
+
+class HoldSeatSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.Serializer
+):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(
+    TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    seats = HoldSeatSerializer(many=True, allow_empty=False)
+    ttl = serializers.IntegerField(
+        write_only=True,
+        required=False,
+        min_value=1,
+        help_text="Hold time in seconds, limited by SEAT_HOLD_MAX_TTL",
+    )
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "flight", "seats", "ttl", "created_at", "expires_at")
+        read_only_fields = ("expires_at",)
+
+    def validate(self, attrs):
+        data = super(SeatHoldSerializer, self).validate(attrs=attrs)
+        flight = attrs["flight"]
+        seats = set()
+        for seat in attrs["seats"]:
+            Ticket.validate_ticket(
+                seat["row"],
+                seat["seat"],
+                flight.airplane,
+                ValidationError,
+                flight.seats,
+            )
+            if (seat["row"], seat["seat"]) in seats:
+                raise ValidationError({"seats": "Seats must be unique"})
+            seats.add((seat["row"], seat["seat"]))
+        return data
+
+    def create(self, validated_data):
+        ttl = timedelta(
+            seconds=validated_data.pop(
+                "ttl", settings.SEAT_HOLD_TTL.total_seconds()
+            )
+        )
+        validated_data["expires_at"] = timezone.now() + min(
+            ttl, settings.SEAT_HOLD_MAX_TTL
+        )
+        with transaction.atomic():
+            flight = (
+                Flight.objects.select_for_update()
+                .filter(id=validated_data["flight"].id)
+                .first()
+            )
+            # expired holds of the flight are swept while it is locked
+            SeatHold.objects.filter(
+                flight=flight, expires_at__lte=timezone.now()
+            ).delete()
+            held = SeatHold.held_seats([flight.id]).get(flight.id)
+            for seat in validated_data["seats"]:
+                row, seat = seat["row"], seat["seat"]
+                if flight.seats.is_taken(row, seat) or (
+                    held and held.is_taken(row, seat)
+                ):
+                    raise ValidationError(
+                        {"seats": f"seat {seat} in row {row} isn't free"}
+                    )
+            return SeatHold.objects.create(**validated_data)
@@ -0,0 +1,125 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from airport.conditional import table_versions
+from airport.itineraries import flight_index
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Route,
+    Ticket,
+    Tombstone,
+)
+from airport.response_cache import flight_response_cache
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket(sender, instance, **kwargs):
+    """Keep flight seat map and `tickets_sold` exact on ticket removal"""
+    flight = (
+        Flight.objects.select_for_update()
+        .only("seat_map")
+        .filter(id=instance.flight_id)
+        .first()
+    )
+    if flight:
+        flight.seats.release(instance.row, instance.seat)
+        flight.save_seats()
+        flight_response_cache.touch([flight.id])
+
+
+@receiver(post_save, sender=Flight)
+def index_flight(sender, instance, **kwargs):
+    """Keep itinerary search index in step with the schedule"""
+    transaction.on_commit(lambda: flight_index.update_flight(instance))
+
+
+@receiver(post_delete, sender=Flight)
+def unindex_flight(sender, instance, **kwargs):
+    flight_id = instance.id
+    transaction.on_commit(lambda: flight_index.remove_flight(flight_id))
+
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+@receiver(m2m_changed, sender=Flight.crews.through)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=Airport)
+@receiver(post_save, sender=Airplane)
+@receiver(post_save, sender=Crew)
+def expire_flight_responses(sender, **kwargs):
+    """Cached flight responses show the timetable and its references"""
+    flight_response_cache.touch()
+
+
+@receiver(post_save, sender=AirplaneType)
+@receiver(post_delete, sender=AirplaneType)
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+@receiver(post_save, sender=Crew)
+@receiver(post_delete, sender=Crew)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=Airplane)
+@receiver(post_delete, sender=Airplane)
+def touch_table_version(sender, **kwargs):
+    """Version markers of reference data for ETag/Last-Modified"""
+    table_versions.touch(sender)
+
+
+@receiver(post_delete, sender=Flight)
+@receiver(post_delete, sender=Route)
+@receiver(post_delete, sender=Airport)
+def add_tombstone(sender, instance, **kwargs):
+    """Deletions of rows with `changes` feed, see `airport.sync`"""
+    Tombstone.objects.create(
+        model=sender._meta.label_lower, object_id=instance.pk
+    )
+
+
+@receiver(m2m_changed, sender=Flight.crews.through)
+def touch_flight_crews(sender, instance, action, reverse, pk_set, **kwargs):
+    """Crews are a part of flight rows in `changes` feed"""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        flights = Flight.objects.filter(pk=instance.pk)
+    elif pk_set:
+        flights = Flight.objects.filter(pk__in=pk_set)
+    else:
+        flights = Flight.objects.filter(crews=instance)
+    flights.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Airport)
+@receiver(post_save, sender=Route)
+@receiver(post_save, sender=Airplane)
+@receiver(post_save, sender=Crew)
+def touch_dependent_rows(sender, instance, created, **kwargs):
+    """
+    Route and flight rows in `changes` feed show names of their
+    airports, airplane and crews, renames are changes of those rows
+    """
+    if created:
+        return
+    now = timezone.now()
+    if sender is Airport:
+        airport = Q(source=instance) | Q(destination=instance)
+        Route.objects.filter(airport).update(updated_at=now)
+        flights = Flight.objects.filter(
+            route__in=Route.objects.filter(airport)
+        )
+    elif sender is Route:
+        flights = Flight.objects.filter(route=instance)
+    elif sender is Airplane:
+        flights = Flight.objects.filter(airplane=instance)
+    else:
+        flights = Flight.objects.filter(crews=instance)
+    flights.update(updated_at=now)
@@ -0,0 +1,70 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer, ValidationError
+
+
+def split_names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    `?fields=id,departure_time` or `?omit=crews` of GET requests select
+    the fields of the top-level serializer, nested ones stay whole.
+    `QueryPlanMixin` views query only what the selected fields read.
+    """
+
+    @classmethod
+    def readable_fields(cls):
+        return [
+            name
+            for name, field in cls().fields.items()
+            if not field.write_only
+        ]
+
+    @classmethod
+    def requested_fields(cls, params):
+        """Names selected by `fields`/`omit` params, `None` for all"""
+        return cls.select_fields(cls.readable_fields(), params)
+
+    @staticmethod
+    def select_fields(names, params):
+        wanted = split_names(params.get("fields", ""))
+        omitted = split_names(params.get("omit", ""))
+        if not wanted and not omitted:
+            return None
+
+        for param, values in (("fields", wanted), ("omit", omitted)):
+            unknown = [name for name in values if name not in names]
+            if unknown:
+                raise ValidationError(
+                    {param: f"Unknown fields: {', '.join(unknown)}"}
+                )
+        return [
+            name
+            for name in names
+            if (not wanted or name in wanted) and name not in omitted
+        ]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if (
+            request is None
+            or request.method not in SAFE_METHODS
+            or not self.is_top_level()
+        ):
+            return fields
+
+        selected = self.select_fields(
+            [name for name, field in fields.items() if not field.write_only],
+            request.query_params,
+        )
+        if selected is None:
+            return fields
+        return {name: fields[name] for name in selected}
+
+    def is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from airport.models import Tombstone
+
+CURSOR_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+class SyncExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Deletions since this cursor are forgotten, sync again."
+    default_code = "sync_expired"
+
+
+def encode_cursor(moment, pk=None, started=None):
+    cursor = moment.astimezone(timezone.utc).strftime(CURSOR_FORMAT)
+    if pk is None:
+        return cursor
+    started = started.astimezone(timezone.utc).strftime(CURSOR_FORMAT)
+    return f"{cursor},{pk},{started}"
+
+
+def decode_cursor(value):
+    """
+    Cursor is `<utc datetime>[,<id of the last row>,<utc datetime>]`,
+    the last one is when the paged sync began (the cursor by default)
+    """
+    moment, _, rest = value.partition(",")
+    pk, _, started = rest.partition(",")
+    try:
+        moment = parse_datetime(moment)
+        started = parse_datetime(started) if started else moment
+        pk = int(pk) if pk else None
+    except ValueError:
+        moment = None
+    if (
+        moment is None
+        or started is None
+        or timezone.is_naive(moment)
+        or timezone.is_naive(started)
+    ):
+        raise ValidationError(
+            {"changed_since": "Expected cursor or aware datetime"}
+        )
+    return moment, pk, started
+
+
+class DeltaSyncMixin:
+    """
+    `changes/?changed_since=<cursor>` feed of rows changed
+    and ids of rows deleted after the cursor, along with the next cursor.
+    Without `changed_since` it pages through all rows for the first sync.
+    Rows of the last `SYNC_CURSOR_LAG` aren't returned yet,
+    so transactions committed late with earlier `updated_at` aren't missed.
+    """
+
+    sync_page_size = 1000
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "changed_since",
+                type=OpenApiTypes.STR,
+                description="`cursor` of the previous response or aware "
+                "datetime, all rows if omitted "
+                "(ex. ?changed_since=2024-06-09T12:00:00Z)",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False)
+    def changes(self, request, *args, **kwargs):
+        """Rows changed and ids deleted since `changed_since`"""
+        now = timezone.now()
+        horizon = now - settings.SYNC_CURSOR_LAG
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.filter(updated_at__lte=horizon)
+        deleted = Tombstone.objects.none()
+        started = now
+
+        value = request.query_params.get("changed_since")
+        if value:
+            since, since_pk, started = decode_cursor(value)
+            # paging cursors of the first sync may point to old rows,
+            # tombstones are needed since the sync began
+            if started < now - settings.TOMBSTONE_TTL:
+                raise SyncExpired()
+            if since_pk is None:
+                queryset = queryset.filter(updated_at__gt=since)
+            else:
+                queryset = queryset.filter(updated_at__gte=since).exclude(
+                    updated_at=since, id__lte=since_pk
+                )
+            deleted = Tombstone.objects.filter(
+                model=queryset.model._meta.label_lower,
+                deleted_at__gt=since,
+                deleted_at__lte=horizon,
+            )
+
+        rows = list(
+            queryset.order_by("updated_at", "id")[: self.sync_page_size + 1]
+        )
+        has_more = len(rows) > self.sync_page_size
+        rows = rows[: self.sync_page_size]
+
+        if has_more:
+            cursor = encode_cursor(rows[-1].updated_at, rows[-1].id, started)
+        else:
+            cursor = encode_cursor(horizon)
+        return Response(
+            {
+                "changed": self.get_serializer(rows, many=True).data,
+                "deleted": list(
+                    deleted.values_list("object_id", flat=True).distinct()
+                ),
+                "cursor": cursor,
+                "has_more": has_more,
+            }
+        )
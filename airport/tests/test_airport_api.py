@@ -1,3 +1,4 @@
+import json
 import os
 import tempfile
 from datetime import datetime
@@ -22,6 +23,7 @@ def sample_airport(**params):
         "name": "Freedom",
         "closest_big_city": "Lviv"
     }
+    defaults.update(params)
     return Airport.objects.create(**defaults)
 
 
@@ -128,11 +130,11 @@ class AuthenticatedFlightApiTests(TestCase):
                 F("airplane__rows") * F("airplane__seats_in_row")
                 - Count("tickets")
             )
-        ).order_by("id")
+        ).order_by("departure_time", "id")
         serializer = FlightListSerializer(flights, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_filter_flight_with_crew_by_departure_time(self):
         crew1 = sample_crew()
@@ -155,7 +157,7 @@ class AuthenticatedFlightApiTests(TestCase):
                     - Count("tickets")
                 )
             )
-            .order_by("id")
+            .order_by("departure_time", "id")
             .filter(departure_time=flight1.departure_time)
         )
 
@@ -168,7 +170,7 @@ class AuthenticatedFlightApiTests(TestCase):
 
         serializer1 = FlightListSerializer(flights, many=True)
 
-        self.assertEqual(serializer1.data, res.data)
+        self.assertEqual(serializer1.data, res.data["results"])
 
     def test_filter_flight_by_arrival_time(self):
         airplane = sample_airplane()
@@ -186,7 +188,7 @@ class AuthenticatedFlightApiTests(TestCase):
                     - Count("tickets")
                 )
             )
-            .order_by("id")
+            .order_by("departure_time", "id")
             .filter(arrival_time__date="2024-06-13")
         )
 
@@ -194,7 +196,83 @@ class AuthenticatedFlightApiTests(TestCase):
 
         serializer1 = FlightListSerializer(flights, many=True)
 
-        self.assertEqual(serializer1.data, res.data)
+        self.assertEqual(serializer1.data, res.data["results"])
+
+    def test_filter_flights_by_departure_range(self):
+        airplane = sample_airplane()
+        early = sample_flight(airplane=airplane,
+                              departure_time="2024-06-12 23:30:00Z",
+                              arrival_time="2024-06-13 01:30:00Z")
+        middle = sample_flight(airplane=airplane,
+                               departure_time="2024-06-13 10:00:00Z",
+                               arrival_time="2024-06-13 12:00:00Z")
+        sample_flight(airplane=airplane,
+                      departure_time="2024-06-14 00:00:00Z",
+                      arrival_time="2024-06-14 02:00:00Z")
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {
+                "departure_after": "2024-06-12T23:30",
+                "departure_before": "2024-06-14",
+            },
+        )
+
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]],
+            [early.id, middle.id],
+        )
+
+    def test_filter_flights_by_day_in_time_zone(self):
+        airplane = sample_airplane()
+        kyiv_morning = sample_flight(airplane=airplane,
+                                     departure_time="2024-06-12 22:30:00Z",
+                                     arrival_time="2024-06-13 01:30:00Z")
+        sample_flight(airplane=airplane,
+                      departure_time="2024-06-13 21:30:00Z",
+                      arrival_time="2024-06-13 23:30:00Z")
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {"departure_time": "2024-06-13", "tz": "Europe/Kyiv"},
+        )
+
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]],
+            [kyiv_morning.id],
+        )
+
+    def test_filter_flights_by_source_and_destination(self):
+        lviv = sample_airport()
+        kyiv = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        lviv_kyiv = sample_flight(
+            route=sample_route(source=lviv, destination=kyiv)
+        )
+        kyiv_lviv = sample_flight(
+            route=sample_route(source=kyiv, destination=lviv)
+        )
+
+        by_id = self.client.get(FLIGHT_URL, {"from": lviv.id, "to": kyiv.id})
+        by_city = self.client.get(FLIGHT_URL, {"from": "kyiv"})
+
+        self.assertEqual(
+            [flight["id"] for flight in by_id.data["results"]],
+            [lviv_kyiv.id],
+        )
+        self.assertEqual(
+            [flight["id"] for flight in by_city.data["results"]],
+            [kyiv_lviv.id],
+        )
+
+    def test_filter_flights_with_invalid_values(self):
+        for params in (
+            {"departure_time": "13-06-2024"},
+            {"departure_after": "yesterday"},
+            {"tz": "Mars/Olympus"},
+        ):
+            res = self.client.get(FLIGHT_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_filter_flights_by_airplane_name(self):
         airplane = sample_airplane(name="Boeing")
@@ -212,7 +290,7 @@ class AuthenticatedFlightApiTests(TestCase):
                     - Count("tickets")
                 )
             )
-            .order_by("id")
+            .order_by("departure_time", "id")
             .filter(airplane__name__icontains="Boeing")
         )
 
@@ -220,7 +298,59 @@ class AuthenticatedFlightApiTests(TestCase):
 
         serializer1 = FlightListSerializer(flights, many=True)
 
-        self.assertEqual(serializer1.data, res.data)
+        self.assertEqual(serializer1.data, res.data["results"])
+
+    def test_flights_are_paginated_by_cursor(self):
+        airplane = sample_airplane()
+        for day in (15, 13, 14, 13):
+            sample_flight(
+                airplane=airplane,
+                departure_time=f"2024-06-{day} 10:00:00Z",
+                arrival_time=f"2024-06-{day} 12:00:00Z",
+            )
+        expected = list(
+            Flight.objects.order_by("departure_time", "id").values_list(
+                "id", flat=True
+            )
+        )
+
+        res = self.client.get(FLIGHT_URL, {"page_size": 3})
+        next_page = self.client.get(res.data["next"])
+        previous_page = self.client.get(next_page.data["previous"])
+
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]], expected[:3]
+        )
+        self.assertEqual(
+            [flight["id"] for flight in next_page.data["results"]],
+            expected[3:],
+        )
+        self.assertIsNone(next_page.data["next"])
+        self.assertEqual(previous_page.data["results"], res.data["results"])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(FLIGHT_URL, {"cursor": "broken"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stream_flights(self):
+        sample_flight()
+        sample_flight(departure_time="2024-06-12 21:53:16Z",
+                      arrival_time="2024-06-12 23:53:16Z")
+
+        res = self.client.get(FLIGHT_URL, {"stream": "true"})
+        data = json.loads(b"".join(res.streaming_content))
+
+        flights = Flight.objects.annotate(
+            tickets_available=(
+                F("airplane__rows") * F("airplane__seats_in_row")
+                - Count("tickets")
+            )
+        ).order_by("departure_time", "id")
+        serializer = FlightListSerializer(flights, many=True)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(data, json.loads(json.dumps(serializer.data)))
 
     def test_retrieve_flight_detail(self):
         flight = sample_flight()
@@ -0,0 +1,160 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.itineraries import flight_index
+from airport.tests.test_airport_api import (
+    sample_airport,
+    sample_flight,
+    sample_route,
+    detail_url,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+ASYNC_FLIGHT_URL = reverse("airport:async-flight-list")
+ITINERARY_URL = reverse("airport:itinerary-list")
+ASYNC_ITINERARY_URL = reverse("airport:async-itinerary-list")
+
+
+def async_detail_url(flight_id):
+    return reverse("airport:async-flight-detail", args=[flight_id])
+
+
+class UnauthenticatedAsyncFlightApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(ASYNC_FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", res)
+
+    def test_jwt_token(self):
+        user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        token = AccessToken.for_user(user)
+
+        res = self.client.get(
+            ASYNC_FLIGHT_URL, HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        invalid = self.client.get(
+            ASYNC_FLIGHT_URL, HTTP_AUTHORIZATION="Bearer invalid"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(invalid.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedAsyncFlightApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.start = timezone.now().replace(microsecond=0)
+        cache.clear()
+
+    def add_flights(self, count):
+        return [
+            sample_flight(
+                departure_time=self.start + timedelta(hours=index),
+                arrival_time=self.start + timedelta(hours=index + 2),
+            )
+            for index in range(count)
+        ]
+
+    def test_responses_cached_until_order(self):
+        flight = self.add_flights(1)[0]
+        self.client.get(async_detail_url(flight.id))
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(async_detail_url(flight.id))
+        self.client.post(
+            reverse("airport:order-list"),
+            {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]},
+            format="json",
+        )
+        res = self.client.get(async_detail_url(flight.id))
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json(), self.client.get(detail_url(flight.id)).json()
+        )
+        self.assertNotEqual(res.json(), cached.json())
+
+    def test_list_matches_sync_view(self):
+        self.add_flights(3)
+        params = {"page_size": 2, "departure_after": self.start.isoformat()}
+
+        sync = self.client.get(FLIGHT_URL, params).json()
+        res = self.client.get(ASYNC_FLIGHT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"], sync["results"])
+        self.assertIn(ASYNC_FLIGHT_URL, res.json()["next"])
+
+        following = self.client.get(res.json()["next"]).json()
+        self.assertEqual(
+            following["results"],
+            self.client.get(sync["next"]).json()["results"],
+        )
+
+    def test_invalid_filter(self):
+        res = self.client.get(ASYNC_FLIGHT_URL, {"departure_after": "soon"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("departure_after", res.json())
+
+    def test_detail_matches_sync_view(self):
+        flight = self.add_flights(1)[0]
+
+        for params in ({}, {"seat_map": "compact"}):
+            sync = self.client.get(detail_url(flight.id), params)
+            res = self.client.get(async_detail_url(flight.id), params)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json(), sync.json())
+
+    def test_detail_not_found(self):
+        res = self.client.get(async_detail_url(1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_read_only(self):
+        res = self.client.post(ASYNC_FLIGHT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_itineraries_match_sync_view(self):
+        flight_index.expire()
+        lviv = sample_airport(name="Lviv", closest_big_city="Lviv")
+        kyiv = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        sample_flight(
+            route=sample_route(source=lviv, destination=kyiv),
+            departure_time=self.start + timedelta(hours=1),
+            arrival_time=self.start + timedelta(hours=2),
+        )
+        params = {
+            "from": "Lviv",
+            "to": "Kyiv",
+            "departure_after": self.start.isoformat(),
+        }
+
+        sync = self.client.get(ITINERARY_URL, params)
+        res = self.client.get(ASYNC_ITINERARY_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()), 1)
+        self.assertEqual(res.json(), sync.json())
@@ -0,0 +1,94 @@
+import random
+from urllib.parse import parse_qs, urlsplit
+
+from django.test import SimpleTestCase, TestCase
+
+from airport.management.commands.benchmark_api import Command, HttpClient
+from airport.tests.test_airport_api import (
+    sample_airport,
+    sample_flight,
+    sample_route,
+)
+
+
+class BenchmarkReportTests(SimpleTestCase):
+    def test_summary(self):
+        results = [
+            (200, b"", 0.010, 2),
+            (200, b"", 0.020, 2),
+            (429, b"", 0.030, 1),
+            (500, b"", 0.040, 5),
+            (None, b"", 0.100, None),
+        ]
+
+        summary = Command.summary(results, elapsed=0.5)
+
+        self.assertEqual(summary["throughput"], 10.0)
+        self.assertEqual(summary["latency_ms"]["mean"], 40.0)
+        self.assertEqual(summary["latency_ms"]["p50"], 30.0)
+        self.assertEqual(summary["latency_ms"]["max"], 100.0)
+        self.assertEqual(
+            summary["statuses"], {"200": 2, "429": 1, "500": 1, "None": 1}
+        )
+        self.assertEqual(summary["errors"], 2)
+        self.assertEqual(
+            summary["queries_per_request"], {"mean": 2.5, "max": 5}
+        )
+
+    def test_summary_of_one_result(self):
+        summary = Command.summary([(201, b"", 0.025, None)], elapsed=0.025)
+
+        self.assertEqual(
+            summary["latency_ms"],
+            {"mean": 25.0, "p50": 25.0, "p95": 25.0, "p99": 25.0, "max": 25.0},
+        )
+        self.assertIsNone(summary["queries_per_request"])
+
+    def test_compare_with_baseline(self):
+        def report(throughput, p50, p95, p99):
+            latency = {"p50": p50, "p95": p95, "p99": p99}
+            return {"throughput": throughput, "latency_ms": latency}
+
+        current = {
+            "scenarios": {
+                "token": report(150, 10, 20, 0),
+                "flight_search": report(100, 5, 5, 5),
+            }
+        }
+        baseline = {"scenarios": {"token": report(100, 20, 20, 0)}}
+
+        self.assertEqual(
+            Command.compare(current, baseline),
+            {"token": {"throughput": 50.0, "p50": -50.0, "p95": 0.0}},
+        )
+
+    def test_malformed_request_counted_as_failed(self):
+        client = HttpClient("http://localhost:1")
+
+        status, body, _, queries = client.request("GET", "/flights/?to=a b")
+
+        self.assertIsNone(status)
+        self.assertEqual(body, b"")
+        self.assertIsNone(queries)
+
+
+class BenchmarkRequestsTests(TestCase):
+    def test_search_query_is_encoded(self):
+        source = sample_airport(closest_big_city="City 12")
+        destination = sample_airport(closest_big_city="City & 7")
+        sample_flight(
+            route=sample_route(source=source, destination=destination)
+        )
+
+        ((method, path, _),) = Command().search_requests(random.Random(1), 1)
+
+        self.assertEqual(method, "GET")
+        self.assertNotIn(" ", path)
+        self.assertEqual(
+            parse_qs(urlsplit(path).query),
+            {
+                "from": ["City 12"],
+                "to": ["City & 7"],
+                "departure_time": ["2024-06-13"],
+            },
+        )
@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.tests.test_airport_api import sample_airport, sample_route
+
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+class ConditionalCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.airport = sample_airport()
+
+    def test_unchanged_list_is_not_modified(self):
+        res = self.client.get(AIRPORT_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(
+                AIRPORT_URL, HTTP_IF_NONE_MATCH=res["ETag"]
+            )
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached["ETag"], res["ETag"])
+        self.assertFalse(cached.content)
+
+    def test_if_modified_since(self):
+        res = self.client.get(AIRPORT_URL)
+
+        cached = self.client.get(
+            AIRPORT_URL, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+        )
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @mock.patch("airport.conditional.time.time", return_value=1000.2)
+    def test_change_in_same_second_modifies_list(self, _):
+        res = self.client.get(AIRPORT_URL)
+
+        sample_airport(name="Boryspil")
+        changed = self.client.get(
+            AIRPORT_URL, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+        )
+        with_etag = self.client.get(
+            AIRPORT_URL,
+            HTTP_IF_NONE_MATCH=res["ETag"],
+            HTTP_IF_MODIFIED_SINCE=changed["Last-Modified"],
+        )
+
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(changed.data), 2)
+        self.assertEqual(with_etag.status_code, status.HTTP_200_OK)
+
+    def test_change_of_table_modifies_list(self):
+        res = self.client.get(AIRPORT_URL)
+
+        sample_airport(name="Boryspil")
+        changed = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(changed.data), 2)
+        self.assertNotEqual(changed["ETag"], res["ETag"])
+
+    def test_route_detail_depends_on_airports(self):
+        route = sample_route()
+        url = reverse("airport:route-detail", args=[route.id])
+        res = self.client.get(url)
+
+        self.assertNotEqual(res["ETag"], self.client.get(ROUTE_URL)["ETag"])
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"]).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        self.airport.name = "Renamed"
+        self.airport.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
@@ -0,0 +1,200 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.itineraries import Leg, Timetable, flight_index
+from airport.models import Flight
+from airport.tests.test_airport_api import (
+    sample_airport,
+    sample_airplane,
+    sample_route,
+)
+
+ITINERARY_URL = reverse("airport:itinerary-list")
+
+
+class ItinerarySearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        flight_index.expire()
+
+        self.lviv = sample_airport(name="Lviv", closest_big_city="Lviv")
+        self.kyiv = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        self.odesa = sample_airport(name="Odesa", closest_big_city="Odesa")
+        self.airplane = sample_airplane()
+        self.start = (timezone.now() + timedelta(days=1)).replace(
+            hour=6, minute=0, second=0, microsecond=0
+        )
+
+    def add_flight(self, source, destination, departs, hours=1, **params):
+        departure_time = self.start + timedelta(hours=departs)
+        return Flight.objects.create(
+            route=sample_route(source=source, destination=destination),
+            airplane=self.airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=hours),
+            **params,
+        )
+
+    def search(self, **params):
+        params = {
+            "from": self.lviv.id,
+            "to": "odesa",
+            "departure_after": self.start.isoformat(),
+            **params,
+        }
+        return self.client.get(ITINERARY_URL, params)
+
+    def journeys(self, res):
+        return [
+            [leg["flight"] for leg in itinerary["legs"]]
+            for itinerary in res.data
+        ]
+
+    def test_direct_and_connecting_journeys(self):
+        direct = self.add_flight(self.lviv, self.odesa, 0, hours=4)
+        first = self.add_flight(self.lviv, self.kyiv, 0)
+        second = self.add_flight(self.kyiv, self.odesa, 2)
+
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.journeys(res), [[first.id, second.id], [direct.id]]
+        )
+        self.assertEqual(res.data[0]["duration"], 180)
+
+    def test_max_legs_and_connection_time(self):
+        first = self.add_flight(self.lviv, self.kyiv, 0)
+        self.add_flight(self.kyiv, self.odesa, 1.5)
+
+        self.assertEqual(self.journeys(self.search(max_legs=1)), [])
+        self.assertEqual(self.journeys(self.search(min_connection=60)), [])
+
+        later = self.add_flight(self.kyiv, self.odesa, 3)
+
+        self.assertEqual(
+            self.journeys(self.search(min_connection=60)),
+            [[first.id, later.id]],
+        )
+
+    def test_sold_out_flights_are_skipped(self):
+        self.add_flight(self.lviv, self.odesa, 0, tickets_sold=100)
+
+        self.assertEqual(self.journeys(self.search()), [])
+
+    def test_index_picks_up_new_flights(self):
+        self.assertEqual(self.journeys(self.search()), [])
+
+        flight = self.add_flight(self.lviv, self.odesa, 0)
+
+        self.assertEqual(self.journeys(self.search()), [[flight.id]])
+
+    def test_added_flight_keeps_earlier_flights_of_other_workers(self):
+        self.search()
+        # committed by another worker after `later` was added here
+        earlier = self.add_flight(self.lviv, self.odesa, 1)
+        later = self.add_flight(self.lviv, self.odesa, 0)
+        flight_index.update_flight(later)
+
+        self.assertEqual(
+            self.journeys(self.search()), [[later.id], [earlier.id]]
+        )
+
+    def test_edited_flight_applied_without_rebuild(self):
+        flight = self.add_flight(self.lviv, self.odesa, 0)
+        self.assertEqual(self.journeys(self.search()), [[flight.id]])
+        built_at = flight_index._built_at
+
+        # as saved by another worker
+        flight.departure_time -= timedelta(hours=3)
+        flight.save()
+
+        self.assertEqual(self.journeys(self.search()), [])
+        self.assertEqual(flight_index._built_at, built_at)
+
+    def test_expired_index_rebuilt_in_background(self):
+        flight = self.add_flight(self.lviv, self.odesa, 0)
+        self.search()
+        flight_index._built_at -= flight_index.rebuild_interval + 1
+
+        with mock.patch("airport.itineraries.threading.Thread") as thread:
+            res = self.search()
+            res_again = self.search()
+
+        self.assertEqual(self.journeys(res), [[flight.id]])
+        self.assertEqual(self.journeys(res_again), [[flight.id]])
+        thread.assert_called_once_with(
+            target=flight_index._rebuild_in_thread, daemon=True
+        )
+        thread.return_value.start.assert_called_once_with()
+
+        flight_index._rebuild()
+
+        self.assertFalse(flight_index._rebuilding)
+        self.assertEqual(self.journeys(self.search()), [[flight.id]])
+
+    def test_deleted_flight_removed(self):
+        flight = self.add_flight(self.lviv, self.odesa, 0)
+        self.search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flight.delete()
+
+        self.assertNotIn(flight.id, flight_index.timetable.legs)
+        self.assertEqual(self.journeys(self.search()), [])
+
+    def test_invalid_search(self):
+        for params in (
+            {"to": ""},
+            {"max_legs": 7},
+            {"to": "Atlantis"},
+        ):
+            res = self.search(**params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TimetableTests(SimpleTestCase):
+    def leg(self, flight_id, source, destination, hour):
+        departs = datetime(2024, 1, 1, hour, tzinfo=dt_timezone.utc)
+        return Leg(
+            flight_id,
+            1,
+            source,
+            destination,
+            departs,
+            departs + timedelta(hours=1),
+            10,
+        )
+
+    def test_apply_replaces_published_lists_and_sets(self):
+        timetable = Timetable()
+        timetable.load([self.leg(1, "A", "B", 6), self.leg(2, "A", "C", 8)])
+        departures = timetable.departures["A"]
+        sources = timetable.sources_of["B"]
+
+        timetable.apply(
+            [self.leg(1, "A", "B", 9), self.leg(3, "D", "B", 7)],
+            removed=[2],
+        )
+
+        self.assertEqual([flight_id for _, flight_id in departures], [1, 2])
+        self.assertEqual(sources, {"A"})
+        self.assertEqual(
+            [flight_id for _, flight_id in timetable.departures["A"]], [1]
+        )
+        self.assertEqual(timetable.sources_of["B"], {"A", "D"})
+        self.assertEqual(set(timetable.legs), {1, 3})
+        self.assertEqual(timetable.hops_to(["B"], 2), {"B": 0, "A": 1, "D": 1})
@@ -0,0 +1,193 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.metrics import (
+    EXITED_FILE,
+    Metrics,
+    exposition,
+    fold_exited_worker,
+    metrics,
+)
+from airport.tests.test_airport_api import detail_url, sample_flight
+
+METRICS_URL = reverse("metrics")
+
+
+def labels(view, action):
+    return (("view", view), ("action", action))
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_request_labelled_by_viewset_and_action(self):
+        flight = sample_flight()
+
+        self.client.get(detail_url(flight.id))
+        self.client.get(detail_url(flight.id))
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("text/plain; version=0.0.4", res["Content-Type"])
+        self.assertIn(
+            'http_requests_total{view="FlightViewSet",action="retrieve",'
+            'method="GET",status="200"} 2',
+            res.content.decode(),
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{view="FlightViewSet",'
+            'action="retrieve"} 2',
+            res.content.decode(),
+        )
+
+    def test_queries_and_serializer_time(self):
+        sample_flight()
+
+        self.client.post(reverse("airport:order-list"), {}, format="json")
+        self.client.get(reverse("airport:route-list"))
+
+        totals = metrics.collect()
+        create = labels("OrderViewSet", "create")
+        self.assertEqual(
+            totals[
+                (
+                    "http_requests_total",
+                    (*create, ("method", "POST"), ("status", "400")),
+                )
+            ],
+            1,
+        )
+        self.assertGreater(
+            totals[("serializer_duration_seconds", create)][-1], 0
+        )
+        routes = labels("RouteViewSet", "list")
+        queries = totals[("db_queries_per_request", routes)]
+        self.assertEqual(sum(queries[:-1]), 1)
+        self.assertGreaterEqual(queries[-1], 1)
+        self.assertGreater(
+            totals[("db_query_duration_seconds", routes)][-1], 0
+        )
+        self.assertGreater(
+            totals[("serializer_duration_seconds", routes)][-1], 0
+        )
+
+    def test_throttled_requests(self):
+        with override_settings(
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": {
+                    **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                    "user": "1/min",
+                },
+            }
+        ):
+            self.client.get(reverse("airport:route-list"))
+            res = self.client.get(reverse("airport:route-list"))
+
+        self.assertEqual(res.status_code, 429)
+        totals = metrics.collect()
+        self.assertEqual(
+            totals[("throttled_requests_total", (("scope", "user"),))], 1
+        )
+
+    def test_unmatched_path(self):
+        self.client.get("/missing/")
+
+        self.assertIn(
+            (
+                "http_requests_total",
+                (
+                    *labels("unmatched", ""),
+                    ("method", "GET"),
+                    ("status", "404"),
+                ),
+            ),
+            metrics.collect(),
+        )
+
+    def test_totals_of_other_workers(self):
+        key = ("throttled_requests_total", (("scope", "anon"),))
+        other = Metrics()
+        other.inc(*key, 2)
+        metrics.inc(*key)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_DIR=directory
+        ):
+            with mock.patch("os.getpid", return_value=os.getpid() + 1):
+                other.flush()
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+            res = self.client.get(METRICS_URL)
+
+        self.assertIn(
+            'throttled_requests_total{scope="anon"} 3', res.content.decode()
+        )
+
+    def test_exited_workers_folded_into_one_file(self):
+        key = ("throttled_requests_total", (("scope", "anon"),))
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_DIR=directory
+        ):
+            for pid in (1, 2, 3):
+                other = Metrics()
+                other.inc(*key, pid)
+                with mock.patch("os.getpid", return_value=pid):
+                    other.flush()
+
+            fold_exited_worker(directory, 1)
+            fold_exited_worker(directory, 2)
+
+            self.assertEqual(
+                sorted(name.split("-")[0] for name in os.listdir(directory)),
+                ["3", EXITED_FILE],
+            )
+            self.assertEqual(metrics.collect_all()[key], 6)
+
+
+class ExpositionTests(SimpleTestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        recorded = Metrics()
+        for value in (0.003, 0.2, 20):
+            recorded.observe(
+                "http_request_duration_seconds", labels("View", "get"), value
+            )
+
+        lines = exposition(recorded.collect()).splitlines()
+
+        prefix = (
+            'http_request_duration_seconds_bucket{view="View",action="get"'
+        )
+        self.assertIn(prefix + ',le="0.005"} 1', lines)
+        self.assertIn(prefix + ',le="0.25"} 2', lines)
+        self.assertIn(prefix + ',le="10"} 2', lines)
+        self.assertIn(prefix + ',le="+Inf"} 3', lines)
+        self.assertIn(
+            'http_request_duration_seconds_count{view="View",action="get"} 3',
+            lines,
+        )
+
+    def test_label_values_escaped(self):
+        recorded = Metrics()
+        recorded.inc("throttled_requests_total", (("scope", 'a"b\\c\n'),))
+
+        self.assertIn(
+            'throttled_requests_total{scope="a\\"b\\\\c\\n"} 1',
+            exposition(recorded.collect()),
+        )
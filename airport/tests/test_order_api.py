@@ -0,0 +1,436 @@
+import base64
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db import IntegrityError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.mixins import CreateModelMixin
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Order, IdempotencyKey, Ticket
+from airport.seat_map import SeatMap
+from airport.serializers import TicketSerializer
+from airport.tests.test_airport_api import (
+    sample_airplane,
+    sample_flight,
+    detail_url,
+)
+
+ORDER_URL = reverse("airport:order-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class FlightInventoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def create_order(self, *seats):
+        payload = {
+            "tickets": [
+                {"row": row, "seat": seat, "flight": self.flight.id}
+                for row, seat in seats
+            ]
+        }
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def test_order_increases_tickets_sold(self):
+        res = self.create_order((1, 1), (1, 2))
+        self.flight.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.flight.tickets_sold, 2)
+
+    def test_ticket_saved_alone_takes_seat(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+        flight = Flight.objects.get(id=self.flight.id)
+
+        self.assertEqual(flight.tickets_sold, 1)
+        self.assertTrue(flight.seats.is_taken(1, 1))
+        with self.assertRaises(ValidationError):
+            Ticket.objects.create(
+                row=1, seat=1, flight=self.flight, order=order
+            )
+
+    def test_stale_flight_save_keeps_booked_seats(self):
+        stale = Flight.objects.get(id=self.flight.id)
+        self.create_order((1, 1))
+
+        stale.departure_time += timedelta(minutes=5)
+        stale.save()
+        flight = Flight.objects.get(id=self.flight.id)
+
+        self.assertEqual(flight.departure_time, stale.departure_time)
+        self.assertEqual(flight.tickets_sold, 1)
+        self.assertTrue(flight.seats.is_taken(1, 1))
+        call_command("rebuild_flight_inventory", check=True, stdout=StringIO())
+
+    def test_flight_list_reads_tickets_available_from_counter(self):
+        self.create_order((1, 1), (1, 2), (2, 1))
+
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.data["results"][0]["tickets_available"], 97)
+
+    def test_ticket_deletion_decreases_tickets_sold(self):
+        self.create_order((1, 1), (1, 2))
+        Order.objects.get(user=self.user).tickets.first().delete()
+        self.flight.refresh_from_db()
+
+        self.assertEqual(self.flight.tickets_sold, 1)
+
+    def test_order_deletion_releases_all_tickets(self):
+        self.create_order((1, 1), (1, 2))
+        Order.objects.filter(user=self.user).delete()
+        self.flight.refresh_from_db()
+
+        self.assertEqual(self.flight.tickets_sold, 0)
+
+    def test_rebuild_inventory_command_fixes_drift(self):
+        self.create_order((1, 1), (1, 2))
+        Flight.objects.filter(id=self.flight.id).update(tickets_sold=7)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_flight_inventory", check=True, stdout=StringIO())
+
+        call_command("rebuild_flight_inventory", stdout=StringIO())
+        self.flight.refresh_from_db()
+
+        self.assertEqual(self.flight.tickets_sold, 2)
+        call_command("rebuild_flight_inventory", check=True, stdout=StringIO())
+
+    def test_taken_seat_is_rejected(self):
+        self.create_order((1, 1))
+
+        res = self.create_order((1, 2), (1, 1))
+        self.flight.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.flight.tickets_sold, 1)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_same_seat_twice_in_order_is_rejected(self):
+        res = self.create_order((3, 3), (3, 3))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("seat", res.data["tickets"][1])
+        self.assertFalse(Order.objects.exists())
+
+    def test_group_order_takes_constant_number_of_queries(self):
+        with CaptureQueriesContext(connection) as single:
+            self.create_order((1, 1))
+        group = [(row, seat) for row in range(2, 4) for seat in range(1, 11)]
+
+        with self.assertNumQueries(len(single)):
+            res = self.create_order(*group)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 20)
+
+    def test_out_of_range_seat_message(self):
+        res = self.create_order((1, 1), (1, 11))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["tickets"][1]["seat"][0],
+            "seat number must be in available range: "
+            "(1, seats_in_row): (1, 10)",
+        )
+
+    def test_seat_taken_before_lock_message(self):
+        self.create_order((1, 1))
+        validated = self.create_order((1, 1))
+
+        # the seat is taken between validation and the flight lock
+        with mock.patch.object(
+            TicketSerializer, "validate", lambda serializer, attrs: attrs
+        ):
+            locked = self.create_order((1, 1))
+
+        self.assertEqual(locked.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(locked.data, validated.data)
+        self.assertEqual(
+            locked.data["tickets"][0]["seat"],
+            ["seat 1 in row 1 is already taken"],
+        )
+
+    def test_taken_places_are_read_from_seat_map(self):
+        self.create_order((2, 5), (1, 3))
+
+        res = self.client.get(detail_url(self.flight.id))
+
+        self.assertEqual(
+            res.data["taken_places"],
+            [{"row": 1, "seat": 3}, {"row": 2, "seat": 5}],
+        )
+
+    def test_compact_seat_map(self):
+        self.create_order((1, 1), (10, 10))
+
+        res = self.client.get(
+            detail_url(self.flight.id), {"seat_map": "compact"}
+        )
+
+        self.assertNotIn("taken_places", res.data)
+        self.assertEqual(
+            base64.b64decode(res.data["seat_map"]),
+            b"\x80" + bytes(11) + b"\x10",
+        )
+
+
+class SeatAllocationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(airplane=sample_airplane(seats_in_row=4))
+
+    def order(self, tickets=(), **allocation):
+        payload = {}
+        if tickets:
+            payload["tickets"] = [
+                {"row": row, "seat": seat, "flight": self.flight.id}
+                for row, seat in tickets
+            ]
+        if allocation:
+            payload["allocations"] = [{"flight": self.flight.id, **allocation}]
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def seats(self, res):
+        return [(ticket["row"], ticket["seat"]) for ticket in res.data["tickets"]]
+
+    def test_group_gets_adjacent_seats(self):
+        self.order([(2, 1), (2, 4)])
+
+        res = self.order(count=2)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.seats(res), [(2, 2), (2, 3)])
+
+    def test_allocation_with_explicit_tickets(self):
+        res = self.order([(1, 1)], count=4)
+
+        self.assertEqual(
+            self.seats(res), [(1, 1), (2, 1), (2, 2), (2, 3), (2, 4)]
+        )
+
+    def test_no_adjacent_seats(self):
+        self.order([(row, 2) for row in range(1, 11)])
+
+        together = self.order(count=3)
+        apart = self.order(count=3, together=False)
+
+        self.assertEqual(together.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("count", together.data["allocations"][0])
+        self.assertEqual(self.seats(apart), [(1, 1), (1, 3), (1, 4)])
+
+    def test_empty_order_is_rejected(self):
+        res = self.client.post(ORDER_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SeatMapTests(TestCase):
+    def test_take_and_release(self):
+        seat_map = SeatMap()
+        seat_map.take(40, 15)
+        seat_map.take(1, 1)
+        seat_map.take(2, 1)
+        seat_map.release(1, 1)
+
+        self.assertEqual(list(seat_map), [(2, 1), (40, 15)])
+        self.assertEqual(len(seat_map), 2)
+        self.assertEqual(list(SeatMap(bytes(seat_map))), list(seat_map))
+
+    def test_find_free_block_of_rows(self):
+        seat_map = SeatMap()
+        seat_map.take(1, 1)
+
+        self.assertEqual(
+            seat_map.find_free(3, 3, 5),
+            [(1, 2), (1, 3), (2, 1), (2, 2), (2, 3)],
+        )
+        self.assertIsNone(seat_map.find_free(2, 3, 6))
+        self.assertEqual(len(seat_map.find_free(2, 3, 5, False)), 5)
+
+
+class IdempotentOrderTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def create_order(self, key, row=1, seat=1):
+        payload = {
+            "tickets": [{"row": row, "seat": seat, "flight": self.flight.id}]
+        }
+        return self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_returns_first_result(self):
+        first = self.create_order("retry-1")
+
+        with self.assertNumQueries(1):
+            retry = self.create_order("retry-1")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, json.loads(json.dumps(first.data)))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_with_other_payload(self):
+        self.create_order("retry-1")
+
+        res = self.create_order("retry-1", seat=2)
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_expired_key_is_evicted(self):
+        self.create_order("retry-1")
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+
+        res = self.create_order("retry-1", seat=2)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_failed_requests_are_not_stored(self):
+        self.create_order("retry-1", seat=99)
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_retry_while_first_request_in_progress(self):
+        retries = []
+        create = CreateModelMixin.create
+
+        def slow_create(view, request, *args, **kwargs):
+            # the retry arrives before the first order is created
+            retries.append(self.create_order("retry-1"))
+            return create(view, request, *args, **kwargs)
+
+        with mock.patch.object(CreateModelMixin, "create", slow_create):
+            first = self.create_order("retry-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retries[0].status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.count(), 1)
+        retry = self.create_order("retry-1")
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+    def test_key_released_by_concurrent_request(self):
+        create = IdempotencyKey.objects.create
+        conflicts = iter([True])
+
+        def reserve(**kwargs):
+            # reserved by another request which then failed
+            if next(conflicts, False):
+                raise IntegrityError
+            return create(**kwargs)
+
+        with mock.patch.object(
+            IdempotencyKey.objects, "create", side_effect=reserve
+        ):
+            res = self.create_order("retry-1")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 1)
+
+        with mock.patch.object(
+            IdempotencyKey.objects, "create", side_effect=IntegrityError
+        ):
+            res = self.create_order("retry-2")
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class FlightResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.other = sample_flight()
+
+    def order(self, flight, row=1, seat=1):
+        payload = {"tickets": [{"row": row, "seat": seat, "flight": flight.id}]}
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get(FLIGHT_URL, {"page_size": 5, "airplane": "A"})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                FLIGHT_URL, {"airplane": "A", "page_size": 5}
+            )
+
+        self.assertEqual(res.data, first.data)
+
+    def test_order_expires_only_its_flights(self):
+        self.client.get(detail_url(self.flight.id))
+        self.client.get(detail_url(self.other.id))
+        self.client.get(FLIGHT_URL)
+
+        self.order(self.flight, 2, 3)
+
+        with self.assertNumQueries(0):
+            self.client.get(detail_url(self.other.id))
+        res = self.client.get(detail_url(self.flight.id))
+        self.assertEqual(res.data["taken_places"], [{"row": 2, "seat": 3}])
+        available = {
+            flight["id"]: flight["tickets_available"]
+            for flight in self.client.get(FLIGHT_URL).data["results"]
+        }
+        self.assertEqual(available, {self.flight.id: 99, self.other.id: 100})
+
+    def test_new_flight_expires_lists(self):
+        self.client.get(FLIGHT_URL)
+
+        flight = sample_flight()
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertIn(
+            flight.id, [flight["id"] for flight in res.data["results"]]
+        )
+
+    def test_ticket_deletion_expires_flight(self):
+        self.order(self.flight)
+        self.client.get(detail_url(self.flight.id))
+
+        Order.objects.get().delete()
+        res = self.client.get(detail_url(self.flight.id))
+
+        self.assertEqual(res.data["taken_places"], [])
@@ -0,0 +1,550 @@
+import os
+import tempfile
+from datetime import timedelta
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from airport.async_views import (
+    AsyncFlightDetailView,
+    AsyncFlightListView,
+    AsyncItineraryView,
+)
+from airport.itineraries import flight_index
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    SeatHold,
+    Ticket,
+)
+from airport.tests.test_airport_api import sample_airplane, sample_route
+from airport.urls import router
+from airport.views import (
+    AirplaneTypeViewSet,
+    AirplaneViewSet,
+    AirportViewSet,
+    CrewViewSet,
+    FlightViewSet,
+    ItineraryViewSet,
+    OrderViewSet,
+    RouteViewSet,
+    SeatHoldViewSet,
+)
+
+# counts of related rows every budget must hold for
+SIZES = (1, 10, 100)
+# itineraries are searched among flights of the last day and later
+DEPARTURE = now().replace(minute=0, second=0, microsecond=0)
+
+
+def numbered(queries):
+    return "\n".join(
+        f"{number}. {query['sql']}"
+        for number, query in enumerate(queries, start=1)
+    )
+
+
+@override_settings(SYNC_CURSOR_LAG=timedelta(0))
+class QueryBudgetTests(TestCase):
+    """
+    Every action makes at most `query_budgets[action]` queries of its
+    view, whether it reads or writes 1, 10 or 100 related rows
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.airplane = sample_airplane(rows=20, seats_in_row=10)
+        self.route = sample_route()
+
+    def assertQueryBudget(self, view, action, seed, request):
+        """
+        `seed(size)` rows in a rolled back transaction, then make
+        `request(*seeded)` and count its queries against the budget
+        """
+        budget = view.query_budgets[action]
+        for size in SIZES:
+            with self.subTest(view=view.__name__, action=action, size=size):
+                with transaction.atomic():
+                    seeded = seed(size)
+                    cache.clear()
+                    flight_index.expire()
+                    with CaptureQueriesContext(connection) as queries:
+                        res = request(*seeded)
+                        if res.streaming:
+                            b"".join(res.streaming_content)
+                    transaction.set_rollback(True)
+
+                self.assertLess(
+                    res.status_code, 300, getattr(res, "data", res)
+                )
+                if len(queries) > budget:
+                    self.fail(
+                        f"{view.__name__}.{action} made {len(queries)} "
+                        f"queries with {size} rows, budget is {budget}:\n"
+                        f"{numbered(queries)}"
+                    )
+
+    def seed_flights(self, size, crews=2, route=None):
+        crews = Crew.objects.bulk_create(
+            Crew(first_name=f"Pilot {index}", last_name="Budget")
+            for index in range(crews)
+        )
+        flights = Flight.objects.bulk_create(
+            Flight(
+                route=route or self.route,
+                airplane=self.airplane,
+                departure_time=DEPARTURE + timedelta(hours=index),
+                arrival_time=DEPARTURE + timedelta(hours=index + 2),
+            )
+            for index in range(size)
+        )
+        Flight.crews.through.objects.bulk_create(
+            Flight.crews.through(flight_id=flight.id, crew_id=crew.id)
+            for flight in flights
+            for crew in crews
+        )
+        return flights
+
+    def seed_flight_list(self, size):
+        self.seed_flights(size)
+        return ()
+
+    def seed_tickets(self, flight, size):
+        order = Order.objects.create(user=self.user)
+        tickets = Ticket.objects.bulk_create(
+            Ticket(row=row, seat=seat, flight=flight, order=order)
+            for row, seat in self.seats(size)
+        )
+        for ticket in tickets:
+            flight.seats.take(ticket.row, ticket.seat)
+        flight.save_seats()
+        return tickets
+
+    def seats(self, size):
+        return [
+            (
+                index // self.airplane.seats_in_row + 1,
+                index % self.airplane.seats_in_row + 1,
+            )
+            for index in range(size)
+        ]
+
+    def seed_airports(self, size):
+        Airport.objects.bulk_create(
+            Airport(name=f"Airport {index}", closest_big_city="City")
+            for index in range(size)
+        )
+        return ()
+
+    def seed_routes(self, size):
+        airports = Airport.objects.bulk_create(
+            Airport(name=f"Airport {index}", closest_big_city="City")
+            for index in range(size + 1)
+        )
+        routes = Route.objects.bulk_create(
+            Route(source=source, destination=destination, distance=500)
+            for source, destination in zip(airports, airports[1:])
+        )
+        return (routes[-1].id,)
+
+    def seed_airplanes(self, size):
+        airplane_types = AirplaneType.objects.bulk_create(
+            AirplaneType(name=f"Type {index}") for index in range(size)
+        )
+        airplanes = Airplane.objects.bulk_create(
+            Airplane(
+                name=f"Airplane {index}",
+                rows=10,
+                seats_in_row=6,
+                airplane_type=airplane_type,
+                image=f"uploads/airplanes/{index}.jpg" if index % 2 else "",
+            )
+            for index, airplane_type in enumerate(airplane_types)
+        )
+        return (airplanes[-1].id,)
+
+    def seed_orders(self, size):
+        flights = self.seed_flights(size)
+        orders = Order.objects.bulk_create(
+            Order(user=self.user) for _ in range(size)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(row=1, seat=seat, flight=flight, order=order)
+            for order, flight in zip(orders, flights)
+            for seat in (1, 2)
+        )
+        return ()
+
+    def seed_holds(self, size):
+        flights = self.seed_flights(size)
+        holds = SeatHold.objects.bulk_create(
+            SeatHold(
+                flight=flight,
+                user=self.user,
+                seats=[{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+                expires_at=now() + timedelta(hours=1),
+            )
+            for flight in flights
+        )
+        return (holds[-1].id,)
+
+    def seed_hold_of_seats(self, size):
+        (flight,) = self.seed_flights(1)
+        hold = SeatHold.objects.create(
+            flight=flight,
+            user=self.user,
+            seats=[
+                {"row": row, "seat": seat} for row, seat in self.seats(size)
+            ],
+            expires_at=now() + timedelta(hours=1),
+        )
+        return (hold.id,)
+
+    def seed_itineraries(self, size):
+        airports = Airport.objects.bulk_create(
+            Airport(name=f"Hub {index}", closest_big_city=f"Hub {index}")
+            for index in range(3)
+        )
+        for source, destination in zip(airports, airports[1:]):
+            self.seed_flights(
+                size,
+                route=Route.objects.create(
+                    source=source, destination=destination, distance=500
+                ),
+            )
+        return (airports[0].id, airports[-1].id)
+
+    def get(self, url, **params):
+        return lambda *args: self.client.get(url(*args), params)
+
+    def post(self, url, data):
+        return lambda *args: self.client.post(
+            url(*args), data(*args), format="json"
+        )
+
+    def test_flights(self):
+        def seed_flight(size):
+            (flight,) = self.seed_flights(1, crews=size)
+            self.seed_tickets(flight, size)
+            return (flight.id,)
+
+        def seed_crews(size):
+            crews = Crew.objects.bulk_create(
+                Crew(first_name=f"Pilot {index}", last_name="Budget")
+                for index in range(size)
+            )
+            return ([crew.id for crew in crews],)
+
+        def url(*args):
+            return reverse("airport:flight-list")
+
+        def detail(flight_id):
+            return reverse("airport:flight-detail", args=[flight_id])
+
+        for action, seed, request in (
+            ("list", self.seed_flight_list, self.get(url)),
+            ("list", self.seed_flight_list, self.get(url, stream="true")),
+            ("list", self.seed_flight_list, self.get(url, fields="id,crews")),
+            ("retrieve", seed_flight, self.get(detail)),
+            ("retrieve", seed_flight, self.get(detail, seat_map="compact")),
+            (
+                "changes",
+                self.seed_flight_list,
+                self.get(lambda *args: reverse("airport:flight-changes")),
+            ),
+            (
+                "create",
+                seed_crews,
+                self.post(
+                    url,
+                    lambda crews: {
+                        "route": self.route.id,
+                        "airplane": self.airplane.id,
+                        "departure_time": "2024-06-13T08:00:00Z",
+                        "arrival_time": "2024-06-13T10:00:00Z",
+                        "crews": crews,
+                    },
+                ),
+            ),
+        ):
+            self.assertQueryBudget(FlightViewSet, action, seed, request)
+
+    def test_async_flights(self):
+        def seed_flight(size):
+            (flight,) = self.seed_flights(1, crews=size)
+            self.seed_tickets(flight, size)
+            return (flight.id,)
+
+        def detail(flight_id):
+            return reverse("airport:async-flight-detail", args=[flight_id])
+
+        for view, seed, request in (
+            (
+                AsyncFlightListView,
+                self.seed_flight_list,
+                self.get(lambda: reverse("airport:async-flight-list")),
+            ),
+            (AsyncFlightDetailView, seed_flight, self.get(detail)),
+            (
+                AsyncFlightDetailView,
+                seed_flight,
+                self.get(detail, seat_map="compact"),
+            ),
+        ):
+            self.assertQueryBudget(view, "get", seed, request)
+
+    def test_itineraries(self):
+        def url(source, destination):
+            return (
+                f"{reverse('airport:itinerary-list')}"
+                f"?from={source}&to={destination}"
+                f"&departure_after={DEPARTURE:%Y-%m-%dT%H:%M}"
+            )
+
+        def async_url(source, destination):
+            return url(source, destination).replace(
+                reverse("airport:itinerary-list"),
+                reverse("airport:async-itinerary-list"),
+            )
+
+        self.assertQueryBudget(
+            ItineraryViewSet, "list", self.seed_itineraries, self.get(url)
+        )
+        self.assertQueryBudget(
+            AsyncItineraryView,
+            "get",
+            self.seed_itineraries,
+            self.get(async_url),
+        )
+
+    def test_routes(self):
+        def url(*args):
+            return reverse("airport:route-list")
+
+        for action, request in (
+            ("list", self.get(url)),
+            (
+                "retrieve",
+                self.get(
+                    lambda route_id: reverse(
+                        "airport:route-detail", args=[route_id]
+                    )
+                ),
+            ),
+            (
+                "changes",
+                self.get(lambda *args: reverse("airport:route-changes")),
+            ),
+            (
+                "create",
+                self.post(
+                    url,
+                    lambda *args: {
+                        "source": self.route.source_id,
+                        "destination": self.route.destination_id,
+                        "distance": 100,
+                    },
+                ),
+            ),
+        ):
+            self.assertQueryBudget(
+                RouteViewSet, action, self.seed_routes, request
+            )
+
+    def test_airplanes(self):
+        def url(*args):
+            return reverse("airport:airplane-list")
+
+        def upload_image(airplane_id):
+            with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+                Image.new("RGB", (10, 10)).save(image_file, format="JPEG")
+                image_file.seek(0)
+                res = self.client.post(
+                    reverse(
+                        "airport:airplane-upload-image", args=[airplane_id]
+                    ),
+                    {"image": image_file},
+                    format="multipart",
+                )
+            os.remove(Airplane.objects.get(id=airplane_id).image.path)
+            return res
+
+        for action, request in (
+            ("list", self.get(url)),
+            (
+                "retrieve",
+                self.get(
+                    lambda airplane_id: reverse(
+                        "airport:airplane-detail", args=[airplane_id]
+                    )
+                ),
+            ),
+            (
+                "create",
+                self.post(
+                    url,
+                    lambda *args: {
+                        "name": "New",
+                        "rows": 10,
+                        "seats_in_row": 6,
+                        "airplane_type": self.airplane.airplane_type_id,
+                    },
+                ),
+            ),
+            ("upload_image", upload_image),
+        ):
+            self.assertQueryBudget(
+                AirplaneViewSet, action, self.seed_airplanes, request
+            )
+
+    def test_catalogs(self):
+        def seed_crews(size):
+            Crew.objects.bulk_create(
+                Crew(first_name=f"Pilot {index}", last_name="Budget")
+                for index in range(size)
+            )
+            return ()
+
+        def seed_airplane_types(size):
+            AirplaneType.objects.bulk_create(
+                AirplaneType(name=f"Type {index}") for index in range(size)
+            )
+            return ()
+
+        for view, basename, seed, data in (
+            (
+                AirportViewSet,
+                "airport",
+                self.seed_airports,
+                {"name": "New", "closest_big_city": "City"},
+            ),
+            (
+                CrewViewSet,
+                "crew",
+                seed_crews,
+                {"first_name": "New", "last_name": "Pilot"},
+            ),
+            (
+                AirplaneTypeViewSet,
+                "airplanetype",
+                seed_airplane_types,
+                {"name": "New"},
+            ),
+        ):
+
+            def url():
+                return reverse(f"airport:{basename}-list")
+
+            self.assertQueryBudget(view, "list", seed, self.get(url))
+            self.assertQueryBudget(
+                view, "create", seed, self.post(url, lambda: data)
+            )
+        self.assertQueryBudget(
+            AirportViewSet,
+            "changes",
+            self.seed_airports,
+            self.get(lambda: reverse("airport:airport-changes")),
+        )
+
+    def test_orders(self):
+        def url(*args):
+            return reverse("airport:order-list")
+
+        def seed_flight(size):
+            (flight,) = self.seed_flights(1)
+            return (flight.id, size)
+
+        def tickets(flight_id, size):
+            return {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": flight_id}
+                    for row, seat in self.seats(size)
+                ]
+            }
+
+        self.assertQueryBudget(
+            OrderViewSet, "list", self.seed_orders, self.get(url)
+        )
+        self.assertQueryBudget(
+            OrderViewSet, "create", seed_flight, self.post(url, tickets)
+        )
+
+    def test_seat_holds(self):
+        def url(*args):
+            return reverse("airport:seathold-list")
+
+        def detail(hold_id):
+            return reverse("airport:seathold-detail", args=[hold_id])
+
+        def seed_flight(size):
+            (flight,) = self.seed_flights(1)
+            return (flight.id, size)
+
+        def seats(flight_id, size):
+            return {
+                "flight": flight_id,
+                "seats": [
+                    {"row": row, "seat": seat}
+                    for row, seat in self.seats(size)
+                ],
+            }
+
+        for action, seed, request in (
+            ("list", self.seed_holds, self.get(url)),
+            ("retrieve", self.seed_holds, self.get(detail)),
+            ("create", seed_flight, self.post(url, seats)),
+            (
+                "destroy",
+                self.seed_holds,
+                lambda hold_id: self.client.delete(detail(hold_id)),
+            ),
+            (
+                "confirm",
+                self.seed_hold_of_seats,
+                lambda hold_id: self.client.post(
+                    reverse("airport:seathold-confirm", args=[hold_id])
+                ),
+            ),
+        ):
+            self.assertQueryBudget(SeatHoldViewSet, action, seed, request)
+
+    def test_every_action_has_budget(self):
+        views = {
+            AsyncFlightListView: {"get"},
+            AsyncFlightDetailView: {"get"},
+            AsyncItineraryView: {"get"},
+        }
+        for _, viewset, _ in router.registry:
+            views[viewset] = {
+                action
+                for action in (
+                    "list",
+                    "retrieve",
+                    "create",
+                    "update",
+                    "partial_update",
+                    "destroy",
+                )
+                if hasattr(viewset, action)
+            } | {action.__name__ for action in viewset.get_extra_actions()}
+
+        for view, actions in views.items():
+            with self.subTest(view=view.__name__):
+                self.assertEqual(set(view.query_budgets), actions)
@@ -0,0 +1,357 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from airport.models import Order, Ticket
+from airport.tests.test_airport_api import (
+    detail_url,
+    sample_crew,
+    sample_flight,
+)
+from airport.views import (
+    AirplaneViewSet,
+    FlightViewSet,
+    OrderViewSet,
+    RouteViewSet,
+    TicketViewSet,
+)
+
+CREWS = {
+    "select_related": [],
+    "prefetch_related": {},
+    "only": ["first_name", "id", "last_name"],
+    "annotations": [],
+}
+FLIGHT_LIST = {
+    "select_related": [
+        "route",
+        "route__source",
+        "route__destination",
+        "airplane",
+    ],
+    "prefetch_related": {"crews": CREWS},
+    "only": [
+        "airplane",
+        "arrival_time",
+        "departure_time",
+        "id",
+        "route",
+        "updated_at",
+        "route__destination",
+        "route__source",
+        "route__source__name",
+        "route__destination__name",
+        "airplane__name",
+        "airplane__rows",
+        "airplane__seats_in_row",
+    ],
+    "annotations": ["tickets_available"],
+}
+FLIGHT_DETAIL = {
+    "select_related": [
+        "route",
+        "route__source",
+        "route__destination",
+        "airplane",
+    ],
+    "prefetch_related": {"crews": CREWS},
+    "only": [
+        "airplane",
+        "arrival_time",
+        "departure_time",
+        "id",
+        "route",
+        "seat_map",
+        "updated_at",
+        "route__destination",
+        "route__distance",
+        "route__id",
+        "route__source",
+        "route__source__name",
+        "route__destination__name",
+        "airplane__airplane_type",
+        "airplane__id",
+        "airplane__name",
+        "airplane__rows",
+        "airplane__seats_in_row",
+    ],
+    "annotations": [],
+}
+ROUTE_LIST = {
+    "select_related": ["source", "destination"],
+    "prefetch_related": {},
+    "only": [
+        "destination",
+        "distance",
+        "id",
+        "source",
+        "updated_at",
+        "source__name",
+        "destination__name",
+    ],
+    "annotations": [],
+}
+TICKET_LIST = {
+    "select_related": ["flight", "flight__airplane"],
+    "prefetch_related": {},
+    "only": [
+        "flight",
+        "id",
+        "row",
+        "seat",
+        "flight__airplane",
+        "flight__arrival_time",
+        "flight__departure_time",
+        "flight__id",
+        "flight__airplane__name",
+    ],
+    "annotations": [],
+}
+
+PLANS = {
+    (FlightViewSet, "list", ""): FLIGHT_LIST,
+    (FlightViewSet, "changes", ""): FLIGHT_LIST,
+    (FlightViewSet, "retrieve", ""): FLIGHT_DETAIL,
+    (FlightViewSet, "retrieve", "seat_map=compact"): FLIGHT_DETAIL,
+    (FlightViewSet, "list", "fields=id,departure_time"): {
+        "select_related": [],
+        "prefetch_related": {},
+        "only": ["departure_time", "id", "updated_at"],
+        "annotations": [],
+    },
+    (FlightViewSet, "create", ""): {
+        "select_related": [],
+        "prefetch_related": {
+            "crews": {**CREWS, "only": ["id"]},
+        },
+        "only": [
+            "airplane",
+            "arrival_time",
+            "departure_time",
+            "id",
+            "route",
+            "updated_at",
+        ],
+        "annotations": [],
+    },
+    (RouteViewSet, "list", ""): ROUTE_LIST,
+    (RouteViewSet, "changes", ""): ROUTE_LIST,
+    (RouteViewSet, "retrieve", ""): {
+        "select_related": ["source", "destination"],
+        "prefetch_related": {},
+        "only": [
+            "destination",
+            "distance",
+            "id",
+            "source",
+            "updated_at",
+            "source__closest_big_city",
+            "source__id",
+            "source__name",
+            "destination__closest_big_city",
+            "destination__id",
+            "destination__name",
+        ],
+        "annotations": [],
+    },
+    (RouteViewSet, "create", ""): {
+        "select_related": [],
+        "prefetch_related": {},
+        "only": ["destination", "distance", "id", "source", "updated_at"],
+        "annotations": [],
+    },
+    (AirplaneViewSet, "list", ""): {
+        "select_related": ["airplane_type"],
+        "prefetch_related": {},
+        "only": [
+            "airplane_type",
+            "id",
+            "image",
+            "name",
+            "rows",
+            "seats_in_row",
+            "airplane_type__name",
+        ],
+        "annotations": [],
+    },
+    (AirplaneViewSet, "retrieve", ""): {
+        "select_related": ["airplane_type"],
+        "prefetch_related": {},
+        "only": [
+            "airplane_type",
+            "id",
+            "image",
+            "name",
+            "rows",
+            "seats_in_row",
+            "airplane_type__id",
+            "airplane_type__name",
+        ],
+        "annotations": [],
+    },
+    (AirplaneViewSet, "create", ""): {
+        "select_related": [],
+        "prefetch_related": {},
+        "only": ["airplane_type", "id", "name", "rows", "seats_in_row"],
+        "annotations": [],
+    },
+    (AirplaneViewSet, "upload_image", ""): {
+        "select_related": [],
+        "prefetch_related": {},
+        "only": ["id", "image"],
+        "annotations": [],
+    },
+    (OrderViewSet, "list", ""): {
+        "select_related": [],
+        "prefetch_related": {
+            "tickets": {
+                **TICKET_LIST,
+                "only": [
+                    "flight",
+                    "id",
+                    "order",
+                    "row",
+                    "seat",
+                    "flight__airplane",
+                    "flight__arrival_time",
+                    "flight__departure_time",
+                    "flight__id",
+                    "flight__airplane__name",
+                ],
+            },
+        },
+        "only": ["created_at", "id"],
+        "annotations": [],
+    },
+    (OrderViewSet, "create", ""): {
+        "select_related": [],
+        "prefetch_related": {
+            "tickets": {
+                "select_related": [],
+                "prefetch_related": {},
+                "only": ["flight", "id", "order", "row", "seat"],
+                "annotations": [],
+            },
+        },
+        "only": ["created_at", "id"],
+        "annotations": [],
+    },
+    (TicketViewSet, "list", ""): TICKET_LIST,
+    (TicketViewSet, "retrieve", ""): {
+        "select_related": [
+            "flight",
+            "flight__route",
+            "flight__route__source",
+            "flight__route__destination",
+            "flight__airplane",
+        ],
+        "prefetch_related": {"flight__crews": CREWS},
+        "only": [
+            "flight",
+            "id",
+            "order",
+            "row",
+            "seat",
+            "flight__airplane",
+            "flight__arrival_time",
+            "flight__departure_time",
+            "flight__id",
+            "flight__route",
+            "flight__route__destination",
+            "flight__route__source",
+            "flight__route__source__name",
+            "flight__route__destination__name",
+            "flight__airplane__name",
+            "flight__airplane__rows",
+            "flight__airplane__seats_in_row",
+        ],
+        "annotations": [],
+    },
+    (TicketViewSet, "create", ""): {
+        "select_related": [],
+        "prefetch_related": {},
+        "only": ["flight", "id", "row", "seat"],
+        "annotations": [],
+    },
+}
+
+
+class QueryPlanTests(SimpleTestCase):
+    def test_plan_of_every_action(self):
+        factory = APIRequestFactory()
+        for (viewset, action, query), expected in PLANS.items():
+            with self.subTest(viewset=viewset.__name__, action=action):
+                view = viewset(
+                    action=action,
+                    request=Request(factory.get(f"/?{query}")),
+                    format_kwarg=None,
+                )
+
+                self.assertEqual(view.get_query_plan().describe(), expected)
+
+    def test_every_action_has_plan(self):
+        actions = {(viewset, action) for viewset, action, _ in PLANS}
+        for viewset in (
+            AirplaneViewSet,
+            FlightViewSet,
+            OrderViewSet,
+            RouteViewSet,
+            TicketViewSet,
+        ):
+            for action in viewset.get_extra_actions() + [
+                viewset.list,
+                getattr(viewset, "retrieve", None),
+                getattr(viewset, "create", None),
+            ]:
+                if action is not None:
+                    self.assertIn((viewset, action.__name__), actions)
+
+
+class PlannedQuerysetTests(TestCase):
+    """Planned querysets don't load deferred columns row by row"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.flight.crews.add(sample_crew())
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+
+    def test_no_deferred_loads(self):
+        for url in (
+            reverse("airport:flight-list"),
+            reverse("airport:flight-list") + "?fields=id",
+            reverse("airport:flight-list") + "?stream=true",
+            detail_url(self.flight.id),
+            detail_url(self.flight.id) + "?seat_map=compact",
+            reverse("airport:async-flight-list"),
+            reverse("airport:order-list"),
+            reverse("airport:route-list"),
+            reverse("airport:route-detail", args=[self.flight.route_id]),
+            reverse("airport:airplane-list"),
+            reverse("airport:airplane-detail", args=[self.flight.airplane_id]),
+        ):
+            with self.subTest(url=url), mock.patch.object(
+                Model,
+                "refresh_from_db",
+                autospec=True,
+                side_effect=Model.refresh_from_db,
+            ) as refresh_from_db:
+                res = self.client.get(url)
+                if res.streaming:
+                    b"".join(res.streaming_content)
+
+                self.assertEqual(res.status_code, 200)
+                refresh_from_db.assert_not_called()
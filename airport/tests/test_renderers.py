@@ -0,0 +1,78 @@
+import io
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from airport.parsers import ORJSONParser
+from airport.renderers import ORJSONRenderer
+
+PAYLOAD = {
+    "departure_time": datetime(
+        2024, 6, 13, 21, 53, 16, 123456, tzinfo=timezone.utc
+    ),
+    "date": datetime(2024, 6, 13).date(),
+    "price": Decimal("12.50"),
+    "id": uuid.UUID("12345678123456781234567812345678"),
+    "detail": gettext_lazy("Not found."),
+    "image": "http://testserver/media/uploads/airplanes/ann.jpg",
+    "city": "Львів\u2028",
+    7: [1, 2.5, None, True],
+}
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_same_output_as_json_renderer(self):
+        self.assertEqual(
+            ORJSONRenderer().render(PAYLOAD),
+            JSONRenderer().render(PAYLOAD),
+        )
+
+    def test_indent_falls_back_to_json_renderer(self):
+        media_type = "application/json; indent=4"
+
+        self.assertEqual(
+            ORJSONRenderer().render(PAYLOAD, media_type),
+            JSONRenderer().render(PAYLOAD, media_type),
+        )
+
+    def test_without_orjson(self):
+        with mock.patch("airport.renderers.orjson", None):
+            rendered = ORJSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(rendered, JSONRenderer().render(PAYLOAD))
+
+    def test_none(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class ORJSONParserTests(SimpleTestCase):
+    body = '{"tickets": [{"row": 1, "seat": 2}], "city": "Львів"}'
+
+    def parse(self, parser, body, encoding="utf-8"):
+        return parser.parse(
+            io.BytesIO(body.encode(encoding)),
+            parser_context={"encoding": encoding},
+        )
+
+    def test_same_data_as_json_parser(self):
+        self.assertEqual(
+            self.parse(ORJSONParser(), self.body),
+            self.parse(JSONParser(), self.body),
+        )
+
+    def test_other_encoding(self):
+        self.assertEqual(
+            self.parse(ORJSONParser(), self.body, "utf-16"),
+            self.parse(JSONParser(), self.body),
+        )
+
+    def test_invalid_json(self):
+        with self.assertRaises(ParseError):
+            self.parse(ORJSONParser(), '{"row": ')
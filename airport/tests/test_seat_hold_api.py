@@ -0,0 +1,126 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, SeatHold
+from airport.tests.test_airport_api import sample_flight
+
+HOLD_URL = reverse("airport:seathold-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+def confirm_url(hold_id):
+    return reverse("airport:seathold-confirm", args=[hold_id])
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def hold(self, *seats, **params):
+        payload = {
+            "flight": self.flight.id,
+            "seats": [{"row": row, "seat": seat} for row, seat in seats],
+            **params,
+        }
+        return self.client.post(HOLD_URL, payload, format="json")
+
+    def order(self, *seats):
+        payload = {
+            "tickets": [
+                {"row": row, "seat": seat, "flight": self.flight.id}
+                for row, seat in seats
+            ]
+        }
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def test_hold_seats(self):
+        res = self.hold((1, 1), (1, 2), ttl=60)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        hold = SeatHold.objects.get(id=res.data["id"])
+        self.assertAlmostEqual(
+            hold.expires_at,
+            timezone.now() + timedelta(seconds=60),
+            delta=timedelta(seconds=5),
+        )
+
+    def test_held_seats_are_not_available_to_others(self):
+        self.hold((1, 1))
+        self.client.force_authenticate(self.other)
+
+        self.assertEqual(
+            self.hold((1, 1)).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        res = self.order((1, 1))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["tickets"][0]["seat"], ["seat 1 in row 1 is on hold"]
+        )
+        self.assertEqual(
+            self.order((1, 2)).status_code, status.HTTP_201_CREATED
+        )
+
+    def test_confirm_hold_creates_order(self):
+        hold_id = self.hold((2, 1), (2, 2)).data["id"]
+
+        res = self.client.post(confirm_url(hold_id))
+        self.flight.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 2)
+        self.assertEqual(self.flight.tickets_sold, 2)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_expired_hold_releases_seats(self):
+        hold_id = self.hold((1, 1)).data["id"]
+        SeatHold.objects.filter(id=hold_id).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(
+            self.client.post(confirm_url(hold_id)).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.client.force_authenticate(self.other)
+        self.assertEqual(
+            self.order((1, 1)).status_code, status.HTTP_201_CREATED
+        )
+
+        call_command("expire_seat_holds", stdout=StringIO())
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_cannot_hold_sold_seat(self):
+        self.order((3, 3))
+
+        res = self.hold((3, 3))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_holds_are_hidden(self):
+        hold_id = self.hold((1, 1)).data["id"]
+        self.client.force_authenticate(self.other)
+
+        res = self.client.delete(
+            reverse("airport:seathold-detail", args=[hold_id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Order.objects.count(), 0)
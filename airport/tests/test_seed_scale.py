@@ -0,0 +1,115 @@
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from airport.models import Airport, Flight, Order, Route, Ticket
+
+OPTIONS = {
+    "airports": 5,
+    "routes": 8,
+    "airplanes": 3,
+    "crews": 6,
+    "users": 4,
+    "flights": 12,
+    "tickets": 500,
+    "start": date(2024, 6, 1),
+    "batch_size": 100,
+}
+
+
+def seed(**options):
+    call_command("seed_scale", stdout=StringIO(), **{**OPTIONS, **options})
+
+
+def dataset():
+    """Seeded rows without their ids"""
+    return {
+        "routes": list(
+            Route.objects.order_by("id").values_list(
+                "source__name", "destination__name", "distance"
+            )
+        ),
+        "flights": list(
+            Flight.objects.order_by("id").values_list(
+                "route__source__name",
+                "airplane__name",
+                "departure_time",
+                "arrival_time",
+                "tickets_sold",
+                "seat_map",
+            )
+        ),
+        "tickets": list(
+            Ticket.objects.order_by("id").values_list(
+                "order__user__email", "row", "seat"
+            )
+        ),
+    }
+
+
+class SeedScaleTests(TestCase):
+    def test_seed_dataset(self):
+        seed()
+
+        self.assertEqual(Airport.objects.count(), 5)
+        self.assertEqual(Route.objects.count(), 8)
+        self.assertEqual(Flight.objects.count(), 12)
+        self.assertEqual(Ticket.objects.count(), 500)
+        self.assertEqual(
+            Order.objects.values("user").distinct().count(),
+            get_user_model().objects.count(),
+        )
+        self.assertFalse(Flight.objects.filter(crews=None).exists())
+        call_command("rebuild_flight_inventory", check=True, stdout=StringIO())
+
+    def test_same_seed_same_dataset(self):
+        seed()
+        first = dataset()
+        for model in (Flight, Route, Airport, get_user_model()):
+            model.objects.all().delete()
+
+        seed(batch_size=7)
+
+        self.assertEqual(dataset(), first)
+
+    def test_start(self):
+        options = {**OPTIONS, "flights": 1, "days": 1}
+        del options["start"]
+        call_command("seed_scale", stdout=StringIO(), **options)
+        call_command(
+            "seed_scale",
+            "--start=today+7",
+            stdout=StringIO(),
+            **{**options, "seed": 7},
+        )
+
+        self.assertEqual(
+            [
+                flight.departure_time.date()
+                for flight in Flight.objects.order_by("id")
+            ],
+            [
+                date(2030, 1, 1),
+                datetime.now(timezone.utc).date() + timedelta(days=7),
+            ],
+        )
+
+    def test_tickets_limited_by_places(self):
+        seed(flights=1, tickets=10_000)
+
+        flight = Flight.objects.select_related("airplane").get()
+        self.assertEqual(flight.tickets_sold, flight.airplane.all_places)
+        self.assertEqual(Ticket.objects.count(), flight.airplane.all_places)
+
+    def test_seed_used_twice(self):
+        seed()
+
+        with self.assertRaises(CommandError):
+            seed()
+
+    def test_too_many_routes(self):
+        with self.assertRaises(CommandError):
+            seed(airports=3, routes=7)
@@ -0,0 +1,121 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, Ticket
+from airport.tests.test_airport_api import (
+    detail_url,
+    sample_crew,
+    sample_flight,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.flight.crews.add(sample_crew())
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        return res, [query["sql"] for query in queries]
+
+    def test_fields_of_flight_list(self):
+        res, queries = self.get(
+            FLIGHT_URL, {"fields": "id,departure_time,tickets_available"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(res.data["results"][0]),
+            ["id", "departure_time", "tickets_available"],
+        )
+        self.assertEqual(res.data["results"][0]["tickets_available"], 100)
+        self.assertFalse(any("airport_flight_crews" in sql for sql in queries))
+        self.assertFalse(any("airport_route" in sql for sql in queries))
+
+    def test_omit_of_flight_list(self):
+        res, queries = self.get(FLIGHT_URL, {"omit": "crews,route_info"})
+
+        self.assertEqual(
+            list(res.data["results"][0]),
+            [
+                "id",
+                "airplane_name",
+                "departure_time",
+                "arrival_time",
+                "all_tickets",
+                "tickets_available",
+            ],
+        )
+        self.assertFalse(any("airport_flight_crews" in sql for sql in queries))
+
+    def test_unknown_field(self):
+        res = self.client.get(FLIGHT_URL, {"fields": "id,price"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("price", str(res.data["fields"]))
+
+    def test_fields_of_flight_detail_keep_nested_whole(self):
+        res, queries = self.get(
+            detail_url(self.flight.id), {"fields": "id,route"}
+        )
+
+        self.assertEqual(list(res.data), ["id", "route"])
+        self.assertEqual(
+            list(res.data["route"]),
+            ["id", "source", "destination", "distance"],
+        )
+        self.assertFalse(any("airport_crew" in sql for sql in queries))
+
+    def test_stream_and_async_list(self):
+        params = {"fields": "id,crews"}
+        streamed = self.client.get(FLIGHT_URL, {**params, "stream": "true"})
+        async_list = self.client.get(
+            reverse("airport:async-flight-list"), params
+        )
+
+        self.assertEqual(
+            json.loads(b"".join(streamed.streaming_content)),
+            [{"id": self.flight.id, "crews": ["John Jones"]}],
+        )
+        self.assertEqual(
+            async_list.json()["results"],
+            [{"id": self.flight.id, "crews": ["John Jones"]}],
+        )
+
+    def test_order_list_without_tickets(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+
+        res, queries = self.get(ORDER_URL, {"fields": "id,created_at"})
+
+        self.assertEqual(list(res.data["results"][0]), ["id", "created_at"])
+        self.assertFalse(any("airport_ticket" in sql for sql in queries))
+
+    def test_writes_are_not_pruned(self):
+        res = self.client.post(
+            f"{ORDER_URL}?fields=id",
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn("tickets", res.data)
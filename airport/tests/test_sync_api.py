@@ -0,0 +1,182 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airport, Flight, Tombstone
+from airport.sync import encode_cursor
+from airport.views import AirportViewSet
+from airport.tests.test_airport_api import (
+    sample_airport,
+    sample_crew,
+    sample_flight,
+)
+
+AIRPORT_CHANGES_URL = reverse("airport:airport-changes")
+FLIGHT_CHANGES_URL = reverse("airport:flight-changes")
+ROUTE_CHANGES_URL = reverse("airport:route-changes")
+
+
+@override_settings(SYNC_CURSOR_LAG=timedelta(0))
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+    def ids(self, res):
+        return [row["id"] for row in res.data["changed"]]
+
+    def test_first_sync_returns_all_rows(self):
+        airports = [sample_airport(name=f"Airport {i}") for i in range(3)]
+
+        res = self.client.get(AIRPORT_CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ids(res), [airport.id for airport in airports])
+        self.assertEqual(res.data["deleted"], [])
+        self.assertFalse(res.data["has_more"])
+
+    def test_only_changes_after_cursor(self):
+        first = sample_airport(name="First")
+        second = sample_airport(name="Second")
+        cursor = self.client.get(AIRPORT_CHANGES_URL).data["cursor"]
+
+        first.name = "Renamed"
+        first.save()
+        second_id = second.id
+        second.delete()
+        third = sample_airport(name="Third")
+        res = self.client.get(AIRPORT_CHANGES_URL, {"changed_since": cursor})
+
+        self.assertEqual(self.ids(res), [first.id, third.id])
+        self.assertEqual(res.data["deleted"], [second_id])
+
+        res = self.client.get(
+            AIRPORT_CHANGES_URL, {"changed_since": res.data["cursor"]}
+        )
+        self.assertEqual(self.ids(res), [])
+        self.assertEqual(res.data["deleted"], [])
+
+    def test_pages_with_equal_timestamps(self):
+        airports = [sample_airport(name=f"Airport {i}") for i in range(5)]
+        Airport.objects.update(updated_at=timezone.now())
+
+        seen, params = [], {}
+        with mock.patch.object(AirportViewSet, "sync_page_size", 2):
+            while True:
+                res = self.client.get(AIRPORT_CHANGES_URL, params)
+                seen += self.ids(res)
+                params = {"changed_since": res.data["cursor"]}
+                if not res.data["has_more"]:
+                    break
+
+        self.assertEqual(seen, [airport.id for airport in airports])
+
+    def test_crews_change_flights(self):
+        flight = sample_flight()
+        cursor = self.client.get(FLIGHT_CHANGES_URL).data["cursor"]
+
+        flight.crews.add(sample_crew())
+        res = self.client.get(FLIGHT_CHANGES_URL, {"changed_since": cursor})
+
+        self.assertEqual(self.ids(res), [flight.id])
+        self.assertEqual(res.data["changed"][0]["crews"], ["John Jones"])
+        self.assertEqual(res.data["changed"][0]["tickets_available"], 100)
+
+    def test_renamed_references_change_routes_and_flights(self):
+        flight = sample_flight()
+        routes_cursor = self.client.get(ROUTE_CHANGES_URL).data["cursor"]
+        flights_cursor = self.client.get(FLIGHT_CHANGES_URL).data["cursor"]
+
+        flight.route.source.name = "Renamed"
+        flight.route.source.save()
+        routes = self.client.get(
+            ROUTE_CHANGES_URL, {"changed_since": routes_cursor}
+        )
+        flights = self.client.get(
+            FLIGHT_CHANGES_URL, {"changed_since": flights_cursor}
+        )
+
+        self.assertEqual(self.ids(routes), [flight.route_id])
+        self.assertEqual(self.ids(flights), [flight.id])
+        self.assertIn("Renamed", flights.data["changed"][0]["route_info"])
+
+        flights_cursor = flights.data["cursor"]
+        flight.airplane.name = "Renamed"
+        flight.airplane.save()
+        flights = self.client.get(
+            FLIGHT_CHANGES_URL, {"changed_since": flights_cursor}
+        )
+
+        self.assertEqual(
+            flights.data["changed"][0]["airplane_name"], "Renamed"
+        )
+
+    def test_cascade_deletion_leaves_tombstones(self):
+        flight = sample_flight()
+
+        flight.route.delete()
+
+        self.assertTrue(
+            Tombstone.objects.filter(
+                model="airport.flight", object_id=flight.id
+            ).exists()
+        )
+        self.assertFalse(Flight.objects.exists())
+
+    def test_cursor_older_than_tombstones(self):
+        since = timezone.now() - timedelta(days=60)
+
+        res = self.client.get(
+            AIRPORT_CHANGES_URL, {"changed_since": encode_cursor(since)}
+        )
+        invalid = self.client.get(
+            AIRPORT_CHANGES_URL, {"changed_since": "yesterday"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_paging_cursor_older_than_tombstones(self):
+        airport = sample_airport()
+        since = timezone.now() - timedelta(days=60)
+
+        res = self.client.get(
+            AIRPORT_CHANGES_URL,
+            {"changed_since": encode_cursor(since, airport.id, since)},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+    def test_first_sync_pages_through_old_rows(self):
+        airports = [sample_airport(name=f"Airport {i}") for i in range(3)]
+        Airport.objects.update(updated_at=timezone.now() - timedelta(days=60))
+
+        with mock.patch.object(AirportViewSet, "sync_page_size", 2):
+            first = self.client.get(AIRPORT_CHANGES_URL)
+            second = self.client.get(
+                AIRPORT_CHANGES_URL, {"changed_since": first.data["cursor"]}
+            )
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.ids(first) + self.ids(second),
+            [airport.id for airport in airports],
+        )
+
+    @override_settings(SYNC_CURSOR_LAG=timedelta(minutes=1))
+    def test_recent_changes_wait_for_lag(self):
+        sample_airport()
+
+        res = self.client.get(AIRPORT_CHANGES_URL)
+
+        self.assertEqual(self.ids(res), [])
@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.request import Request
+
+from airport.throttling import UserSlidingWindowThrottle
+
+
+class ThreePerMinuteThrottle(UserSlidingWindowThrottle):
+    rate = "3/min"
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.now = 600.0
+
+    def check(self, user=None):
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user or self.user)
+        request = Request(request)
+
+        throttle = ThreePerMinuteThrottle()
+        with mock.patch.object(throttle, "timer", return_value=self.now):
+            return throttle.allow_request(request, None), throttle
+
+    def test_limit_in_window(self):
+        results = [self.check()[0] for _ in range(4)]
+
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(3):
+            self.check()
+
+        # a quarter of the next window: 3 * 0.75 = 2.25 still counted
+        self.now += 75
+        self.assertTrue(self.check()[0])
+        self.assertFalse(self.check()[0])
+
+        # two thirds: 3 * 1/3 = 1 counted plus 1 in this window
+        self.now += 25
+        self.assertTrue(self.check()[0])
+        self.assertFalse(self.check()[0])
+
+    def test_wait(self):
+        for _ in range(3):
+            self.check()
+
+        allowed, throttle = self.check()
+
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 60)
+
+    def test_zero_rate(self):
+        with mock.patch.object(ThreePerMinuteThrottle, "rate", "0/min"):
+            allowed, throttle = self.check()
+
+        self.assertFalse(allowed)
+        self.assertIsNone(throttle.wait())
+
+    def test_counters_are_per_user(self):
+        other = get_user_model().objects.create_user(
+            "other@test.com",
+            "testpass",
+        )
+        for _ in range(3):
+            self.check()
+
+        self.assertTrue(self.check(other)[0])
+
+    def test_counters_are_integers_in_cache(self):
+        self.check()
+        self.check()
+
+        throttle = self.check()[1]
+
+        self.assertEqual(cache.get(f"{throttle.key}:10"), 3)
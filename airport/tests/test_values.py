@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from airport.models import Airplane, Route
+from airport.serializers import (
+    AirplaneListSerializer,
+    FlightListSerializer,
+    RouteListSerializer,
+)
+from airport.tests.test_airport_api import (
+    sample_airplane,
+    sample_airport,
+    sample_crew,
+    sample_flight,
+    sample_route,
+)
+from airport.views import AirplaneViewSet, FlightViewSet, RouteViewSet
+
+
+class ValuesSerializationTests(TestCase):
+    def setUp(self):
+        self.context = {"request": Request(APIRequestFactory().get("/"))}
+        kyiv = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        route = sample_route(destination=kyiv)
+        for hour, crews in ((8, 2), (6, 0), (6, 1)):
+            flight = sample_flight(
+                route=route,
+                departure_time=f"2024-06-13T{hour:02}:00:00Z",
+                arrival_time=f"2024-06-13T{hour + 2:02}:30:00.500Z",
+            )
+            flight.crews.add(
+                *(sample_crew(first_name=f"C{i}") for i in range(crews))
+            )
+        sample_airplane(image="uploads/airplanes/ann.jpg")
+
+    def assertSameJson(self, serializer_class, queryset):
+        rows = list(serializer_class.values_queryset(queryset))
+        expected = serializer_class(
+            queryset, many=True, context=self.context
+        ).data
+
+        self.assertEqual(
+            JSONRenderer().render(
+                serializer_class.values_representation(rows, self.context)
+            ),
+            JSONRenderer().render(expected),
+        )
+
+    def test_flight_list(self):
+        self.assertSameJson(
+            FlightListSerializer, FlightViewSet.flight_queryset("list", {})
+        )
+
+    def test_route_list(self):
+        self.assertSameJson(
+            RouteListSerializer, RouteViewSet.queryset.order_by("id")
+        )
+
+    def test_airplane_list_with_and_without_image(self):
+        self.assertSameJson(
+            AirplaneListSerializer, AirplaneViewSet.queryset.order_by("id")
+        )
+
+    def test_list_endpoints_use_values(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+
+        flights = client.get(reverse("airport:flight-list")).data["results"]
+        routes = client.get(reverse("airport:route-list")).data
+        airplanes = client.get(reverse("airport:airplane-list")).data
+
+        self.assertEqual(
+            [flight["crews"] for flight in flights],
+            [[], ["C0 Jones"], ["C0 Jones", "C1 Jones"]],
+        )
+        self.assertEqual(
+            sorted(route["destination"] for route in routes),
+            sorted(route.destination.name for route in Route.objects.all()),
+        )
+        self.assertEqual(
+            airplanes[-1]["image"],
+            "http://testserver"
+            + Airplane.objects.order_by("id").last().image.url,
+        )
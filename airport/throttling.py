@@ -0,0 +1,95 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import throttling
+from rest_framework.settings import api_settings
+
+from airport.metrics import metrics
+
+
+class SlidingWindowRateThrottle(throttling.SimpleRateThrottle):
+    """
+    Sliding window counter instead of the history of request timestamps.
+    Keeps one integer per fixed window in the cache and estimates the
+    sliding window as the current count plus the previous one weighted by
+    its part still inside the window, so every check is O(1) and the
+    counters are shared by all workers through the cache backend.
+    """
+
+    def get_rate(self):
+        # current settings instead of the ones at import time,
+        # so overridden rates apply (`None` turns a scope off)
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f"No default throttle rate set for '{self.scope}' scope"
+            )
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = f"{self.key}:{window}"
+        previous_key = f"{self.key}:{window - 1}"
+        counts = self.cache.get_many([current_key, previous_key])
+        self.current = counts.get(current_key, 0)
+        self.previous = counts.get(previous_key, 0)
+        self.elapsed = self.now - window * self.duration
+
+        if self.estimate(self.elapsed) >= self.num_requests:
+            return self.throttle_failure()
+
+        self.increment(current_key)
+        return self.throttle_success()
+
+    def estimate(self, elapsed):
+        weight = 1 - elapsed / self.duration
+        return self.previous * weight + self.current
+
+    def increment(self, key):
+        # two windows, the current one is still needed as the previous
+        if self.cache.add(key, 1, timeout=self.duration * 2):
+            return
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # expired between `add` and `incr`
+            self.cache.set(key, 1, timeout=self.duration * 2)
+
+    def throttle_success(self):
+        return True
+
+    def throttle_failure(self):
+        metrics.inc("throttled_requests_total", (("scope", self.scope),))
+        return super().throttle_failure()
+
+    def wait(self):
+        """Seconds until the estimate drops below the limit"""
+        if not self.num_requests:
+            # a zero rate never allows a request
+            return None
+        rest = self.duration - self.elapsed
+        if self.current < self.num_requests:
+            # the previous window slides out during the current one
+            share = (self.num_requests - self.current) / self.previous
+            return max(0.0, self.duration * (1 - share) - self.elapsed)
+        # the current window becomes the previous one first
+        share = self.num_requests / self.current
+        return rest + self.duration * (1 - share)
+
+
+class AnonSlidingWindowThrottle(
+    SlidingWindowRateThrottle, throttling.AnonRateThrottle
+):
+    pass
+
+
+class UserSlidingWindowThrottle(
+    SlidingWindowRateThrottle, throttling.UserRateThrottle
+):
+    pass
@@ -1,5 +1,11 @@
+from django.urls import path
 from rest_framework import routers
 
+from airport.async_views import (
+    AsyncFlightListView,
+    AsyncFlightDetailView,
+    AsyncItineraryView,
+)
 from airport.views import (
     AirplaneTypeViewSet,
     AirportViewSet,
@@ -9,6 +15,8 @@ from airport.views import (
     RouteViewSet,
     FlightViewSet,
     TicketViewSet,
+    ItineraryViewSet,
+    SeatHoldViewSet,
 )
 
 app_name = "airport"
@@ -21,6 +29,24 @@ router.register("orders", OrderViewSet)
 router.register("airplanes", AirplaneViewSet)
 router.register("routes", RouteViewSet)
 router.register("flights", FlightViewSet)
+router.register("itineraries", ItineraryViewSet, basename="itinerary")
+router.register("seat_holds", SeatHoldViewSet)
 
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path(
+        "async/flights/",
+        AsyncFlightListView.as_view(),
+        name="async-flight-list",
+    ),
+    path(
+        "async/flights/<int:pk>/",
+        AsyncFlightDetailView.as_view(),
+        name="async-flight-detail",
+    ),
+    path(
+        "async/itineraries/",
+        AsyncItineraryView.as_view(),
+        name="async-itinerary-list",
+    ),
+]
@@ -0,0 +1,83 @@
+from operator import itemgetter
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from airport.metrics import timed_serialization
+
+
+class ValuesSerializerMixin:
+    """
+    Serialization of `values()` rows with the same output as the fields.
+    `Meta.values_columns` maps every field to the columns it's made of,
+    `values_getters` returns functions of a row for fields which aren't
+    just their only column.
+    """
+
+    @classmethod
+    def values_queryset(cls, queryset, fields=None, extra=()):
+        """`values()` rows of `fields` plus `extra` columns"""
+        fields = cls.Meta.fields if fields is None else fields
+        columns = [
+            *extra,
+            *(
+                column
+                for name in fields
+                for column in cls.Meta.values_columns[name]
+            ),
+        ]
+        return queryset.prefetch_related(None).values(*dict.fromkeys(columns))
+
+    @classmethod
+    @timed_serialization
+    def values_representation(cls, rows, context, fields=None):
+        """Same data as `.data` of `rows` from `values_queryset`"""
+        fields = cls.Meta.fields if fields is None else fields
+        custom = cls.values_getters(rows, context, fields)
+        getters = [
+            (
+                name,
+                custom.get(name)
+                or itemgetter(cls.Meta.values_columns[name][0]),
+            )
+            for name in fields
+        ]
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+    @classmethod
+    def values_getters(cls, rows, context, fields):
+        return {}
+
+
+class ValuesListMixin:
+    """
+    `list` from `values()` rows instead of model instances.
+    The list serializer turns the filtered queryset into rows with
+    `values_queryset` and rows into data with `values_representation`,
+    which gives the same output as its fields without building
+    related instances and walking DRF fields for every row.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        fields = None
+        if request.method in SAFE_METHODS:
+            fields = serializer_class.requested_fields(request.query_params)
+        context = self.get_serializer_context()
+        # keyset paginators read their position from the rows
+        queryset = serializer_class.values_queryset(
+            self.filter_queryset(self.get_queryset()),
+            fields,
+            extra=getattr(self.paginator, "ordering", ()),
+        )
+
+        rows = self.paginate_queryset(queryset)
+        if rows is not None:
+            return self.get_paginated_response(
+                serializer_class.values_representation(rows, context, fields)
+            )
+        return Response(
+            serializer_class.values_representation(
+                list(queryset), context, fields
+            )
+        )
@@ -1,16 +1,25 @@
-from datetime import datetime
-
-from django.db.models import Count
-from django.db.models import F
+import hashlib
+import json
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import mixins, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.viewsets import GenericViewSet
 
+from airport.conditional import ConditionalGetMixin
+from airport.itineraries import flight_index
 from airport.models import (
     AirplaneType,
     Airport,
@@ -20,7 +29,13 @@ from airport.models import (
     Route,
     Flight,
     Ticket,
+    SeatHold,
+    IdempotencyKey,
 )
+from airport.pagination import OrderPagination, FlightCursorPagination
+from airport.query_plan import QueryPlanMixin
+from airport.renderers import json_renderer
+from airport.response_cache import flight_response_cache
 from airport.serializers import (
     AirplaneTypeSerializer,
     AirportSerializer,
@@ -34,54 +49,145 @@ from airport.serializers import (
     RouteDetailSerializer,
     FlightListSerializer,
     FlightDetailSerializer,
+    FlightSeatMapSerializer,
     TicketListSerializer,
     TicketDetailSerializer,
     AirplaneListSerializer,
     OrderListSerializer,
     AirplaneImageSerializer,
     AirplaneDetailSerializer,
+    ItinerarySerializer,
+    SeatHoldSerializer,
 )
+from airport.sync import DeltaSyncMixin
+from airport.values import ValuesListMixin
+
+
+def parse_moment(param, value, tz, date_only=False):
+    """
+    Parse date or datetime query param into aware datetime.
+    Date means start of that day in `tz`, naive datetime is taken in `tz`.
+    """
+    try:
+        moment = None if date_only else parse_datetime(value)
+        day = None if moment else parse_date(value)
+    except ValueError:
+        moment = day = None
+
+    if day:
+        moment = datetime.combine(day, time.min)
+    if moment is None:
+        expected = "YYYY-MM-DD" if date_only else "YYYY-MM-DD[THH:MM[:SS]]"
+        raise ValidationError({param: f"Expected {expected}, got {value}"})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, tz)
+    return moment
+
+
+def filter_timezone(params):
+    """Time zone of day boundaries in date filters (ex. ?tz=Europe/Kyiv)"""
+    name = params.get("tz")
+    if not name:
+        return timezone.get_current_timezone()
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError({"tz": f"Unknown time zone: {name}"})
+
+
+def next_day(moment, tz):
+    """Start of the day after `moment` in `tz`, correct across DST shifts"""
+    day = timezone.localtime(moment, tz).date() + timedelta(days=1)
+    return timezone.make_aware(datetime.combine(day, time.min), tz)
+
+
+def airport_lookup(field, value):
+    """Route lookup by airport id or by (case-insensitive) closest city"""
+    if value.isdigit():
+        return {f"{field}_id": int(value)}
+    return {f"{field}__closest_big_city__iexact": value}
+
+
+def int_param(params, name, default, minimum, maximum):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        value = None
+    if value is None or not minimum <= value <= maximum:
+        raise ValidationError(
+            {name: f"Expected integer in range ({minimum}, {maximum})"}
+        )
+    return value
+
+
+def resolve_airports(param, value):
+    """Airport ids by airport id or (case-insensitive) closest city"""
+    if value.isdigit():
+        return {int(value)}
+    airports = set(
+        Airport.objects.filter(closest_big_city__iexact=value).values_list(
+            "id", flat=True
+        )
+    )
+    if not airports:
+        raise ValidationError({param: f"No airports in {value}"})
+    return airports
 
 
 class AirplaneTypeViewSet(
-    mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet
+    ConditionalGetMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
 ):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
+    query_budgets = {"list": 1, "create": 1}
+    version_models = (AirplaneType,)
 
 
 class AirportViewSet(
-    mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet
+    DeltaSyncMixin,
+    ConditionalGetMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
 ):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
+    query_budgets = {"list": 1, "create": 1, "changes": 1}
+    version_models = (Airport,)
 
 
 class CrewViewSet(
-    mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet
+    ConditionalGetMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
 ):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
-
-
-class OrderPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "page_size"
-    max_page_size = 100
+    query_budgets = {"list": 1, "create": 1}
+    version_models = (Crew,)
 
 
 class OrderViewSet(
-    mixins.CreateModelMixin, mixins.ListModelMixin, GenericViewSet
+    QueryPlanMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
 ):
-    queryset = Order.objects.prefetch_related(
-        "tickets__flight__route", "tickets__flight__airplane"
-    )
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    query_budgets = {"list": 3, "create": 11}
     permission_classes = (IsAuthenticated,)
     pagination_class = OrderPagination
 
     def get_queryset(self):
-        return self.queryset.filter(user_id=self.request.user)
+        return super().get_queryset().filter(user_id=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -92,15 +198,108 @@ class OrderViewSet(
 
         return self.serializer_class
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "Idempotency-Key",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description="Retries with the same key return the first "
+                "result instead of creating another order",
+            ),
+        ]
+    )
+    def create(self, request, *args, **kwargs):
+        """Create order, optionally idempotent by `Idempotency-Key`"""
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > 255:
+            raise ValidationError(
+                {"Idempotency-Key": "Ensure it has no more than 255 chars"}
+            )
+
+        request_hash = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, cls=JSONEncoder).encode()
+        ).hexdigest()
+        expired = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+        keys = IdempotencyKey.objects.filter(
+            user=request.user, created_at__gt=expired
+        )
+
+        stored = keys.filter(key=key).first()
+        if stored:
+            return self.replay(stored, request_hash)
+
+        IdempotencyKey.objects.filter(created_at__lte=expired).delete()
+        # reserved and committed before the order, so a retry arriving
+        # while this request is still in progress finds the key
+        for _ in range(2):
+            try:
+                with transaction.atomic():
+                    reserved = IdempotencyKey.objects.create(
+                        user=request.user, key=key, request_hash=request_hash
+                    )
+                break
+            except IntegrityError:
+                # concurrent retry with the same key reserved it first
+                stored = keys.filter(key=key).first()
+                if stored:
+                    return self.replay(stored, request_hash)
+                # and released it since, the key is free again
+        else:
+            return self.in_progress()
+
+        try:
+            with transaction.atomic():
+                response = super().create(request, *args, **kwargs)
+                reserved.status_code = response.status_code
+                reserved.response = json.loads(
+                    json.dumps(response.data, cls=JSONEncoder)
+                )
+                reserved.save(update_fields=["status_code", "response"])
+        except Exception:
+            # failed requests may be retried
+            reserved.delete()
+            raise
+        return response
+
+    @staticmethod
+    def replay(stored, request_hash):
+        if stored.request_hash != request_hash:
+            return Response(
+                {"detail": "Idempotency-Key was used with another request"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if stored.status_code is None:
+            return OrderViewSet.in_progress()
+        return Response(
+            stored.response,
+            status=stored.status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    @staticmethod
+    def in_progress():
+        return Response(
+            {"detail": "Request with this Idempotency-Key is in progress"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
 
 class AirplaneViewSet(
+    ConditionalGetMixin,
+    ValuesListMixin,
+    QueryPlanMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
-    queryset = Airplane.objects.select_related()
+    queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
+    query_budgets = {"list": 1, "retrieve": 1, "create": 2, "upload_image": 4}
+    version_models = (Airplane, AirplaneType)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -114,6 +313,11 @@ class AirplaneViewSet(
 
         return self.serializer_class
 
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
     @action(
         methods=["POST"],
         detail=True,
@@ -131,16 +335,24 @@ class AirplaneViewSet(
 
 
 class RouteViewSet(
+    DeltaSyncMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
+    QueryPlanMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
-    queryset = Route.objects.select_related()
+    queryset = Route.objects.all()
     serializer_class = RouteSerializer
+    query_budgets = {"list": 1, "retrieve": 1, "create": 3, "changes": 1}
+    version_models = (Route, Airport)
+    # cursor of `changes`
+    plan_columns = ("updated_at",)
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "changes"):
             return RouteListSerializer
 
         if self.action == "retrieve":
@@ -148,53 +360,146 @@ class RouteViewSet(
 
         return self.serializer_class
 
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
 
 class FlightViewSet(
+    DeltaSyncMixin,
+    ValuesListMixin,
+    QueryPlanMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
-    queryset = Flight.objects.select_related().prefetch_related("crews")
+    queryset = Flight.objects.all()
     serializer_class = FlightSerializer
+    query_budgets = {"list": 2, "retrieve": 2, "create": 11, "changes": 2}
+    pagination_class = FlightCursorPagination
+    stream_chunk_size = 500
+    # cursors of pages and `changes`
+    plan_columns = ("departure_time", "updated_at")
 
     def get_serializer_class(self):
-        if self.action == "list":
+        return self.flight_serializer_class(
+            self.action, self.request.query_params
+        )
+
+    @classmethod
+    def flight_serializer_class(cls, action, params):
+        if action in ("list", "changes"):
             return FlightListSerializer
 
-        if self.action == "retrieve":
+        if action == "retrieve":
+            if params.get("seat_map") == "compact":
+                return FlightSeatMapSerializer
             return FlightDetailSerializer
 
-        return self.serializer_class
+        return cls.serializer_class
 
     def get_queryset(self):
-        queryset = self.queryset
-        if self.action in "list":
-            queryset = queryset.annotate(
-                tickets_available=(
-                    F("airplane__rows") * F("airplane__seats_in_row")
-                    - Count("tickets")
+        return self.flight_queryset(self.action, self.request.query_params)
+
+    @classmethod
+    def flight_queryset(cls, action, params):
+        """
+        Filtered flights planned for the fields requested
+        from the action serializer, shared with the async views
+        """
+        queryset = cls.query_plan(
+            cls.flight_serializer_class(action, params),
+            params,
+            cls.plan_columns,
+        ).apply(cls.queryset)
+
+        departure_time = params.get("departure_time")
+        arrival_time = params.get("arrival_time")
+        departure_after = params.get("departure_after")
+        departure_before = params.get("departure_before")
+        airplane_name = params.get("airplane")
+        source = params.get("from")
+        destination = params.get("to")
+        tz = filter_timezone(params)
+
+        if source or destination:
+            routes = Route.objects.all()
+            if source:
+                routes = routes.filter(**airport_lookup("source", source))
+            if destination:
+                routes = routes.filter(
+                    **airport_lookup("destination", destination)
                 )
-            )
-
-        departure_time = self.request.query_params.get("departure_time")
-        arrival_time = self.request.query_params.get("arrival_time")
-        airplane_name = self.request.query_params.get("airplane")
+            queryset = queryset.filter(route__in=routes.values("id"))
 
+        # half-open ranges instead of `__date` keep the columns indexable
         if departure_time:
-            departure_time = datetime.strptime(
-                departure_time, "%Y-%m-%d"
-            ).date()
-            queryset = queryset.filter(departure_time__date=departure_time)
+            start = parse_moment("departure_time", departure_time, tz, True)
+            queryset = queryset.filter(
+                departure_time__gte=start,
+                departure_time__lt=next_day(start, tz),
+            )
 
         if arrival_time:
-            arrival_time = datetime.strptime(arrival_time, "%Y-%m-%d").date()
-            queryset = queryset.filter(arrival_time__date=arrival_time)
+            start = parse_moment("arrival_time", arrival_time, tz, True)
+            queryset = queryset.filter(
+                arrival_time__gte=start,
+                arrival_time__lt=next_day(start, tz),
+            )
+
+        if departure_after:
+            queryset = queryset.filter(
+                departure_time__gte=parse_moment(
+                    "departure_after", departure_after, tz
+                )
+            )
+
+        if departure_before:
+            queryset = queryset.filter(
+                departure_time__lt=parse_moment(
+                    "departure_before", departure_before, tz
+                )
+            )
 
         if airplane_name:
             queryset = queryset.filter(airplane__name__icontains=airplane_name)
 
-        return queryset.order_by("id")
+        return queryset.order_by("departure_time", "id")
+
+    def stream_list(self, queryset):
+        """
+        Yield JSON array of all flights chunk by chunk,
+        so memory doesn't grow with the size of the schedule
+        """
+        renderer = json_renderer()
+        separator = b""
+
+        yield b"["
+        for data in self.serialize_chunks(queryset):
+            # items of the rendered chunk without its brackets
+            yield separator + renderer.render(data)[1:-1]
+            separator = b","
+        yield b"]"
+
+    def serialize_chunks(self, queryset):
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        fields = serializer_class.requested_fields(self.request.query_params)
+        rows = serializer_class.values_queryset(queryset, fields)
+        chunk = []
+        for row in rows.iterator(chunk_size=self.stream_chunk_size):
+            chunk.append(row)
+            if len(chunk) == self.stream_chunk_size:
+                yield serializer_class.values_representation(
+                    chunk, context, fields
+                )
+                chunk = []
+        if chunk:
+            yield serializer_class.values_representation(
+                chunk, context, fields
+            )
 
     @extend_schema(
         parameters=[
@@ -210,20 +515,121 @@ class FlightViewSet(
                 description="Filter by arrival time "
                 "(ex. ?arrival_time=2024-06-25)",
             ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description="Flights departing at or after date/datetime "
+                "(ex. ?departure_after=2024-06-09T12:00)",
+            ),
+            OpenApiParameter(
+                "departure_before",
+                type=OpenApiTypes.DATETIME,
+                description="Flights departing before date/datetime "
+                "(ex. ?departure_before=2024-06-10)",
+            ),
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.STR,
+                description="Filter by source airport id or city "
+                "(ex. ?from=3 or ?from=Lviv)",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.STR,
+                description="Filter by destination airport id or city "
+                "(ex. ?to=7 or ?to=Kyiv)",
+            ),
+            OpenApiParameter(
+                "tz",
+                type=OpenApiTypes.STR,
+                description="Time zone of day boundaries in date filters, "
+                "UTC by default (ex. ?tz=Europe/Kyiv)",
+            ),
             OpenApiParameter(
                 "airplane",
                 type=OpenApiTypes.STR,
                 description="Filter by airplane name "
                 "(ex. ?airplane=Boeing 737)",
             ),
+            OpenApiParameter(
+                "stream",
+                type=OpenApiTypes.BOOL,
+                description="Stream all matching flights as one JSON array "
+                "without pagination (ex. ?stream=true)",
+            ),
+            OpenApiParameter(
+                "fields",
+                type=OpenApiTypes.STR,
+                description="Only these fields, comma separated "
+                "(ex. ?fields=id,departure_time,tickets_available)",
+            ),
+            OpenApiParameter(
+                "omit",
+                type=OpenApiTypes.STR,
+                description="All fields but these (ex. ?omit=crews)",
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         """Get list of all flights"""
-        return super().list(request, *args, **kwargs)
+        if request.query_params.get("stream") == "true":
+            queryset = self.filter_queryset(self.get_queryset())
+            return StreamingHttpResponse(
+                self.stream_list(queryset), content_type="application/json"
+            )
+        return self.cached_response(
+            lambda data: [flight["id"] for flight in data["results"]],
+            super().list,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "seat_map",
+                type=OpenApiTypes.STR,
+                enum=["compact"],
+                description="Replace `taken_places` with base64 seat "
+                "bitmap (ex. ?seat_map=compact)",
+            ),
+        ]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        """Get flight with its taken places"""
+        return self.cached_response(
+            lambda data: [data["id"]],
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def cached_response(self, flight_ids, view, request, *args, **kwargs):
+        """
+        Serve response data from `flight_response_cache` or call `view`
+        and cache its data with versions of flights from `flight_ids(data)`
+        """
+        key = flight_response_cache.key(self.action, request)
+        data = flight_response_cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        schedule_version = flight_response_cache.schedule_version()
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            flight_response_cache.set(
+                key,
+                response.data,
+                flight_ids(response.data),
+                schedule_version,
+            )
+        return response
 
 
 class TicketViewSet(
+    QueryPlanMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -240,3 +646,172 @@ class TicketViewSet(
             return TicketDetailSerializer
 
         return self.serializer_class
+
+
+class ItineraryViewSet(GenericViewSet):
+    """
+    Connecting journeys search over the in-memory flight timetable.
+    Only flights with available tickets are used.
+    """
+
+    serializer_class = ItinerarySerializer
+    # timetable refresh, then up to three checks of seats left
+    query_budgets = {"list": 4}
+    pagination_class = None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.STR,
+                required=True,
+                description="Source airport id or city (ex. ?from=Lviv)",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.STR,
+                required=True,
+                description="Destination airport id or city (ex. ?to=Kyiv)",
+            ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description="First flight departs at or after, "
+                "now by default (ex. ?departure_after=2024-06-09)",
+            ),
+            OpenApiParameter(
+                "departure_before",
+                type=OpenApiTypes.DATETIME,
+                description="First flight departs before, one day after "
+                "`departure_after` by default",
+            ),
+            OpenApiParameter(
+                "tz",
+                type=OpenApiTypes.STR,
+                description="Time zone of dates, UTC by default",
+            ),
+            OpenApiParameter(
+                "max_legs",
+                type=OpenApiTypes.INT,
+                description="Maximum flights in journey, 1-4 (default 2)",
+            ),
+            OpenApiParameter(
+                "min_connection",
+                type=OpenApiTypes.INT,
+                description="Minimum connection time in minutes "
+                "(default 45)",
+            ),
+            OpenApiParameter(
+                "max_connection",
+                type=OpenApiTypes.INT,
+                description="Maximum connection time in minutes "
+                "(default 360)",
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Maximum journeys, 1-50 (default 10)",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        """Find journeys ordered by arrival time, then by number of legs"""
+        serializer = self.get_serializer(
+            self.find_itineraries(request.query_params), many=True
+        )
+        return Response(serializer.data)
+
+    @staticmethod
+    def find_itineraries(params):
+        for param in ("from", "to"):
+            if not params.get(param):
+                raise ValidationError({param: "This parameter is required."})
+
+        tz = filter_timezone(params)
+        departure_after = timezone.now()
+        if params.get("departure_after"):
+            departure_after = parse_moment(
+                "departure_after", params["departure_after"], tz
+            )
+        departure_before = departure_after + timedelta(days=1)
+        if params.get("departure_before"):
+            departure_before = parse_moment(
+                "departure_before", params["departure_before"], tz
+            )
+        min_connection = int_param(params, "min_connection", 45, 0, 1440)
+        max_connection = int_param(
+            params, "max_connection", 360, min_connection, 2880
+        )
+
+        journeys = flight_index.find_itineraries(
+            sources=resolve_airports("from", params["from"]),
+            destinations=resolve_airports("to", params["to"]),
+            departure_after=departure_after,
+            departure_before=departure_before,
+            max_legs=int_param(params, "max_legs", 2, 1, 4),
+            min_connection=timedelta(minutes=min_connection),
+            max_connection=timedelta(minutes=max_connection),
+            limit=int_param(params, "limit", 10, 1, 50),
+        )
+        return [
+            {
+                "departure_time": journey[0].departure_time,
+                "arrival_time": journey[-1].arrival_time,
+                "duration": (journey[-1].arrives - journey[0].departs) // 60,
+                "legs": journey,
+            }
+            for journey in journeys
+        ]
+
+
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    """Temporary reservation of seats before ordering them"""
+
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    query_budgets = {
+        "list": 1,
+        "retrieve": 1,
+        "create": 8,
+        "destroy": 2,
+        "confirm": 15,
+    }
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            user=self.request.user, expires_at__gt=timezone.now()
+        ).order_by("expires_at")
+
+    def get_serializer_class(self):
+        if self.action == "confirm":
+            return OrderSerializer
+
+        return self.serializer_class
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(request=None, responses=OrderSerializer)
+    @action(methods=["POST"], detail=True)
+    def confirm(self, request, pk=None):
+        """Turn the hold into an order of its seats"""
+        hold = self.get_object()
+        serializer = self.get_serializer(
+            data={
+                "tickets": [
+                    {"flight": hold.flight_id, **seat} for seat in hold.seats
+                ]
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(user=request.user)
+            hold.delete()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
 import sys
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
@@ -52,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "airport.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -113,6 +115,31 @@ else:
         }
     }
 
+# Cache shared by all workers (throttling counters and so on),
+# ex. DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# and DJANGO_CACHE_LOCATION=redis://redis:6379 in production
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+if "test" in sys.argv:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": os.environ.get(
+                "DJANGO_CACHE_BACKEND",
+                "django.core.cache.backends.filebased.FileBasedCache",
+            ),
+            "LOCATION": os.environ.get(
+                "DJANGO_CACHE_LOCATION",
+                os.path.join(tempfile.gettempdir(), "airport_api_cache"),
+            ),
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -149,8 +176,9 @@ AUTH_USER_MODEL = "user.User"
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = os.environ.get("DJANGO_STATIC_ROOT", BASE_DIR / "static")
 
-MEDIA_ROOT = BASE_DIR / "media"
+MEDIA_ROOT = os.environ.get("DJANGO_MEDIA_ROOT", BASE_DIR / "media")
 MEDIA_URL = "/media/"
 
 # Default primary key field type
@@ -160,19 +188,45 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "airport.permissions.IsAdminOrIfAuthenticatedReadOnly",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "airport.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "airport.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "airport.throttling.AnonSlidingWindowThrottle",
+        "airport.throttling.UserSlidingWindowThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "1000/day"},
 }
 
+SYNC_CURSOR_LAG = timedelta(seconds=5)
+TOMBSTONE_TTL = timedelta(days=30)
+
+FLIGHT_RESPONSE_CACHE_TTL = timedelta(minutes=5)
+
+SEAT_HOLD_TTL = timedelta(minutes=10)
+SEAT_HOLD_MAX_TTL = timedelta(minutes=30)
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+AUTH_USER_CACHE_TTL = timedelta(minutes=1)
+
+# directory shared by the workers of one host for their metrics totals,
+# unset keeps the totals of every process to itself (ex. runserver)
+METRICS_DIR = os.environ.get("DJANGO_METRICS_DIR")
+METRICS_FLUSH_INTERVAL = timedelta(seconds=5)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=10),  # minutes=5
     "REFRESH_TOKEN_LIFETIME": timedelta(days=10),
@@ -0,0 +1,62 @@
+"""
+Gunicorn config of the production profile (see docker-compose.prod.yml).
+
+Workers are forked from a master that already imported the project
+(`preload_app`), so they share its memory pages and start instantly.
+Threaded workers serve the WSGI application, `THREADS` requests
+of every worker at a time. Uvicorn workers serving the ASGI application
+are opt-in (`GUNICORN_APP=airport_api_service.asgi:application`,
+`GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker`): async views
+don't hold them while waiting for the database, but sync views, nearly
+all of the API, run one at a time per worker.
+Every setting can be overridden by `GUNICORN_*` env variables.
+"""
+
+import multiprocessing
+import os
+
+
+def env(name, default):
+    return os.environ.get(f"GUNICORN_{name}", default)
+
+
+wsgi_app = env("APP", "airport_api_service.wsgi:application")
+worker_class = env("WORKER_CLASS", "gthread")
+threads = int(env("THREADS", 4))
+bind = env("BIND", "0.0.0.0:8000")
+
+# (2 x cores) + 1 keeps cores busy while some workers wait for I/O
+workers = int(env("WORKERS", multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+# longer than nginx upstream `keepalive_timeout`, so nginx closes first
+keepalive = int(env("KEEPALIVE", 5))
+timeout = int(env("TIMEOUT", 30))
+graceful_timeout = int(env("GRACEFUL_TIMEOUT", 30))
+
+# recycle workers now and then to cap memory growth, not all at once
+max_requests = int(env("MAX_REQUESTS", 10_000))
+max_requests_jitter = int(env("MAX_REQUESTS_JITTER", 1_000))
+
+# trust X-Forwarded-* of the nginx container
+forwarded_allow_ips = env("FORWARDED_ALLOW_IPS", "*")
+
+accesslog = env("ACCESSLOG", "-")
+errorlog = "-"
+
+
+def on_starting(server):
+    """Drop metrics totals of the workers of the previous run"""
+    directory = os.environ.get("DJANGO_METRICS_DIR")
+    if directory and os.path.isdir(directory):
+        for entry in os.scandir(directory):
+            os.remove(entry.path)
+
+
+def child_exit(server, worker):
+    """Fold metrics totals of a stopped worker into one file"""
+    directory = os.environ.get("DJANGO_METRICS_DIR")
+    if directory and os.path.isdir(directory):
+        from airport.metrics import fold_exited_worker
+
+        fold_exited_worker(directory, worker.pid)
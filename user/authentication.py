@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+# enough for authentication and permissions, no password hash
+CACHED_FIELDS = ("id", "email", "is_active", "is_staff", "is_superuser")
+
+
+def user_cache_key(user_id):
+    return f"auth_user_fields:{user_id}"
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication which keeps `CACHED_FIELDS` of resolved users
+    in the shared cache for `AUTH_USER_CACHE_TTL` instead of reading
+    the user row on every request, cached users are unsaved instances
+    of those fields. Saving or deleting a user drops the entry
+    (see `signals`), changes made with `QuerySet.update()` are picked up
+    after the TTL.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user id")
+
+        key = user_cache_key(user_id)
+        fields = cache.get(key)
+        if fields is not None:
+            return self.user_model(**fields)
+        # missing and inactive users are rejected here
+        user = super().get_user(validated_token)
+        cache.set(
+            key,
+            {name: getattr(user, name) for name in CACHED_FIELDS},
+            settings.AUTH_USER_CACHE_TTL.total_seconds(),
+        )
+        return user
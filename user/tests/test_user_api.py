@@ -1,9 +1,13 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import user_cache_key
 
 
 CREATE_USER_URL = reverse("user:create")
@@ -152,3 +156,60 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.email, payload["email"])
         self.assertTrue(self.user.check_password(payload["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """Test that authenticated requests read the user from cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_user_is_read_once(self):
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["email"], self.user.email)
+
+    def test_saved_user_is_reloaded(self):
+        self.client.get(ME_URL)
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertTrue(res.data["is_staff"])
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_has_no_password(self):
+        self.client.get(ME_URL)
+
+        self.assertNotIn("password", cache.get(user_cache_key(self.user.id)))
+
+    def test_update_by_cached_user_keeps_other_fields(self):
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {"email": "new@test.com"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "new@test.com")
+        self.assertTrue(self.user.check_password("testpass"))
@@ -1,5 +1,7 @@
+from django.contrib.auth import get_user_model
 from rest_framework import generics
 from rest_framework.permissions import (
+    SAFE_METHODS,
     IsAuthenticated,
     AllowAny
 )
@@ -17,4 +19,8 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        if self.request.method not in SAFE_METHODS:
+            # authenticated users may be cached copies of a few fields
+            user = get_user_model().objects.get(pk=user.pk)
+        return user